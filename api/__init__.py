@@ -77,7 +77,7 @@ def _is_running_migration_process() -> bool:
     return any(s in argv for s in signals)
 
 
-def create_app():
+def create_app(config=None):
     app = Flask(
         __name__,
         static_url_path="/static",
@@ -94,7 +94,12 @@ def create_app():
         SQLALCHEMY_DATABASE_URI=DB_URI,
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SESSION_COOKIE_SAMESITE="Lax",
+        # room write-behind flusher + world tick loop; off for migrations and tests
+        BACKGROUND_WORKERS=os.environ.get("BACKGROUND_WORKERS", "1") == "1" and not _is_running_migration_process(),
     )
+    app.config.update(config or {})
+    if app.config.get("TESTING"):
+        app.config["BACKGROUND_WORKERS"] = False
 
     # Init core extensions with the un-shadowable alias
     SA_DB.init_app(app)
@@ -160,6 +165,12 @@ def create_app():
                         _add_column_if_missing(conn, inspector, "users", "role", "role VARCHAR(16) NOT NULL DEFAULT 'user'")
                         _add_column_if_missing(conn, inspector, "users", "scopes", f"scopes {json_type}")
 
+    # Room state is written behind by a background thread (engine/persistence.py)
+    # (without it rooms are still written on eviction and drained at exit)
+    from engine import persistence as room_persistence
+    if app.config["BACKGROUND_WORKERS"]:
+        room_persistence.WRITER.start(interval=float(os.environ.get("ROOM_FLUSH_INTERVAL", "2")))
+
     # Blueprints (your existing ones)
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     # Register catalog API before legacy items endpoints to take precedence for /api/items
@@ -187,6 +198,20 @@ def create_app():
     app.register_blueprint(core_api_bp)
     from .api.actions import bp as actions_api_bp
     app.register_blueprint(actions_api_bp)
+
+    # World tick loop: advances respawns in the background and pushes room deltas
+    from engine import ticker as world_ticker
+    from .api.routes import WORLD
+
+    def _publish_room_deltas(deltas):
+        socketio = app.extensions.get("socketio")
+        if socketio:
+            for delta in deltas:
+                socketio.emit("room_delta", delta)
+
+    if app.config["BACKGROUND_WORKERS"]:
+        world_ticker.start_ticker(WORLD, rate=float(os.environ.get("WORLD_TICK_HZ", world_ticker.TICK_HZ)),
+                                  publish=_publish_room_deltas)
     try:
         from shardEngine.endpoints import bp as shard_gen_v2_bp, api_bp
         app.register_blueprint(shard_gen_v2_bp, url_prefix="/api/shard-gen-v2", name="shard_gen_v2")
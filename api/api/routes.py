@@ -4,12 +4,15 @@ Core Game API (Blueprint) — now returns room state & interaction options on mo
 """
 from __future__ import annotations
 from pathlib import Path
+from typing import Dict, List, Optional
 from flask import Blueprint, jsonify, request, current_app
 
-from engine.world_loader import load_world, get_room, add_safe_zone, gate_at  # <-- import get_room
+from engine.world_loader import load_world, get_room, add_safe_zone, gate_at, prefetch_around  # <-- import get_room
 from engine.player_engine import move, ensure_first_quest, check_quests
 from engine.combat import maybe_spawn, resolve_combat
 from engine.config import START_POS
+from engine import passability, pathfinding
+from shardEngine import manifest
 
 from flask_login import current_user
 from api.models import db, User, Character
@@ -19,21 +22,23 @@ from api.models.gameplay import CharacterDiscovery
 
 bp = Blueprint("core_api", __name__, url_prefix="/api")
 
-STARTER_SHARD_PATH = Path("client/public/shards/00089451_default.json")
+SHARDS_DIR = Path("client/public/shards")
+STARTER_SHARD_PATH = SHARDS_DIR / "00089451_default.json"
 WORLD = load_world(STARTER_SHARD_PATH)
 add_safe_zone(*START_POS)
 add_safe_zone(START_POS[0] + 1, START_POS[1])  # NPC tile next to spawn
-WORLD.pois.append({"x": START_POS[0], "y": START_POS[1], "type": "town"})
+WORLD.add_poi({"x": START_POS[0], "y": START_POS[1], "type": "town"})
 
 @bp.get("/shards")
 def api_shards():
-    base = Path("client/public/shards")
     items = []
-    for p in sorted(base.glob("*.json")):
+    for e in manifest.load_manifest(SHARDS_DIR):
+        stem = e["file"][:-5]
         items.append({
-            "path": f"/static/public/shards/{p.name}",
-            "file": p.name,
-            "meta": {"displayName": p.stem.replace("_", " ").title(), "name": p.stem},
+            "path": e["path"],
+            "file": e["file"],
+            "meta": {"displayName": stem.replace("_", " ").title(), "name": stem},
+            "thumb": f"/api/shards/{stem}/thumb",
         })
     return jsonify(items)
 
@@ -95,10 +100,20 @@ def api_spawn():
         "log": log,
     })
 
+MAX_MOVE_STEPS = 32
+
 @bp.post("/move")
 def api_move():
+    """
+    {dx, dy} moves one tile. {steps: [{dx, dy}, ...]} applies a batch of
+    single-tile steps via _walk: it stops at the first refused step,
+    encounter, completed quest or shardgate and answers with one log, one room
+    snapshot and one save.
+    """
     data = request.get_json(force=True) or {}
     player = get_player()
+    if "steps" in data:
+        return _move_steps(player, data["steps"])
     dx, dy = int(data.get("dx", 0)), int(data.get("dy", 0))
 
     res = move(WORLD, player, dx, dy)
@@ -130,6 +145,8 @@ def api_move():
     res["log"] = log
     res["room"] = room
     res["interactions"] = _interactions(room)
+    if res.get("ok"):
+        prefetch_around(WORLD, *player.pos)
 
 
     socketio = current_app.extensions.get("socketio")
@@ -142,6 +159,91 @@ def api_move():
 
     return jsonify(res)
 
+def _move_steps(player, raw_steps):
+    try:
+        steps = [(int(st["dx"]), int(st["dy"])) for st in raw_steps]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"ok": False, "error": "steps must be a list of {dx, dy}"}), 400
+    if len(steps) > MAX_MOVE_STEPS or any(max(abs(dx), abs(dy)) != 1 for dx, dy in steps):
+        return jsonify({"ok": False, "error": f"up to {MAX_MOVE_STEPS} single-tile steps"}), 400
+
+    walk = _walk(player, steps)
+    room = get_room(WORLD, *player.pos).export()
+    res = {
+        "ok": walk["walked"] == len(steps),
+        "reason": walk["stopped"] or "ok",
+        "walked": walk["walked"],
+        "pos": player.pos,
+        "player": player.as_public(),
+        "log": walk["log"],
+        "room": room,
+        "interactions": _interactions(room),
+    }
+    if walk["walked"]:
+        prefetch_around(WORLD, *player.pos)
+
+    socketio = current_app.extensions.get("socketio")
+    if socketio:
+        socketio.emit("movement", res)
+        if walk["stopped"] == "encounter":
+            socketio.emit("combat", {"events": res["log"], "player": res["player"]})
+
+    save_player(player)
+    return jsonify(res)
+
+MAX_TRAVEL_STEPS = 256
+
+@bp.post("/travel")
+def api_travel():
+    """
+    Route to {x, y} over the player's passability and walk it in one request.
+    Walking stops early on an encounter, a completed quest, a shardgate or a
+    refused step; "path" is the planned route, "walked" the steps taken.
+    """
+    data = request.get_json(force=True) or {}
+    player = get_player()
+    try:
+        goal = (int(data["x"]), int(data["y"]))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"ok": False, "error": "x and y are required"}), 400
+
+    caps = passability.caps_of(player.flags)
+    path = pathfinding.route(WORLD, player.pos, goal, caps)
+    if path is None:
+        return jsonify({"ok": False, "reason": "no_route", "path": [], "walked": 0,
+                        "log": [f"You can't find a way to ({goal[0]},{goal[1]})."]})
+    if len(path) - 1 > MAX_TRAVEL_STEPS:
+        return jsonify({"ok": False, "reason": "too_far", "path": [], "walked": 0,
+                        "log": [f"({goal[0]},{goal[1]}) is too far to travel in one go."]})
+
+    start = player.pos
+    walk = _walk(player, pathfinding.steps_of(path))
+    log = [f"You travel {walk['walked']} tiles from ({start[0]},{start[1]}) to ({player.pos[0]},{player.pos[1]})."]
+    log += walk["log"]
+    room = get_room(WORLD, *player.pos).export()
+    res = {
+        "ok": walk["walked"] == len(path) - 1,
+        "reason": walk["stopped"] or "arrived",
+        "path": [list(p) for p in path],
+        "walked": walk["walked"],
+        "pos": player.pos,
+        "player": player.as_public(),
+        "log": log,
+        "room": room,
+        "interactions": _interactions(room),
+    }
+    if walk["walked"]:
+        prefetch_around(WORLD, *player.pos)
+
+    socketio = current_app.extensions.get("socketio")
+    if socketio:
+        socketio.emit("movement", res)
+        if walk["stopped"] == "encounter":
+            socketio.emit("combat", {"events": log, "player": res["player"]})
+
+    save_player(player)
+    return jsonify(res)
+
 @bp.post("/interact")
 def api_interact():
     player = get_player()
@@ -156,8 +258,63 @@ def api_state():
     room = get_room(WORLD, *player.pos).export()
     return jsonify({"player": player.as_public(), "room": room, "interactions": _interactions(room)})
 
+@bp.get("/passability")
+def api_passability():
+    """Bit-packed passability of ?x0=&y0=&x1=&y1= (inclusive, default: 32x32 around the player) for the player's capabilities."""
+    player = get_player()
+    px, py = player.pos
+    x0 = request.args.get("x0", px - 16, type=int)
+    y0 = request.args.get("y0", py - 16, type=int)
+    x1 = request.args.get("x1", x0 + 31, type=int)
+    y1 = request.args.get("y1", y0 + 31, type=int)
+    if x1 < x0 or y1 < y0 or (x1 - x0 + 1) * (y1 - y0 + 1) > 256 * 256:
+        return jsonify({"error": "invalid rect"}), 400
+    caps = passability.caps_of(player.flags)
+    return jsonify({**passability.window(WORLD, x0, y0, x1, y1, caps),
+                    "exits": sorted(passability.neighbours(WORLD, px, py, caps))})
+
 # ------------------------------- helpers --------------------------------------
 
+def _walk(player, steps) -> Dict:
+    """
+    Apply (dx, dy) steps with move()'s rules, rolling encounters and quest
+    hooks on every tile entered. Stops at the first refused step, encounter,
+    completed quest or shardgate. Returns {"walked", "stopped", "log"}; the
+    caller saves the player once.
+    """
+    log: List[str] = []
+    walked = 0
+    stopped: Optional[str] = None
+    for dx, dy in steps:
+        res = move(WORLD, player, int(dx), int(dy))
+        log += res["log"]
+        if not res["ok"]:
+            stopped = res["reason"]
+            break
+        walked += 1
+
+        enemy = maybe_spawn(WORLD.biome_at(*player.pos), player.pos in WORLD.road_tiles)
+        if enemy:
+            log += resolve_combat(player, enemy)
+            stopped = "encounter"
+            break
+
+        done = len(player.quests_done)
+        check_quests(WORLD, player, log)
+        if len(player.quests_done) != done:
+            stopped = "quest"
+            break
+
+        g = gate_at(WORLD, *player.pos)
+        if g:
+            try:
+                _upsert_discovery_for_current(g.get("id"))
+            except Exception:
+                pass
+            stopped = "shardgate"
+            break
+    return {"walked": walked, "stopped": stopped, "log": log}
+
 def _interactions(room: dict) -> Dict:
     """
     Compact hints for the client so it can render buttons/menus
@@ -451,6 +451,30 @@ def admin_char_teleport(character_id):
     return jsonify(payload)
 
 
+# -------------- Room Cache --------------
+
+
+@admin_api.get("/room-cache")
+def admin_room_cache():
+    from engine import persistence
+    from engine.world_loader import PREFETCHER
+    from .api.routes import WORLD
+
+    return jsonify(world=WORLD.id, **WORLD._rooms.stats(), writer=persistence.WRITER.stats(),
+                   prefetch={"radius": WORLD.prefetch_radius, **PREFETCHER.stats()})
+
+
+@admin_api.get("/world-tick")
+def admin_world_tick():
+    from engine.ticker import ticker_for
+    from .api.routes import WORLD
+
+    ticker = ticker_for(WORLD)
+    if ticker is None:
+        return jsonify(world=WORLD.id, running=False, pending_respawns=len(WORLD.respawns))
+    return jsonify(ticker.stats())
+
+
 # -------------- Console Exec --------------
 
 
@@ -5,7 +5,11 @@ from pathlib import Path
 from typing import List
 import json
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, send_file
+
+from shardEngine import chunks, journal, manifest, thumbnails
+from shardEngine.persistence import _atomic_write, finalize_shard
+from shardEngine.delivery import send_shard
 
 
 bp = Blueprint("api_shards_fs", __name__, url_prefix="/api/shards")
@@ -15,16 +19,16 @@ SHARDS_DIR = ROOT / "client" / "public" / "shards"
 SHARDS_DIR.mkdir(parents=True, exist_ok=True)
 
 SAFE_NAME = re.compile(r"^[A-Za-z0-9_\-]+$")
+DEFAULT_CHUNK_LAYERS = "grid"
 
 
-def _files() -> List[Path]:
-    return sorted(SHARDS_DIR.glob("*.json"))
+def _files() -> List[str]:
+    return [e["file"] for e in manifest.load_manifest(SHARDS_DIR)]
 
 
 @bp.get("")
 def list_shards():
-    items = [p.name for p in _files()]
-    return jsonify(items)
+    return jsonify(_files())
 
 
 @bp.get("/<name>")
@@ -37,7 +41,8 @@ def get_shard(name: str):
     if not p.exists():
         return jsonify({"error": "not found"}), 404
     try:
-        return jsonify(json.loads(p.read_text()))
+        journal.compact(p)
+        return send_shard(p)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -56,8 +61,90 @@ def put_shard(name: str):
         # simple backup
         if p.exists():
             (SHARDS_DIR / f"{name}.json.bak").write_text(p.read_text())
-        p.write_text(json.dumps(body, indent=2))
+        _atomic_write(p, json.dumps(body, indent=2))
+        journal.discard(p)
+        finalize_shard(p, meta=body.get("meta") if isinstance(body.get("meta"), dict) else {}, payload=body)
         return jsonify({"ok": True, "file": p.name, "path": f"/static/public/shards/{p.name}"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+@bp.patch("/<name>")
+def patch_shard(name: str):
+    """Apply {"ops": [...]} as one journaled batch; the response carries the inverse ops for undo."""
+    if name.endswith(".json"):
+        name = name[:-5]
+    if not SAFE_NAME.match(name):
+        return jsonify({"error": "invalid name"}), 400
+    p = SHARDS_DIR / f"{name}.json"
+    if not p.exists():
+        return jsonify({"error": "not found"}), 404
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "json body required"}), 400
+    try:
+        res = journal.patch(p, body.get("ops"))
+    except journal.JournalError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"ok": True, "file": p.name, **res})
+
+
+@bp.get("/<name>/chunks")
+def get_chunks(name: str):
+    """Fixed-size chunks overlapping ?x0=&y0=&x1=&y1= (inclusive), for ?layers=grid,roads,...; ?zoom=0.25 serves a LOD level."""
+    if name.endswith(".json"):
+        name = name[:-5]
+    if not SAFE_NAME.match(name):
+        return jsonify({"error": "invalid name"}), 400
+    p = SHARDS_DIR / f"{name}.json"
+    if not p.exists():
+        return jsonify({"error": "not found"}), 404
+    try:
+        x0 = request.args.get("x0", 0, type=int)
+        y0 = request.args.get("y0", 0, type=int)
+        x1 = request.args.get("x1", x0 + chunks.CHUNK - 1, type=int)
+        y1 = request.args.get("y1", y0 + chunks.CHUNK - 1, type=int)
+        zoom = request.args.get("zoom", 1.0, type=float)
+        layers = [l for l in request.args.get("layers", DEFAULT_CHUNK_LAYERS).split(",") if l]
+        unknown = [l for l in layers if l not in chunks.LAYERS]
+        if unknown:
+            return jsonify({"error": f"unknown layers: {', '.join(unknown)}", "layers": list(chunks.LAYERS)}), 400
+
+        journal.compact(p)
+        entry = manifest.fresh_entry(p)
+        cf = chunks.open_chunks(p, entry["hash"])
+        body, etag = chunks.render_chunks(cf, name=name, x0=x0, y0=y0, x1=x1, y1=y1,
+                                           layers=layers, zoom=zoom)
+    except chunks.ChunkError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.cache_control.no_cache = True  # always revalidate; unchanged chunks cost a 304
+    return resp.make_conditional(request)
+
+
+@bp.get("/<name>/thumb")
+def get_thumb(name: str):
+    """PNG minimap of the shard, longest side ?size= px (cached per content hash)."""
+    if name.endswith(".json"):
+        name = name[:-5]
+    if not SAFE_NAME.match(name):
+        return jsonify({"error": "invalid name"}), 400
+    p = SHARDS_DIR / f"{name}.json"
+    if not p.exists():
+        return jsonify({"error": "not found"}), 404
+    size = thumbnails.clamp_size(request.args.get("size", thumbnails.DEFAULT_SIZE))
+    try:
+        journal.compact(p)
+        digest = manifest.fresh_entry(p)["hash"]
+        out = thumbnails.ensure_thumbnail(p, digest, size)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return send_file(out, mimetype="image/png", etag=f"{digest}-{size}", conditional=True)
@@ -2,6 +2,7 @@ from engine.actionRegistry import action
 from engine.services.rooms import for_player
 from engine.services import stamina
 from engine import combat as combat_mod
+from engine.world_loader import persist_room
 
 @action("attack")
 def attack(*, player, payload: dict) -> dict:
@@ -17,6 +18,7 @@ def attack(*, player, payload: dict) -> dict:
         result = combat_mod.resolve_round(player, target_id)
     else:
         result = {"events": [{"type": "log", "text": f"You strike {target_id} (stub)."}], "defeated_ids": []}
+    persist_room(room_obj)
 
     result.setdefault("player", player.as_public())
     result.setdefault("room_delta", {"enemies": room_obj.enemies})
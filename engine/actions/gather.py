@@ -1,5 +1,6 @@
 from engine.actionRegistry import action
 from engine.services.rooms import for_player
+from engine.world_loader import persist_room
 from engine.services import resources, stamina
 
 @action("gather")
@@ -20,6 +21,7 @@ def gather_node(*, player, payload: dict) -> dict:
     qty = resources.harvest_amount(player, node)
     # apply_harvest signature kept; it only uses node & player effectively
     resources.apply_harvest(room_obj.__dict__, node, qty, player)
+    persist_room(room_obj)
 
     return {
         "ok": True,
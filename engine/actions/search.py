@@ -1,6 +1,7 @@
 from engine.actionRegistry import action
 from engine.services.rooms import for_player, player_room_id
 from engine.services import stamina, cooldowns, loot
+from engine.world_loader import persist_room
 
 @action("search")
 def search_room(*, player, payload: dict) -> dict:
@@ -25,7 +26,9 @@ def search_room(*, player, payload: dict) -> dict:
                 continue
         new_searchables.append(s)
 
-    room_obj.searchables = new_searchables
+    if len(new_searchables) != len(room_obj.searchables):
+        room_obj.searchables = new_searchables
+        persist_room(room_obj)
 
     msg = ("You rummage around… You found " +
            ", ".join(f"{x['qty']} × {x['name']}" for x in found) + "!"
@@ -0,0 +1,102 @@
+"""Palette-encoded biome grid.
+
+A world's biomes as a palette of names plus one small integer per tile
+(bytearray, or array('H') past 256 biomes), row-major. Per-biome facts are
+precomputed once per palette entry (see `table`), so hot checks are an index
+plus an integer compare instead of string work.
+
+The list-of-lists API keeps working read-only: `grid[y][x]`, `len(grid)`,
+iterating rows and `grid.to_rows()` all yield biome names.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Callable, Iterator, List, Optional, Sequence, Union
+
+Ids = Union[bytearray, array]
+
+
+class _Row(Sequence):
+    __slots__ = ("_grid", "_y")
+
+    def __init__(self, grid: "BiomeGrid", y: int):
+        self._grid, self._y = grid, y
+
+    def __len__(self) -> int:
+        return self._grid.width
+
+    def __getitem__(self, x):
+        g = self._grid
+        start = self._y * g.width
+        if isinstance(x, slice):
+            return [g.palette[i] for i in g.ids[start:start + g.width][x]]
+        if x < 0:
+            x += g.width
+        if not 0 <= x < g.width:
+            raise IndexError(x)
+        return g.palette[g.ids[start + x]]
+
+    def __iter__(self) -> Iterator[str]:
+        g = self._grid
+        start = self._y * g.width
+        return map(g.palette.__getitem__, g.ids[start:start + g.width])
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class BiomeGrid:
+    __slots__ = ("width", "height", "palette", "ids", "_codes")
+
+    def __init__(self, width: int, height: int, palette: List[str], ids: Ids):
+        self.width, self.height = width, height
+        self.palette = palette
+        self.ids = ids
+        self._codes = {name: i for i, name in enumerate(palette)}
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[str]]) -> "BiomeGrid":
+        codes: dict = {}
+        flat = [codes.setdefault(cell, len(codes)) for row in rows for cell in row]
+        ids: Ids = bytearray(flat) if len(codes) <= 256 else array("H", flat)
+        height = len(rows)
+        return cls(len(rows[0]) if height else 0, height, list(codes), ids)
+
+    # -------- ids --------
+
+    def id_at(self, x: int, y: int) -> int:
+        """Palette index at an in-bounds tile."""
+        return self.ids[y * self.width + x]
+
+    def code(self, name: str) -> Optional[int]:
+        return self._codes.get(name)
+
+    def table(self, pred: Callable[[str], bool]) -> bytearray:
+        """One byte per palette entry: 1 where pred(biome name) holds."""
+        return bytearray(1 if pred(name) else 0 for name in self.palette)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.ids) * self.ids.itemsize if isinstance(self.ids, array) else len(self.ids)
+
+    # -------- list-of-rows view --------
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> _Row:
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError(y)
+        return _Row(self, y)
+
+    def __iter__(self) -> Iterator[_Row]:
+        return (_Row(self, y) for y in range(self.height))
+
+    def to_rows(self) -> List[List[str]]:
+        return [list(row) for row in self]
@@ -0,0 +1,143 @@
+"""Bit-packed passability masks.
+
+One mask per capability set (a small int of the CAP_* bits below), built
+lazily per world and cached on it: bit i of the mask (byte i >> 3, bit i & 7)
+is 1 when a player with those capabilities may enter tile i (row-major).
+The rules are exactly player_engine.can_enter's:
+
+- bridge tiles are always enterable
+- road tiles override blocked land, open ocean and steep biomes
+- requires_boat tiles need a boat / swimming (or flight)
+- blocked land needs a road/bridge (or flight)
+- ocean needs a boat / swimming, steep biomes need climbing (or flight)
+
+Masks are derived from world sets and biome tables; call
+invalidate(world) after mutating road_tiles / blocked_land / etc.
+"""
+
+from __future__ import annotations
+
+import base64
+from typing import Dict, List, Mapping, Tuple
+
+CAP_BOAT = 1
+CAP_SWIM = 2
+CAP_CLIMB = 4
+CAP_FLY = 8
+CAP_NOCLIP = 16
+
+DIRS: Dict[str, Tuple[int, int]] = {"north": (0, -1), "south": (0, 1), "east": (1, 0), "west": (-1, 0)}
+
+
+def caps_of(flags: Mapping[str, bool]) -> int:
+    """Capability bits for a player's flags."""
+    if flags.get("noclip") and flags.get("devmode"):
+        return CAP_NOCLIP
+    return ((CAP_BOAT if flags.get("has_boat") else 0)
+            | (CAP_SWIM if flags.get("can_swim") else 0)
+            | (CAP_CLIMB if flags.get("can_climb") else 0)
+            | (CAP_FLY if flags.get("can_fly") else 0))
+
+
+def _pack(ok: bytearray) -> bytearray:
+    """0/1 bytes -> bits, LSB first; one strided slice per bit position."""
+    n = len(ok)
+    packed = bytearray(-(-n // 8))
+    for k in range(8):
+        lane = ok[k::8]
+        if k:
+            lane = bytes(b << k for b in lane)
+        packed[:len(lane)] = bytes(map(int.__or__, packed[:len(lane)], lane))
+    return packed
+
+
+def build_mask(world, caps: int) -> bytearray:
+    W, H = world.size
+    n = W * H
+    if caps & (CAP_FLY | CAP_NOCLIP):
+        return _pack(bytearray(b"\x01") * n)
+    water_ok = bool(caps & (CAP_BOAT | CAP_SWIM))
+    climb_ok = bool(caps & CAP_CLIMB)
+
+    props = world.biome_props
+    table = bytes(
+        0 if (props["water"][b] and not water_ok) or (props["impassable"][b] and not climb_ok) else 1
+        for b in range(len(world.grid.palette))
+    )
+    ids = world.grid.ids
+    if isinstance(ids, bytearray):
+        ok = bytearray(ids.translate(table.ljust(256, b"\x00")))
+    else:
+        ok = bytearray(table[b] for b in ids)
+
+    def each(tiles):
+        for x, y in tiles:
+            if 0 <= x < W and 0 <= y < H:
+                yield y * W + x
+
+    for i in each(world.road_tiles):
+        ok[i] = 1
+    carved = world.road_tiles | world.bridge_tiles
+    for i in each(world.blocked_land - carved):
+        ok[i] = 0
+    if not water_ok:
+        for i in each(world.requires_boat):
+            ok[i] = 0
+    for i in each(world.bridge_tiles):
+        ok[i] = 1
+    return _pack(ok)
+
+
+def mask_for(world, caps: int) -> bytearray:
+    masks = world.passability
+    mask = masks.get(caps)
+    if mask is None:
+        mask = masks[caps] = build_mask(world, caps)
+    return mask
+
+
+def invalidate(world) -> None:
+    """Drop cached masks (and the routes planned over them)."""
+    world.passability.clear()
+    if getattr(world, "routes", None) is not None:
+        world.routes.clear()
+
+
+def passable(world, x: int, y: int, caps: int) -> bool:
+    W, H = world.size
+    if not (0 <= x < W and 0 <= y < H):
+        return False
+    i = y * W + x
+    return bool(mask_for(world, caps)[i >> 3] >> (i & 7) & 1)
+
+
+def neighbours(world, x: int, y: int, caps: int) -> Dict[str, Tuple[int, int]]:
+    """Enterable 4-neighbours of (x, y) as {direction: (x, y)}."""
+    if caps & CAP_NOCLIP:
+        return {d: (x + dx, y + dy) for d, (dx, dy) in DIRS.items()}
+    return {d: (x + dx, y + dy) for d, (dx, dy) in DIRS.items() if passable(world, x + dx, y + dy, caps)}
+
+
+def window(world, x0: int, y0: int, x1: int, y1: int, caps: int) -> Dict:
+    """
+    Passability of the inclusive rect clipped to the map, for the client:
+    {"x", "y", "w", "h", "caps", "bits"} with `bits` the base64 of the
+    row-major, LSB-first bit-packed window.
+    """
+    W, H = world.size
+    x0, y0, x1, y1 = max(0, x0), max(0, y0), min(W - 1, x1), min(H - 1, y1)
+    w, h = max(0, x1 - x0 + 1), max(0, y1 - y0 + 1)
+    mask = mask_for(world, caps)
+    ok = bytearray(w * h)
+    for row in range(h):
+        base = (y0 + row) * W + x0
+        for col in range(w):
+            i = base + col
+            ok[row * w + col] = mask[i >> 3] >> (i & 7) & 1
+    return {"x": x0, "y": y0, "w": w, "h": h, "caps": caps,
+            "bits": base64.b64encode(bytes(_pack(ok))).decode("ascii")}
+
+
+def unpack(bits: str, count: int) -> List[int]:
+    raw = base64.b64decode(bits)
+    return [raw[i >> 3] >> (i & 7) & 1 for i in range(count)]
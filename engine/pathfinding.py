@@ -0,0 +1,127 @@
+"""Server-side routing over the passability masks.
+
+A* on the 4-neighbour tile grid of a world, using the bit-packed mask for the
+player's capability set (engine/passability.py). Road and bridge tiles cost
+ROAD_COST instead of 1, so routes prefer roads; the heuristic is Manhattan
+distance times ROAD_COST, which keeps it admissible.
+
+Routes are cached per world in an LRU keyed by (start region, goal, caps),
+regions being REGION x REGION tiles. A hit from a different start in the
+same region is reused by joining onto the cached path with a short bounded
+search, instead of re-running A* across the map.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import passability
+
+Coord = Tuple[int, int]
+
+ROAD_COST = 0.5
+REGION = 8
+CACHE_SIZE = 512
+MAX_NODES = 1 << 18      # expansion budget per search
+JOIN_NODES = 4 * REGION * REGION
+
+
+class RouteCache(OrderedDict):
+    """LRU of (region_x, region_y, goal_x, goal_y, caps) -> full path (start first)."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get_route(self, key) -> Optional[List[Coord]]:
+        path = self.get(key)
+        if path is not None:
+            self.move_to_end(key)
+        return path
+
+    def put_route(self, key, path: List[Coord]) -> None:
+        self[key] = path
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+def _search(world, start: Coord, goals: Iterable[Coord], caps: int, *, heuristic: bool, max_nodes: int) -> Optional[List[Coord]]:
+    W, H = world.size
+    mask = passability.mask_for(world, caps)
+    cheap = {y * W + x for x, y in world.road_tiles | world.bridge_tiles if 0 <= x < W and 0 <= y < H}
+    targets = {y * W + x for x, y in goals if 0 <= x < W and 0 <= y < H}
+    if not targets:
+        return None
+    # with several targets the search runs without a heuristic (Dijkstra)
+    first = next(iter(targets))
+    gx, gy = first % W, first // W
+
+    s = start[1] * W + start[0]
+    best: Dict[int, float] = {s: 0.0}
+    came: Dict[int, int] = {}
+    frontier = [(0.0, 0.0, s)]
+    expanded = 0
+    while frontier:
+        _, g, i = heapq.heappop(frontier)
+        if i in targets:
+            out = [i]
+            while i != s:
+                i = came[i]
+                out.append(i)
+            return [(j % W, j // W) for j in reversed(out)]
+        if g > best.get(i, float("inf")):
+            continue
+        expanded += 1
+        if expanded > max_nodes:
+            return None
+        x, y = i % W, i // W
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if not (0 <= nx < W and 0 <= ny < H):
+                continue
+            j = ny * W + nx
+            if not mask[j >> 3] >> (j & 7) & 1:
+                continue
+            ng = g + (ROAD_COST if j in cheap else 1.0)
+            if ng < best.get(j, float("inf")):
+                best[j] = ng
+                came[j] = i
+                h = (abs(nx - gx) + abs(ny - gy)) * ROAD_COST if heuristic else 0.0
+                heapq.heappush(frontier, (ng + h, ng, j))
+    return None
+
+
+def find_path(world, start: Coord, goal: Coord, caps: int, *, max_nodes: int = MAX_NODES) -> Optional[List[Coord]]:
+    """Cheapest 4-neighbour route from start to goal (both included), or None if unreachable."""
+    start, goal = (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+    if start == goal:
+        return [start]
+    if not passability.passable(world, *goal, caps):
+        return None
+    return _search(world, start, [goal], caps, heuristic=True, max_nodes=max_nodes)
+
+
+def route(world, start: Coord, goal: Coord, caps: int) -> Optional[List[Coord]]:
+    """find_path through the world's route cache."""
+    start, goal = (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+    cache: RouteCache = world.routes
+    key = (start[0] // REGION, start[1] // REGION, goal[0], goal[1], caps)
+    cached = cache.get_route(key)
+    if cached is not None:
+        if start in cached:
+            return cached[cached.index(start):]
+        # join the cached route from inside the region
+        near = [p for p in cached if p[0] // REGION == key[0] and p[1] // REGION == key[1]]
+        join = _search(world, start, near, caps, heuristic=False, max_nodes=JOIN_NODES)
+        if join is not None:
+            return join + cached[cached.index(join[-1]) + 1:]
+    path = find_path(world, start, goal, caps)
+    if path is not None:
+        cache.put_route(key, path)
+    return path
+
+
+def steps_of(path: List[Coord]) -> List[Tuple[int, int]]:
+    return [(bx - ax, by - ay) for (ax, ay), (bx, by) in zip(path, path[1:])]
@@ -1,11 +1,24 @@
-"""Simple SQLite-backed persistence for room state."""
+"""Simple SQLite-backed persistence for room state.
+
+Mutated rooms are written behind: `WRITER.mark(room)` flags the room dirty and
+queues it, and the queue is written in batches (one transaction each) by a
+daemon thread started with `WRITER.start()`, by `WRITER.flush()`, or when the
+room cache evicts a dirty room. The queue is drained at interpreter exit.
+"""
 
 from __future__ import annotations
 
+import atexit
 import json
+import logging
 import sqlite3
+import threading
+from collections import OrderedDict
 from dataclasses import asdict
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
 
 
 # Path to the sqlite database storing room state
@@ -30,7 +43,10 @@ def _get_conn() -> sqlite3.Connection:
 
 
 def load_room(world_id: str, x: int, y: int):
-    """Load a room from the database. Returns None if not present."""
+    """Load a room (a still-queued one first, else from the database). Returns None if not present."""
+    queued = WRITER.queued((world_id, int(x), int(y)))
+    if queued is not None:
+        return queued
     conn = _get_conn()
     cur = conn.execute(
         "SELECT data FROM rooms WHERE world_id=? AND x=? AND y=?",
@@ -43,17 +59,225 @@ def load_room(world_id: str, x: int, y: int):
     data = json.loads(row[0])
     from .world_loader import Room  # local import to avoid circular dependency
 
-    return Room(**data)
+    return Room(**data, stored=True)
+
+
+def load_rooms(world_id: str, keys: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], object]:
+    """
+    Load several rooms of one world: queued rooms first, the rest with one
+    query over their bounding box. Missing rooms are simply absent.
+    """
+    wanted = {(int(x), int(y)) for x, y in keys}
+    out: Dict[Tuple[int, int], object] = {}
+    for key in wanted:
+        queued = WRITER.queued((world_id, *key))
+        if queued is not None:
+            out[key] = queued
+    rest = wanted - out.keys()
+    if not rest:
+        return out
+    xs = [k[0] for k in rest]
+    ys = [k[1] for k in rest]
+    conn = _get_conn()
+    rows = conn.execute(
+        "SELECT x, y, data FROM rooms WHERE world_id=? AND x BETWEEN ? AND ? AND y BETWEEN ? AND ?",
+        (world_id, min(xs), max(xs), min(ys), max(ys)),
+    ).fetchall()
+    conn.close()
+    from .world_loader import Room  # local import to avoid circular dependency
+
+    for x, y, data in rows:
+        if (x, y) in rest:
+            out[(x, y)] = Room(**json.loads(data), stored=True)
+    return out
+
+
+Row = Tuple[str, int, int, str]
+
+
+def _row(room) -> Row:
+    data = asdict(room)
+    data.pop("dirty", None)
+    data.pop("stored", None)
+    return (room.world_id, room.x, room.y, json.dumps(data))
 
 
 def save_room(room) -> None:
     """Persist a room to the database."""
+    save_rooms([room])
+
+
+def save_rooms(rooms: Iterable) -> int:
+    """Persist several rooms in one transaction. Returns the number written."""
+    return save_rows([_row(r) for r in rooms])
+
+
+def save_rows(rows: List[Row]) -> int:
+    """Write already serialized rows (see _row) in one transaction. Returns the number written."""
+    if not rows:
+        return 0
     conn = _get_conn()
-    data = json.dumps(asdict(room))
-    conn.execute(
-        "INSERT OR REPLACE INTO rooms(world_id, x, y, data) VALUES (?,?,?,?)",
-        (room.world_id, room.x, room.y, data),
-    )
-    conn.commit()
-    conn.close()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO rooms(world_id, x, y, data) VALUES (?,?,?,?)",
+                rows,
+            )
+    finally:
+        conn.close()
+    return len(rows)
+
+
+# ------------------------ Write-behind queue ------------------------
+
+RoomKey = Tuple[str, int, int]
+
+
+def _key(room) -> RoomKey:
+    return (room.world_id, int(room.x), int(room.y))
+
+
+class WriteBehind:
+    """
+    Dirty rooms waiting to be written, newest state wins. The queue holds the
+    live Room objects (served to readers by `queued`) next to the row each
+    was serialized to when it was marked, keyed by world and tile; the writer
+    thread only ever touches those snapshots, never rooms that handlers and
+    the ticker are mutating. A room's dirty flag is cleared when it is taken
+    for a batch, so a mutation during the write marks and queues it again.
+    Taken rooms stay visible to `queued` until their write returns, so a
+    room evicted mid-write is never reloaded from a row that does not have
+    its state yet.
+    """
+
+    def __init__(self, interval: float = 2.0, batch_size: int = 256):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: "OrderedDict[RoomKey, Tuple[object, Row]]" = OrderedDict()
+        self._inflight: Dict[RoomKey, object] = {}
+        self._lock = threading.Lock()
+        self._io = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.writes = 0
+        self.batches = 0
+        self.errors = 0
+
+    def mark(self, room) -> None:
+        """Queue `room` as it is now; call again after mutating it further."""
+        row = _row(room)
+        room.dirty = True
+        with self._lock:
+            self._pending[_key(room)] = (room, row)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def queued(self, key: RoomKey):
+        with self._lock:
+            entry = self._pending.get(key)
+            return entry[0] if entry is not None else self._inflight.get(key)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _take(self, limit: int):
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < limit:
+                key, (room, row) = self._pending.popitem(last=False)
+                room.dirty = False
+                self._inflight[key] = room
+                batch.append((room, row))
+            return batch
+
+    def _requeue(self, batch) -> None:
+        with self._lock:
+            for room, row in batch:
+                room.dirty = True
+                self._pending.setdefault(_key(room), (room, row))
+
+    def _landed(self, batch) -> None:
+        with self._lock:
+            for room, _ in batch:
+                key = _key(room)
+                if self._inflight.get(key) is room:
+                    del self._inflight[key]
+
+    def _write(self, batch) -> int:
+        if not batch:
+            return 0
+        try:
+            with self._io:
+                n = save_rows([row for _, row in batch])
+        except Exception:
+            self.errors += 1
+            self._requeue(batch)
+            raise
+        finally:
+            self._landed(batch)
+        for room, _ in batch:
+            room.stored = True
+        self.writes += n
+        self.batches += 1
+        return n
+
+    def flush(self, limit: Optional[int] = None) -> int:
+        """Write up to `limit` queued rooms (default: one batch). Returns the number written."""
+        return self._write(self._take(limit or self.batch_size))
+
+    def flush_room(self, room) -> bool:
+        """Write one room now if it is queued (used on cache eviction)."""
+        with self._lock:
+            key = _key(room)
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                return False
+            entry[0].dirty = False
+            self._inflight[key] = entry[0]
+        self._write([entry])
+        return True
+
+    def drain(self) -> int:
+        written = 0
+        while self._pending:
+            written += self.flush()
+        return written
+
+    # -------- background thread --------
+
+    def start(self, interval: Optional[float] = None) -> None:
+        if interval is not None:
+            self.interval = interval
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="room-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception:
+                log.exception("room write-behind flush failed")
+
+    def stop(self) -> int:
+        """Stop the thread and write everything still queued."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        return self.drain()
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": self.pending(), "writes": self.writes, "batches": self.batches, "errors": self.errors}
+
+
+WRITER = WriteBehind()
+atexit.register(WRITER.stop)
 
@@ -2,6 +2,8 @@
 from dataclasses import dataclass, field
 from typing import Dict, Tuple, List, Optional
 
+from . import passability
+
 @dataclass
 class QuestState:
     id: str
@@ -56,6 +58,11 @@ def can_enter(world, x: int, y: int, player: Player) -> tuple[bool, str]:
     if not (0 <= x < W and 0 <= y < H):
         return False, "bounds"
 
+    # loaded worlds carry precomputed masks: the common "yes" is one bit test,
+    # the rules below only run to explain a refusal
+    if hasattr(world, "passability") and passability.passable(world, x, y, passability.caps_of(player.flags)):
+        return True, "ok"
+
     # Road / bridge overrides come FIRST
     on_road   = (x, y) in world.road_tiles
     on_bridge = (x, y) in world.bridge_tiles
@@ -77,13 +84,20 @@ def can_enter(world, x: int, y: int, player: Player) -> tuple[bool, str]:
         return False, "need_boat"
 
     # Terrain-based restrictions — road/bridge can carve a pass
-    biome = world.biome_at(x, y)
+    props = getattr(world, "biome_props", None)
+    if props:
+        # palette-encoded worlds: precomputed per-biome flags, integer lookups only
+        b = world.biome_id_at(x, y)
+        is_ocean, is_steep = props["water"][b], props["impassable"][b]
+    else:
+        biome = world.biome_at(x, y)
+        is_ocean, is_steep = biome.lower() == "ocean", biome in IMPASSABLE_BIOMES
     # Treat open ocean as requiring a boat unless overridden
-    if biome.lower() == "ocean" and not (
+    if is_ocean and not (
         on_road or on_bridge or player.flags.get("has_boat") or player.flags.get("can_swim") or player.flags.get("can_fly")
     ):
         return False, "ocean"
-    if biome in IMPASSABLE_BIOMES and not (
+    if is_steep and not (
         on_road
         or on_bridge
         or player.flags.get("can_climb")
@@ -0,0 +1,104 @@
+"""Respawn scheduling.
+
+Depleted resource nodes and defeated enemies are registered in a per-world
+min-heap ordered by the time they come back (depleted_at / defeated_at plus
+respawn_s), instead of every room access re-checking every entry. Callers
+look at `next_due` (one float compare) and pop only what is due, so restoring
+is O(due log n) and a room access with nothing due costs nothing.
+
+Heap entries name the room tile, the kind ("resource" / "enemy"), the entry
+id and the timestamp it was scheduled from; `restore` re-checks that the
+entry is still down with that same timestamp, so stale entries (harvested
+again, already restored, room rebuilt) are dropped harmlessly.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+# (x, y, kind, entry id, depleted_at / defeated_at)
+Key = Tuple[int, int, str, str, float]
+
+_STAMP = {"resource": "depleted_at", "enemy": "defeated_at"}
+
+
+def _down(kind: str, entry: Dict) -> bool:
+    if kind == "resource":
+        return entry.get("qty", 0) <= 0
+    return entry.get("hp_now", 0) <= 0
+
+
+class RespawnQueue:
+    """Min-heap of pending respawns for one world."""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, Key]] = []
+        self._keys: Set[Key] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def next_due(self) -> float:
+        return self._heap[0][0] if self._heap else float("inf")
+
+    def schedule(self, x: int, y: int, kind: str, entry: Dict) -> bool:
+        """Register a depleted node / defeated enemy; False if it has no timer or is already queued."""
+        stamp = entry.get(_STAMP[kind])
+        respawn_s = entry.get("respawn_s")
+        if not (stamp and respawn_s) or not _down(kind, entry):
+            return False
+        key = (int(x), int(y), kind, str(entry.get("id")), stamp)
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            heapq.heappush(self._heap, (stamp + respawn_s, key))
+        return True
+
+    def pop_due(self, now: float, limit: Optional[int] = None) -> List[Key]:
+        """Remove and return the entries due at `now`, earliest first (at most `limit`)."""
+        out: List[Key] = []
+        heap = self._heap
+        with self._lock:
+            while heap and heap[0][0] <= now and (limit is None or len(out) < limit):
+                _, key = heapq.heappop(heap)
+                self._keys.discard(key)
+                out.append(key)
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+            self._keys.clear()
+
+
+def schedule_room(queue: RespawnQueue, room) -> int:
+    """Register every down entry of a room; returns how many were new."""
+    n = 0
+    for node in room.resources:
+        n += queue.schedule(room.x, room.y, "resource", node)
+    for enemy in room.enemies:
+        n += queue.schedule(room.x, room.y, "enemy", enemy)
+    return n
+
+
+def restore(room, kind: str, entry_id: str, stamp: float) -> bool:
+    """Bring one scheduled entry back if it is still down from the same depletion."""
+    entries = room.resources if kind == "resource" else room.enemies
+    for entry in entries:
+        if str(entry.get("id")) != entry_id:
+            continue
+        if entry.get(_STAMP[kind]) != stamp or not _down(kind, entry):
+            return False
+        if kind == "resource":
+            # simple restore to 1
+            entry["qty"] = 1
+        else:
+            entry["hp_now"] = entry.get("hp", 1)
+            entry["defeated_at"] = None
+        return True
+    return False
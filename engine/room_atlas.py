@@ -0,0 +1,144 @@
+"""Pre-rolled room atlas.
+
+Rolls every room of a shard in one pass (same per-room RNG and _roll_*
+tables as world_loader.get_room, so an atlas room is identical to a lazily
+rolled one) and stores the result next to the shard:
+
+    <shard>.rooms.json.gz
+    {"version": 1, "source": "<sha256 of the shard file>", "world": id, "seed": s,
+     "width": W, "height": H,
+     "rooms": {"x,y": {"biome": ..., "tags": [...], "resources": [...], ...}}}
+
+Empty lists are omitted. get_room starts from the atlas and never writes
+untouched rooms; persist_room only stores rooms that diverged from it.
+
+Build it with `python shard_cli.py build-atlas`; load_world attaches an atlas
+automatically when its source hash matches the shard file.
+"""
+
+from __future__ import annotations
+
+import copy
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+VERSION = 1
+SUFFIX = ".rooms.json.gz"
+ROOM_FIELDS = ("tags", "resources", "searchables", "enemies", "quests", "npcs")
+
+Coord = Tuple[int, int]
+
+
+def atlas_path(shard_path: str | Path) -> Path:
+    p = Path(shard_path)
+    return p.with_name(p.name + SUFFIX)
+
+
+def source_digest(shard_path: str | Path) -> str:
+    h = hashlib.sha256()
+    with Path(shard_path).open("rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ------------------------ Build ------------------------
+
+def build_atlas(world) -> Dict[Coord, Dict]:
+    """Roll every room of the world. Tags use set lookups built once per world instead of per-tile POI scans."""
+    from . import world_loader as wl
+
+    settlements = world.settlement_tiles()
+    W, H = world.size
+    rooms: Dict[Coord, Dict] = {}
+    for y in range(H):
+        row = world.grid[y]
+        for x in range(W):
+            biome = row[x]
+            key = (x, y)
+            tags = wl._compute_tags(world, x, y, biome, settlements)
+            rng = wl._rng_for(world, x, y)
+            rooms[key] = {
+                "biome": biome,
+                "tags": tags,
+                "resources": wl._roll_resources(world, x, y, biome, tags, rng),
+                "searchables": wl._roll_searchables(biome, tags, rng),
+                "enemies": wl._roll_enemies(world, x, y, tags, rng),
+                "quests": wl._roll_quests(world, x, y, tags, rng),
+                "npcs": wl._roll_npcs(world, x, y, tags, rng),
+            }
+    return rooms
+
+
+def save_atlas(world, shard_path: str | Path, rooms: Optional[Dict[Coord, Dict]] = None) -> Path:
+    """Build (unless given) and atomically write the atlas next to the shard."""
+    rooms = build_atlas(world) if rooms is None else rooms
+    doc = {
+        "version": VERSION,
+        "source": source_digest(shard_path),
+        "world": world.id,
+        "seed": world.seed,
+        "width": world.size[0],
+        "height": world.size[1],
+        "rooms": {f"{x},{y}": {k: v for k, v in room.items() if v or k == "biome"}
+                  for (x, y), room in rooms.items()},
+    }
+    out = atlas_path(shard_path)
+    fd, tmp = tempfile.mkstemp(prefix=out.name + ".", suffix=".tmp", dir=str(out.parent))
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+            gz.write(json.dumps(doc, separators=(",", ":")).encode("utf-8"))
+        os.replace(tmp, out)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    world.atlas = rooms
+    return out
+
+
+def load_atlas(shard_path: str | Path) -> Optional[Dict[Coord, Dict]]:
+    """Atlas rooms for this shard file, or None if missing, unreadable or built from other bytes."""
+    path = atlas_path(shard_path)
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rb") as f:
+            doc = json.loads(f.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    if doc.get("version") != VERSION or doc.get("source") != source_digest(shard_path):
+        return None
+    rooms: Dict[Coord, Dict] = {}
+    for key, room in (doc.get("rooms") or {}).items():
+        x, y = key.split(",", 1)
+        rooms[(int(x), int(y))] = {"biome": room.get("biome"), **{k: room.get(k, []) for k in ROOM_FIELDS}}
+    return rooms
+
+
+# ------------------------ Lookup ------------------------
+
+def room_state(room) -> Dict:
+    return {"biome": room.biome, **{k: getattr(room, k) for k in ROOM_FIELDS}}
+
+
+def atlas_room(world, x: int, y: int):
+    """Fresh Room built from the atlas entry, or None if the world has no usable entry."""
+    from .world_loader import EXTRA_SAFE_TILES, Room
+
+    entry = (world.atlas or {}).get((x, y))
+    if entry is None:
+        return None
+    # safe zones registered after the atlas was built change the roll tables
+    if (x, y) in EXTRA_SAFE_TILES and "settlement" not in entry["tags"]:
+        return None
+    return Room(world_id=world.id, x=x, y=y, **copy.deepcopy(entry))
+
+
+def diverges(world, room) -> bool:
+    entry = (world.atlas or {}).get((room.x, room.y))
+    return entry is None or room_state(room) != entry
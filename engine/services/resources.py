@@ -9,13 +9,8 @@ def find_node(room: dict, node_id: str) -> dict | None:
     return None
 
 def available(node: dict) -> bool:
-    if node.get("qty", 0) <= 0:
-        respawn = node.get("respawn_s")
-        depleted_at = node.get("depleted_at")
-        if respawn and depleted_at:
-            return (time() - depleted_at) >= respawn
-        return False
-    return True
+    # respawns are restored by the world's respawn queue when the room is fetched
+    return node.get("qty", 0) > 0
 
 def harvest_amount(player, node: dict) -> int:
     base = 1
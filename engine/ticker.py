@@ -0,0 +1,147 @@
+"""World tick loop.
+
+A fixed-rate background loop per world that advances scheduled world events
+in bulk, so request handlers never do time-based catch-up themselves. Each
+tick restores due respawns (engine/respawn.py) in batches until the queue has
+nothing due or the tick's time budget is spent; leftovers carry over to the
+next tick. Changed rooms are handed to `publish` as room deltas:
+
+    {"room": "x,y", "x": int, "y": int,
+     "room_delta": {"resources": [...], "enemies": [...]}}
+
+Ticks that run past their period count as overruns and the schedule resyncs
+instead of bursting to catch up. Stamina is not ticked: stamina.regen is a
+closed-form catch-up per player, already O(1) in the handler.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+TICK_HZ = 4.0
+TICK_BUDGET_S = 0.010   # work per tick before the rest waits for the next one
+TICK_BATCH = 64         # respawns popped per step within a tick
+
+Publisher = Callable[[List[Dict]], None]
+
+
+def room_delta(room) -> Dict:
+    return {"room": room.id(), "x": room.x, "y": room.y,
+            "room_delta": {"resources": room.resources, "enemies": room.enemies}}
+
+
+class WorldTicker:
+    def __init__(self, world, *, rate: float = TICK_HZ, budget: float = TICK_BUDGET_S,
+                 publish: Optional[Publisher] = None):
+        self.world = world
+        self.period = 1.0 / rate
+        self.budget = budget
+        self.publish = publish
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.ticks = 0
+        self.overruns = 0
+        self.over_budget = 0
+        self.restored = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+
+    def tick(self, now: Optional[float] = None) -> List[Dict]:
+        """Advance the world once; returns the published deltas."""
+        from .world_loader import run_respawns
+
+        t0 = time.perf_counter()
+        now = time.time() if now is None else now
+        queue = self.world.respawns
+        changed: Dict = {}
+        while queue.next_due <= now:
+            if time.perf_counter() - t0 >= self.budget:
+                self.over_budget += 1
+                break
+            for room in run_respawns(self.world, now, limit=TICK_BATCH):
+                changed[(room.x, room.y)] = room
+        deltas = [room_delta(room) for room in changed.values()]
+        self.restored += len(deltas)
+        if deltas and self.publish is not None:
+            try:
+                self.publish(deltas)
+            except Exception:
+                log.exception("publishing room deltas failed")
+
+        elapsed = time.perf_counter() - t0
+        self.ticks += 1
+        self.last_ms = elapsed * 1000
+        self.max_ms = max(self.max_ms, self.last_ms)
+        return deltas
+
+    # -------- thread --------
+
+    def start(self) -> "WorldTicker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"world-tick:{self.world.id}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                log.exception("world tick failed")
+            deadline += self.period
+            wait = deadline - time.monotonic()
+            if wait < 0:
+                # fell behind: count it and resync rather than bursting
+                self.overruns += 1
+                deadline = time.monotonic()
+                wait = 0
+            self._stop.wait(wait)
+
+    def stats(self) -> Dict:
+        return {
+            "world": self.world.id,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "rate_hz": round(1.0 / self.period, 3),
+            "budget_ms": self.budget * 1000,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "over_budget": self.over_budget,
+            "last_ms": round(self.last_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "restored": self.restored,
+            "pending_respawns": len(self.world.respawns),
+        }
+
+
+_TICKERS: Dict[int, WorldTicker] = {}
+
+
+def start_ticker(world, **kwargs) -> WorldTicker:
+    """The running ticker for `world`, started on first use (later calls may swap the publisher)."""
+    ticker = _TICKERS.get(id(world))
+    if ticker is None or ticker.world is not world:
+        ticker = _TICKERS[id(world)] = WorldTicker(world, **kwargs)
+        # registered after persistence's WRITER.stop, so it runs first: the last deltas still get drained
+        atexit.register(ticker.stop)
+    elif "publish" in kwargs:
+        ticker.publish = kwargs["publish"]
+    return ticker.start()
+
+
+def ticker_for(world) -> Optional[WorldTicker]:
+    ticker = _TICKERS.get(id(world))
+    return ticker if ticker is not None and ticker.world is world else None
@@ -1,14 +1,20 @@
 # server/world_loader.py
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple, Dict, Set, Optional
+from typing import Any, Callable, List, Tuple, Dict, Set, Optional
 from collections import OrderedDict
-import json, time, random
+import base64, binascii, json, logging, threading, time, random
 
-from . import persistence
+from . import persistence, respawn, room_atlas
+from .biome_grid import BiomeGrid
+from .pathfinding import RouteCache
+from .player_engine import IMPASSABLE_BIOMES
+from .settlements import LEGACY_TYPES as SETTLEMENT_TYPES
 
 Coord = Tuple[int, int]
 
+log = logging.getLogger(__name__)
+
 # Tiles that should be treated as "safe" even if the shard data does not
 # explicitly mark them as a settlement.  Filled by other modules at runtime.
 EXTRA_SAFE_TILES: Set[Coord] = set()
@@ -23,30 +29,247 @@ def add_safe_zone(x: int, y: int) -> None:
 # other modules (or eventually game settings) can tweak density/respawn rate.
 ENEMY_DENSITY = 0.35
 ENEMY_RESPAWN_S = 300
+# biome -> enemy types that can roll there (rats everywhere wild, wolves in cover)
+SPAWN_TABLES: Dict[str, Tuple[str, ...]] = {
+    "plains": ("rat",), "marsh-lite": ("rat",), "coast": ("rat",),
+    "forest": ("rat", "wolf"), "hills": ("rat", "wolf"),
+}
+# no hostile spawns, whatever the tile tags say
+SAFE_BIOMES = {"ocean", "void"}
+# respawns a cache hit may restore on the request thread; the world ticker
+# (engine/ticker.py) does the bulk catch-up
+ACCESS_RESPAWN_LIMIT = 8
 
 # ------------------------ In-memory LRU cache for rooms ------------------------
 
+# Default budget: the JSON payload of the cached rooms (what a miss would read
+# from SQLite and decode), not the exact heap size. Overridable per world, see
+# World.configure_room_cache().
+ROOM_CACHE_BYTES = 4 << 20
+ROOM_CACHE_ROOMS: Optional[int] = None
+# rooms this many tiles around a player's new position are loaded ahead of time
+PREFETCH_RADIUS = 1
+
+
+def _room_bytes(room) -> int:
+    """Approximate resident size of a room: its compact JSON length."""
+    try:
+        return len(json.dumps(room.__dict__, separators=(",", ":"), default=str))
+    except (TypeError, ValueError, RuntimeError):
+        return 1024
+
+
 class LRURoomCache(OrderedDict):
-    """Basic LRU cache for storing Room instances."""
+    """
+    LRU cache for Room instances, bounded by an approximate byte budget
+    (max_bytes) and optionally a room count (maxsize). Pinned keys (the
+    explicit `pinned` set, or `pin(key)` when given) are never evicted; dirty
+    rooms are written before eviction. The newest entry is always kept.
+    """
 
-    def __init__(self, maxsize: int = 256):
+    def __init__(self, maxsize: Optional[int] = ROOM_CACHE_ROOMS, max_bytes: Optional[int] = ROOM_CACHE_BYTES,
+                 pin: Optional[Callable[[Coord], bool]] = None):
         super().__init__()
         self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.pin = pin
+        self.pinned: Set[Coord] = set()
+        self.sizes: Dict[Coord, int] = {}
+        self.resident_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.loads: Dict[str, List[float]] = {}  # source -> [count, total seconds, max seconds]
+        # request threads and the prefetcher share the cache
+        self.lock = threading.RLock()
 
     def __getitem__(self, key):
-        value = super().__getitem__(key)
-        self.move_to_end(key)
-        return value
+        with self.lock:
+            value = super().__getitem__(key)
+            self.move_to_end(key)
+            return value
 
     def __setitem__(self, key, value):
-        if key in self:
-            self.move_to_end(key)
-        super().__setitem__(key, value)
-        if len(self) > self.maxsize:
-            self.popitem(last=False)
+        with self.lock:
+            if key in self:
+                self.move_to_end(key)
+            super().__setitem__(key, value)
+            self.remeasure(key)
+            self._shrink()
+
+    def setdefault(self, key, value):
+        """Insert `value` unless `key` is cached already; returns whichever room ended up cached."""
+        with self.lock:
+            if key in self:
+                return self[key]
+            self[key] = value
+            return value
+
+    def __delitem__(self, key):
+        with self.lock:
+            super().__delitem__(key)
+            self.resident_bytes -= self.sizes.pop(key, 0)
+
+    def clear(self) -> None:
+        with self.lock:
+            super().clear()
+            self.sizes.clear()
+            self.resident_bytes = 0
+
+    def lookup(self, key):
+        """Cached room (counted as a hit) or None (a miss)."""
+        with self.lock:
+            if key in self:
+                self.hits += 1
+                return self[key]
+            self.misses += 1
+            return None
+
+    def peek(self, key):
+        """Cached room without touching recency or the hit/miss counters."""
+        with self.lock:
+            return super().__getitem__(key) if key in self else None
+
+    def remeasure(self, key) -> None:
+        """Re-size an entry after its room was mutated."""
+        with self.lock:
+            if key in self:
+                size = _room_bytes(super().__getitem__(key))
+                self.resident_bytes += size - self.sizes.get(key, 0)
+                self.sizes[key] = size
+
+    def is_pinned(self, key) -> bool:
+        return key in self.pinned or (self.pin is not None and self.pin(key))
+
+    def _over(self, count: int, nbytes: int) -> bool:
+        return ((self.maxsize is not None and count > self.maxsize)
+                or (self.max_bytes is not None and nbytes > self.max_bytes))
+
+    def _shrink(self) -> None:
+        while self._over(len(self), self.resident_bytes):
+            newest = next(reversed(self))
+            victim = next((k for k in self if k != newest and not self.is_pinned(k)), None)
+            if victim is None:
+                break
+            evicted = super().__getitem__(victim)
+            del self[victim]
+            self.evictions += 1
+            if getattr(evicted, "dirty", False):
+                persistence.WRITER.flush_room(evicted)
+
+    def offer(self, key, room) -> bool:
+        """
+        Insert a speculatively loaded room. Never replaces an entry and never
+        evicts pinned or dirty rooms; returns False when it does not fit.
+        """
+        with self.lock:
+            if key in self:
+                return False
+            size = _room_bytes(room)
+            count, nbytes = len(self) + 1, self.resident_bytes + size
+            victims = []
+            for k in self:
+                if not self._over(count, nbytes):
+                    break
+                if self.is_pinned(k) or getattr(super().__getitem__(k), "dirty", False):
+                    continue
+                victims.append(k)
+                count, nbytes = count - 1, nbytes - self.sizes.get(k, 0)
+            if self._over(count, nbytes):
+                return False
+            for k in victims:
+                del self[k]
+                self.evictions += 1
+            super().__setitem__(key, room)
+            self.sizes[key] = size
+            self.resident_bytes += size
+            return True
+
+    def record_load(self, source: str, seconds: float) -> None:
+        entry = self.loads.setdefault(source, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return self._stats()
+
+    def _stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+            "max_rooms": self.maxsize,
+            "pinned": sum(1 for k in self if self.is_pinned(k)),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "loads": {src: {"count": n, "avg_ms": round(total / n * 1000, 3), "max_ms": round(peak * 1000, 3)}
+                      for src, (n, total, peak) in self.loads.items()},
+        }
 
 # ------------------------ World & Room Models ------------------------
 
+# layers.settlements bucket -> POI type
+SETTLEMENT_KINDS = {"cities": "city", "towns": "town", "villages": "village", "ports": "port"}
+
+
+class PoiList(list):
+    """A World's POI list; counts its mutations so the tile index knows when to rebuild."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = 0
+
+    def append(self, item):
+        self.version += 1
+        super().append(item)
+
+    def extend(self, items):
+        self.version += 1
+        super().extend(items)
+
+    def insert(self, index, item):
+        self.version += 1
+        super().insert(index, item)
+
+    def remove(self, item):
+        self.version += 1
+        super().remove(item)
+
+    def pop(self, index=-1):
+        self.version += 1
+        return super().pop(index)
+
+    def clear(self):
+        self.version += 1
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.version += 1
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.version += 1
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.version += 1
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.version += 1
+        super().__delitem__(index)
+
+    def __iadd__(self, items):
+        self.version += 1
+        return super().__iadd__(items)
+
+    def __imul__(self, n):
+        self.version += 1
+        return super().__imul__(n)
+
 @dataclass
 class Room:
     """Ephemeral-but-cached per-tile state."""
@@ -61,6 +284,10 @@ class Room:
     enemies: List[Dict] = field(default_factory=list)     # [{id,type,hp,level,hostile,respawn_s,defeated_at,hp_now}]
     quests: List[Dict] = field(default_factory=list)      # [{id, title, status}]
     npcs: List[Dict] = field(default_factory=list)        # [{id,name,...}]
+    # set while queued for the write-behind flusher; never stored
+    dirty: bool = field(default=False, repr=False, compare=False)
+    # set once the room has a database row (loaded from or written to it); never stored
+    stored: bool = field(default=False, repr=False, compare=False)
 
     def id(self) -> str:
         return f"{self.x},{self.y}"
@@ -83,8 +310,8 @@ class Room:
 class World:
     id: str
     size: Tuple[int, int]
-    grid: List[List[str]]
-    pois: List[Dict]
+    grid: BiomeGrid  # a list of rows is converted in __post_init__
+    pois: List[Dict]  # stored as a PoiList, see __setattr__
     roads: List[List[Coord]]
     road_tiles: Set[Coord]
     bridge_tiles: Set[Coord]
@@ -93,27 +320,163 @@ class World:
     seed: int = 0
 
     # cache of rolled rooms
-    _rooms: Dict[Coord, Room] = field(default_factory=lambda: LRURoomCache(maxsize=256), repr=False)
+    _rooms: LRURoomCache = field(default_factory=LRURoomCache, repr=False)
     # optional shardgate data
     gates_by_id: Dict[str, Dict] = field(default_factory=dict)
     gates_xy: Dict[Coord, Dict] = field(default_factory=dict)
+    # optional baked resource potentials (layers.resources), see _resource_table()
+    resources: Optional[Dict] = field(default=None, repr=False)
+    # optional pre-rolled rooms (<shard>.rooms.json.gz), see engine/room_atlas.py
+    atlas: Optional[Dict[Coord, Dict]] = field(default=None, repr=False)
+    # tile -> POIs covering it (anchor + footprint), in pois order; see _poi_lookup()
+    _poi_index: Dict[Coord, List[Dict]] = field(default_factory=dict, repr=False)
+    _poi_version: Tuple[int, int] = field(default=(0, -1), repr=False)  # (id(pois), pois.version) indexed
+    # per palette entry: water / impassable / safe (bytearrays) and spawn (enemy type tuples)
+    biome_props: Dict = field(default_factory=dict, repr=False)
+    # capability bits -> bit-packed passability mask, built lazily by engine/passability.py
+    passability: Dict[int, bytearray] = field(default_factory=dict, repr=False)
+    # (start region, goal, caps) -> planned route, see engine/pathfinding.py
+    routes: RouteCache = field(default_factory=RouteCache, repr=False)
+    # pending respawns of depleted nodes / defeated enemies, see engine/respawn.py
+    respawns: respawn.RespawnQueue = field(default_factory=respawn.RespawnQueue, repr=False)
+    # rooms within this many tiles of a player's new position are prefetched (0 = off)
+    prefetch_radius: int = field(default=PREFETCH_RADIUS, repr=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # pois is always a PoiList, whether set by __init__ or reassigned later
+        if name == "pois" and not isinstance(value, PoiList):
+            value = PoiList(value)
+        super().__setattr__(name, value)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.grid, BiomeGrid):
+            self.grid = BiomeGrid.from_rows(self.grid)
+        g = self.grid
+        self.biome_props = {
+            "water": g.table(lambda b: b.lower() == "ocean"),
+            "impassable": g.table(lambda b: b in IMPASSABLE_BIOMES),
+            "safe": g.table(lambda b: b in SAFE_BIOMES),
+            "spawn": [SPAWN_TABLES.get(b, ()) for b in g.palette],
+        }
 
     def biome_at(self, x: int, y: int) -> str:
         W, H = self.size
         if 0 <= x < W and 0 <= y < H:
-            return self.grid[y][x]
+            return self.grid.palette[self.grid.ids[y * W + x]]
         return "void"
 
+    def biome_id_at(self, x: int, y: int) -> int:
+        """Palette index of the tile's biome (index into biome_props tables); -1 outside the map."""
+        W, H = self.size
+        if 0 <= x < W and 0 <= y < H:
+            return self.grid.ids[y * W + x]
+        return -1
+
+    def _poi_lookup(self) -> Dict[Coord, List[Dict]]:
+        # add_poi/remove_poi keep the index current; any other change to
+        # .pois (direct appends, deletes, reassignment) bumps its version,
+        # so re-index once
+        if self._poi_version != (id(self.pois), self.pois.version):
+            self._poi_index = {}
+            for p in self.pois:
+                for key in _poi_tiles(p):
+                    self._poi_index.setdefault(key, []).append(p)
+            self._poi_version = (id(self.pois), self.pois.version)
+        return self._poi_index
+
+    def add_poi(self, poi: Dict) -> Dict:
+        index = self._poi_lookup()
+        self.pois.append(poi)
+        for key in _poi_tiles(poi):
+            index.setdefault(key, []).append(poi)
+        self._poi_version = (id(self.pois), self.pois.version)
+        return poi
+
+    def remove_poi(self, poi: Dict) -> bool:
+        index = self._poi_lookup()
+        for i, p in enumerate(self.pois):
+            if p is poi:
+                del self.pois[i]
+                break
+        else:
+            return False
+        for key in _poi_tiles(poi):
+            kept = [p for p in index.get(key, []) if p is not poi]
+            if kept:
+                index[key] = kept
+            else:
+                index.pop(key, None)
+        self._poi_version = (id(self.pois), self.pois.version)
+        return True
+
+    def pois_at(self, x: int, y: int) -> List[Dict]:
+        return list(self._poi_lookup().get((x, y), ()))
+
     def poi_at(self, x: int, y: int):
-        for p in self.pois:
-            px = p.get("x", (p.get("pos") or [None, None])[0])
-            py = p.get("y", (p.get("pos") or [None, None])[1])
-            if px == x and py == y:
-                return p
-        return None
+        found = self._poi_lookup().get((x, y))
+        return found[0] if found else None
+
+    def poi_tiles(self) -> Set[Coord]:
+        """Every tile covered by a POI (anchors and footprints)."""
+        return set(self._poi_lookup())
+
+    def settlement_tiles(self) -> Set[Coord]:
+        """Tiles covered by settlement POIs (SETTLEMENT_TYPES) plus EXTRA_SAFE_TILES; ruins, shrines etc. are not safe."""
+        return set(EXTRA_SAFE_TILES) | {key for key, found in self._poi_lookup().items()
+                                        if any(p.get("type") in SETTLEMENT_TYPES for p in found)}
+
+    def is_settlement(self, x: int, y: int) -> bool:
+        return (x, y) in EXTRA_SAFE_TILES or any(p.get("type") in SETTLEMENT_TYPES
+                                                 for p in self._poi_lookup().get((x, y), ()))
+
+    def configure_room_cache(self, max_bytes: Optional[int] = ROOM_CACHE_BYTES, max_rooms: Optional[int] = ROOM_CACHE_ROOMS,
+                             pin_settlements: bool = False) -> LRURoomCache:
+        """Replace the room cache budget, keeping cached rooms (most recent first) and counters."""
+        old = self._rooms
+        cache = LRURoomCache(maxsize=max_rooms, max_bytes=max_bytes,
+                             pin=(lambda key: self.is_settlement(*key)) if pin_settlements else None)
+        cache.pinned = old.pinned
+        cache.hits, cache.misses, cache.evictions, cache.loads = old.hits, old.misses, old.evictions, old.loads
+        for key, room in list(old.items()):
+            OrderedDict.__setitem__(cache, key, room)
+            cache.remeasure(key)
+        cache._shrink()
+        self._rooms = cache
+        return cache
 
 # ------------------------ Helpers to ingest shard JSON ------------------------
 
+def _poi_tiles(p: Dict) -> List[Coord]:
+    """
+    Anchor tile of a POI (x/y, pos or anchor {x, y}) plus its optional
+    footprint: {"w", "h"} from the anchor (the settlements schema) or an
+    explicit [[x, y], ...] tile list. Unrecognised footprints are ignored.
+    """
+    anchor = p.get("anchor") if isinstance(p.get("anchor"), dict) else {}
+    pos = p.get("pos") or [None, None]
+    x = p.get("x", anchor.get("x", pos[0]))
+    y = p.get("y", anchor.get("y", pos[1]))
+    tiles = [] if x is None or y is None else [(int(x), int(y))]
+    fp = p.get("footprint")
+    if not fp:
+        return tiles
+    try:
+        if isinstance(fp, dict):
+            w, h = int(fp.get("w", 1)), int(fp.get("h", 1))
+            if not tiles:
+                return tiles
+            ax, ay = tiles[0]
+            cells = [(ax + dx, ay + dy) for dy in range(h) for dx in range(w)]
+        else:
+            cells = [(int(c[0]), int(c[1])) if isinstance(c, (list, tuple)) else (int(c["x"]), int(c["y"])) for c in fp]
+    except (KeyError, IndexError, TypeError, ValueError):
+        log.warning("ignoring unrecognised footprint on POI %s: %r", p.get("id") or p.get("type"), fp)
+        return tiles
+    for key in cells:
+        if key not in tiles:
+            tiles.append(key)
+    return tiles
+
 def _to_set(coords) -> Set[Coord]:
     out = set()
     for c in coords or []:
@@ -135,11 +498,40 @@ def _paths_to_set(paths: List[List]) -> Set[Coord]:
                 tiles.add((int(p.get("x")), int(p.get("y"))))
     return tiles
 
+def _resource_table(layer: Optional[Dict], W: int, H: int) -> Optional[Dict]:
+    """Decode layers.resources (u8/base64 potential fields); None if absent or malformed."""
+    if not isinstance(layer, dict) or layer.get("encoding") != "u8/base64":
+        return None
+    fields: Dict[str, bytes] = {}
+    for name, data in (layer.get("fields") or {}).items():
+        try:
+            raw = base64.b64decode(data)
+        except (binascii.Error, TypeError, ValueError):
+            return None
+        if len(raw) != W * H:
+            return None
+        fields[name] = raw
+    if not fields:
+        return None
+    return {
+        "fields": fields,
+        "nodes": dict(layer.get("nodes") or {}),
+        "thresholds": {k: float(v) for k, v in (layer.get("thresholds") or {}).items()},
+        "max_nodes": int(layer.get("max_nodes_per_room", 2)),
+        "ambient": bool(layer.get("ambient_roll", False)),
+        "respawn": {k: int(v) for k, v in (layer.get("respawn_seconds") or {}).items()},
+    }
+
 # ------------------------ Load world from file ------------------------
 
 _CURRENT_WORLD: Optional[World] = None  # optional singleton for legacy helpers
 
-def load_world(path: str | Path) -> World:
+def load_world(path: str | Path, *, room_cache: Optional[Dict] = None) -> World:
+    """
+    Parse a shard into a World. The room cache budget comes from `room_cache`
+    or the shard's meta.roomCache ({"maxBytes", "maxRooms", "pinSettlements"}),
+    defaulting to ROOM_CACHE_BYTES / ROOM_CACHE_ROOMS without pinning.
+    """
     data = json.loads(Path(path).read_text())
 
     grid = data.get("grid")
@@ -162,16 +554,20 @@ def load_world(path: str | Path) -> World:
     poi_list = []
     layers = data.get("layers", {})
     settlements = (layers.get("settlements") or {})
-    for tkey in ("cities", "towns", "villages", "ports"):
+    for tkey in SETTLEMENT_KINDS:
         for p in settlements.get(tkey, []):
             x = p["x"] if "x" in p else p[0]
             y = p["y"] if "y" in p else p[1]
-            poi_list.append({"x": int(x), "y": int(y), "type": tkey[:-1] if tkey.endswith("s") else tkey})
+            poi = {"x": int(x), "y": int(y), "type": SETTLEMENT_KINDS[tkey]}
+            if isinstance(p, dict) and p.get("footprint"):
+                poi["footprint"] = p["footprint"]
+            poi_list.append(poi)
     poi_list += [
         {"x": s.get("x", (s.get("pos") or [None, None])[0]),
          "y": s.get("y", (s.get("pos") or [None, None])[1]),
          "type": s.get("type", "poi"),
-         "name": s.get("name")}
+         "name": s.get("name"),
+         **({"footprint": s["footprint"]} if s.get("footprint") else {})}
         for s in (data.get("sites") or [])
     ]
     poi_list += [
@@ -200,6 +596,7 @@ def load_world(path: str | Path) -> World:
         blocked_land=blocked,
         requires_boat=needs_boat,
         seed=(data.get("meta") or {}).get("seed", 0),
+        resources=_resource_table(layers.get("resources"), W, H),
     )
 
     # Optional shardgates layer
@@ -221,6 +618,17 @@ def load_world(path: str | Path) -> World:
         # ignore malformed gate data
         pass
 
+    world.atlas = room_atlas.load_atlas(path)
+
+    cache_cfg = {**((data.get("meta") or {}).get("roomCache") or {}), **(room_cache or {})}
+    if cache_cfg:
+        world.configure_room_cache(
+            max_bytes=cache_cfg.get("maxBytes", ROOM_CACHE_BYTES),
+            max_rooms=cache_cfg.get("maxRooms", ROOM_CACHE_ROOMS),
+            pin_settlements=bool(cache_cfg.get("pinSettlements")),
+        )
+        world.prefetch_radius = int(cache_cfg.get("prefetchRadius", PREFETCH_RADIUS))
+
     # expose as "current" for simple adapters that don't pass world
     global _CURRENT_WORLD
     _CURRENT_WORLD = world
@@ -255,6 +663,9 @@ def _roll_resources(world: World, x: int, y: int, biome: str, tags: List[str], r
             out.append(node("herb", (1,2), respawn_s=600))
         return out
 
+    if world.resources is not None:
+        return _roll_from_potentials(world, x, y, rng, node)
+
     if biome in ("forest","plains"):
         if rng.random() < 0.8: out.append(node("wood", (1,3)))
         if rng.random() < 0.6: out.append(node("herb", (1,3)))
@@ -269,6 +680,30 @@ def _roll_resources(world: World, x: int, y: int, biome: str, tags: List[str], r
     # oceans: keep empty for now
     return out
 
+def _roll_from_potentials(world: World, x: int, y: int, rng: random.Random, node) -> List[Dict]:
+    """Table lookup against the potentials baked at generation time (layers.resources)."""
+    table = world.resources
+    W, H = world.size
+    if not (0 <= x < W and 0 <= y < H):
+        return []
+    i = y * W + x
+    respawn = table["respawn"]
+    picks = []
+    for name, field_bytes in table["fields"].items():
+        v = field_bytes[i] / 255.0
+        thr = table["thresholds"].get(name, 1.0)
+        if v >= thr:
+            # how far above the threshold decides the node size
+            margin = (v - thr) / max(1e-6, 1.0 - thr)
+            size, qty = ("large", (3, 5)) if margin > 0.66 else (("medium", (2, 3)) if margin > 0.33 else ("small", (1, 2)))
+        elif table["ambient"] and v > 0.0 and rng.random() < v * 0.5:
+            size, qty = "ambient", (1, 1)
+        else:
+            continue
+        picks.append((v, table["nodes"].get(name, name), qty, respawn.get(size, 900)))
+    picks.sort(key=lambda p: -p[0])
+    return [node(_type, qty, respawn_s=respawn_s) for _, _type, qty, respawn_s in picks[:table["max_nodes"]]]
+
 def _roll_searchables(biome: str, tags: List[str], rng: random.Random) -> List[Dict]:
     out = []
     table = "meadow_common"
@@ -298,11 +733,15 @@ def _roll_npcs(world: World, x: int, y: int, tags: List[str], rng: random.Random
         })
     return npcs
 
-def _roll_enemies(biome: str, tags: List[str], rng: random.Random, *, density: float = ENEMY_DENSITY) -> List[Dict]:
+def _roll_enemies(world: World, x: int, y: int, tags: List[str], rng: random.Random, *,
+                  density: float = ENEMY_DENSITY) -> List[Dict]:
     out: List[Dict] = []
-    if "settlement" in tags or biome in ("ocean", "void"):
+    b = world.biome_id_at(x, y)
+    # palette-indexed tables (World.biome_props) instead of per-tile biome string lookups
+    if "settlement" in tags or b < 0 or world.biome_props["safe"][b]:
         return out
-    if biome in ("plains", "forest", "hills", "marsh-lite", "coast"):
+    spawns = world.biome_props["spawn"][b]
+    if spawns:
         if rng.random() < density:
             out.append({
                 "id": f"rat-{rng.randint(100,999)}",
@@ -314,7 +753,7 @@ def _roll_enemies(biome: str, tags: List[str], rng: random.Random, *, density: f
                 "respawn_s": ENEMY_RESPAWN_S,
                 "defeated_at": None,
             })
-        if rng.random() < density / 2 and biome in ("forest", "hills"):
+        if rng.random() < density / 2 and "wolf" in spawns:
             out.append({
                 "id": f"wolf-{rng.randint(100,999)}",
                 "type": "wolf",
@@ -333,9 +772,14 @@ def _roll_quests(world: World, x: int, y: int, tags: List[str], rng: random.Rand
         out.append({"id": f"errand-{x}-{y}", "title":"A Neighborly Errand", "status":"available"})
     return out
 
-def _compute_tags(world: World, x: int, y: int, biome: str) -> List[str]:
+def _compute_tags(world: World, x: int, y: int, biome: str, settlements: Optional[Set[Coord]] = None) -> List[str]:
+    """Room tags of a tile; bulk callers pass world.settlement_tiles() once instead of a per-tile check."""
     t: List[str] = []
-    if world.poi_at(x, y) or (x, y) in EXTRA_SAFE_TILES:
+    if settlements is not None:
+        safe = (x, y) in settlements
+    else:
+        safe = world.is_settlement(x, y)
+    if safe:
         t.append("settlement")
     if (x,y) in world.road_tiles:
         t.append("road")
@@ -351,65 +795,224 @@ def _compute_tags(world: World, x: int, y: int, biome: str) -> List[str]:
         t.append("ocean")
     return t
 
-def _lazy_respawn(node: Dict) -> None:
-    """If depleted and respawn time elapsed, restore quantity."""
-    if node.get("qty",0) > 0: return
+def _lazy_respawn(node: Dict) -> bool:
+    """If depleted and respawn time elapsed, restore quantity. Returns True if restored."""
+    if node.get("qty",0) > 0: return False
     respawn_s = node.get("respawn_s")
     depleted_at = node.get("depleted_at")
-    if not (respawn_s and depleted_at): return
+    if not (respawn_s and depleted_at): return False
     if (time.time() - depleted_at) >= respawn_s:
         # simple restore to 1–2
         node["qty"] = 1
+        return True
+    return False
 
 
-def _lazy_enemy_respawn(e: Dict) -> None:
+def _lazy_enemy_respawn(e: Dict) -> bool:
     if e.get("hp_now", 0) > 0:
-        return
+        return False
     respawn_s = e.get("respawn_s")
     defeated_at = e.get("defeated_at")
     if not (respawn_s and defeated_at):
-        return
+        return False
     if (time.time() - defeated_at) >= respawn_s:
         e["hp_now"] = e.get("hp", 1)
         e["defeated_at"] = None
+        return True
+    return False
+
+
+def _catch_up(world: World, room: Room) -> None:
+    """
+    For a room read back from storage: restore what came due while it was
+    not cached and schedule the rest on world.respawns.
+    """
+    changed = False
+    for n in room.resources:
+        changed |= _lazy_respawn(n)
+    for e in room.enemies:
+        changed |= _lazy_enemy_respawn(e)
+    respawn.schedule_room(world.respawns, room)
+    if changed:
+        persist_room(room, world)
+
+
+def run_respawns(world: World, now: Optional[float] = None, limit: Optional[int] = None) -> List[Room]:
+    """
+    Restore the due respawns of cached rooms (evicted rooms catch up when
+    loaded again). Returns the rooms that changed, each queued for writing.
+    """
+    now = time.time() if now is None else now
+    changed: Dict[Coord, Room] = {}
+    for x, y, kind, entry_id, stamp in world.respawns.pop_due(now, limit):
+        room = world._rooms.peek((x, y))
+        if room is not None and respawn.restore(room, kind, entry_id, stamp):
+            changed[(x, y)] = room
+    for room in changed.values():
+        persist_room(room, world)
+    return list(changed.values())
 
 def get_room(world: World, x: int, y: int) -> Room:
     """Fetch (or roll) room state for (x,y)."""
     key = (int(x), int(y))
-    if key in world._rooms:
-        room = world._rooms[key]
-        # on access, allow lazy respawn updates
-        for n in room.resources:
-            _lazy_respawn(n)
-        for e in room.enemies:
-            _lazy_enemy_respawn(e)
+    cache = world._rooms
+    room = cache.lookup(key)
+    if room is not None:
+        # on access, restore a few due respawns (nothing to do most of the time)
+        if world.respawns and world.respawns.next_due <= time.time():
+            run_respawns(world, limit=ACCESS_RESPAWN_LIMIT)
         return room
 
     # try to load persisted room first
+    t0 = time.perf_counter()
+    # the prefetcher may insert the same key meanwhile: setdefault keeps
+    # whichever room got there first, and only the winner is caught up / queued
     room = persistence.load_room(world.id, *key)
     if room is not None:
-        for n in room.resources:
-            _lazy_respawn(n)
-        for e in room.enemies:
-            _lazy_enemy_respawn(e)
-        world._rooms[key] = room
-        return room
+        cache.record_load("db", time.perf_counter() - t0)
+        won = cache.setdefault(key, room)
+        if won is room:
+            _catch_up(world, room)
+        return won
+
+    # pre-rolled rooms are already on disk; nothing to write until they diverge
+    t0 = time.perf_counter()
+    room = room_atlas.atlas_room(world, *key)
+    if room is not None:
+        cache.record_load("atlas", time.perf_counter() - t0)
+        return cache.setdefault(key, room)
+
+    t0 = time.perf_counter()
+    room = _roll_room(world, *key)
+    cache.record_load("roll", time.perf_counter() - t0)
 
-    biome = world.biome_at(*key)
-    rng = _rng_for(world, *key)
+    won = cache.setdefault(key, room)
+    if won is room:
+        persistence.WRITER.mark(room)
+    return won
+
+def _roll_room(world: World, x: int, y: int) -> Room:
+    biome = world.biome_at(x, y)
+    rng = _rng_for(world, x, y)
     tags = _compute_tags(world, x, y, biome)
 
-    room = Room(world_id=world.id, x=key[0], y=key[1], biome=biome, tags=tags)
+    room = Room(world_id=world.id, x=x, y=y, biome=biome, tags=tags)
     room.resources   = _roll_resources(world, x, y, biome, tags, rng)
     room.searchables = _roll_searchables(biome, tags, rng)
-    room.enemies     = _roll_enemies(biome, tags, rng)
+    room.enemies     = _roll_enemies(world, x, y, tags, rng)
     room.quests      = _roll_quests(world, x, y, tags, rng)
     room.npcs        = _roll_npcs(world, x, y, tags, rng)
-
-    world._rooms[key] = room
-    persistence.save_room(room)
     return room
 
+def persist_room(room: Room, world: Optional[World] = None) -> bool:
+    """
+    Mark a mutated room dirty, queue it for the write-behind flusher
+    (persistence.WRITER) and register its depleted nodes / defeated enemies
+    for respawn. Rooms still identical to their atlas entry are not written,
+    unless an older state of theirs is stored or queued: that row would win
+    over the atlas on the next load. Uses the current world when none is
+    given. Returns True if queued.
+    """
+    world = world or _CURRENT_WORLD
+    if world is not None:
+        respawn.schedule_room(world.respawns, room)
+    if (world is not None and world.atlas is not None and not room_atlas.diverges(world, room)
+            and not room.stored and persistence.WRITER.queued(persistence._key(room)) is None):
+        return False
+    persistence.WRITER.mark(room)
+    if world is not None:
+        world._rooms.remeasure((room.x, room.y))
+    return True
+
+# ------- Neighbourhood prefetch -------
+
+def prefetch_ring(world: World, x: int, y: int, radius: Optional[int] = None) -> int:
+    """
+    Put the rooms within `radius` tiles (Chebyshev) of (x, y) into the cache:
+    persisted ones with one batched query, then atlas entries, then fresh
+    rolls. Inserts go through LRURoomCache.offer, so pinned and dirty rooms
+    are never evicted for them. Returns the number of rooms added.
+    """
+    radius = world.prefetch_radius if radius is None else radius
+    W, H = world.size
+    cache = world._rooms
+    keys = [(x + dx, y + dy)
+            for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)
+            if (dx or dy) and 0 <= x + dx < W and 0 <= y + dy < H and (x + dx, y + dy) not in cache]
+    if not keys:
+        return 0
+    t0 = time.perf_counter()
+    stored = persistence.load_rooms(world.id, keys)
+    added = 0
+    for key in keys:
+        room, fresh = stored.get(key), False
+        if room is None:
+            room = room_atlas.atlas_room(world, *key)
+        if room is None:
+            room, fresh = _roll_room(world, *key), True
+        if cache.offer(key, room):
+            added += 1
+            if fresh:
+                persistence.WRITER.mark(room)
+            elif key in stored:
+                _catch_up(world, room)
+    cache.record_load("prefetch", time.perf_counter() - t0)
+    return added
+
+
+class RoomPrefetcher:
+    """Daemon thread running prefetch_ring for requested positions (duplicates coalesce)."""
+
+    def __init__(self):
+        self._jobs: "OrderedDict[Tuple[int, int, int], Tuple[World, int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.rings = 0
+        self.rooms = 0
+        self.errors = 0
+
+    def request(self, world: World, x: int, y: int) -> None:
+        if getattr(world, "prefetch_radius", 0) <= 0:
+            return
+        with self._lock:
+            self._jobs[(id(world), int(x), int(y))] = (world, int(x), int(y))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="room-prefetch", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def run_pending(self) -> int:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        added = 0
+        for world, x, y in jobs:
+            try:
+                added += prefetch_ring(world, x, y)
+                self.rings += 1
+            except Exception:
+                self.errors += 1
+                log.exception("room prefetch around %s,%s failed", x, y)
+        self.rooms += added
+        return added
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            self.run_pending()
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._jobs), "rings": self.rings, "rooms": self.rooms, "errors": self.errors}
+
+
+PREFETCHER = RoomPrefetcher()
+
+def prefetch_around(world: World, x: int, y: int) -> None:
+    """Queue a background prefetch of the rooms around (x, y)."""
+    PREFETCHER.request(world, x, y)
+
 # ------- Convenience adapters for older calls expecting a string room_id -------
 
 def get_room_by_id(room_id: str) -> Room:
@@ -4,7 +4,7 @@ from __future__ import annotations
 from typing import Any, Dict, List
 
 from api.player_service import get_player
-from engine.player_engine import can_enter
+from engine import passability
 from engine.world_loader import get_room
 
 try:
@@ -14,14 +14,6 @@ except Exception:  # pragma: no cover
     from pathlib import Path
     WORLD = load_world(Path("client/public/shards/00089451_default.json"))
 
-_DIRS = {
-    "north": (0, -1),
-    "south": (0, 1),
-    "east": (1, 0),
-    "west": (-1, 0),
-}
-
-
 def look() -> List[Dict]:
     """Return descriptive frames for the current room."""
     player = get_player()
@@ -34,11 +26,7 @@ def look() -> List[Dict]:
     frames.append({"type": "text", "data": desc})
 
     # exits
-    exits = []
-    for label, (dx, dy) in _DIRS.items():
-        ok, _ = can_enter(WORLD, room_obj.x + dx, room_obj.y + dy, player)
-        if ok:
-            exits.append(label)
+    exits = list(passability.neighbours(WORLD, room_obj.x, room_obj.y, passability.caps_of(player.flags)))
     if exits:
         frames.append({"type": "text", "data": "Exits: " + ", ".join(sorted(exits))})
 
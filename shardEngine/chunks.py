@@ -0,0 +1,415 @@
+"""
+Shard Engine v2 - Chunked shard sidecar
+---------------------------------------
+
+The map viewer only ever shows a window of a shard, so besides the JSON file
+each shard gets a binary sidecar "<file>.chunks" that splits the map into
+fixed CHUNK x CHUNK tiles and stores every layer of every chunk as its own
+zlib-compressed compact JSON blob. Reads seek straight to the requested
+chunks; the shard JSON is never parsed on the fetch path.
+
+Layout (little endian):
+
+    header  : b"SBCK" | u16 version | u16 chunk | u32 width | u32 height
+              | u16 n_layers | 32-byte sha256 of the source shard
+    layers  : n_layers x (u8 len | ascii name)
+    levels  : u8 n_levels, then per LOD level
+              u8 factor | u32 width | u32 height | u16 n_layers | n_layers x (u8 len | ascii name)
+    index   : rows x cols x n_layers x (u64 offset | u32 length | 8-byte blake2s),
+              full resolution first, then each LOD level in the same layout
+    payload : zlib(compact JSON) blobs
+
+Per-chunk layer shapes (coordinates stay absolute):
+
+    grid       {"palette": [biome, ...], "rows": [[palette index, ...], ...]}
+    elevation  [[int, ...], ...]
+    roads      {"tiles": [[x, y], ...], "bridges": [[x, y], ...]}
+    rivers     [[x, y], ...]
+    lakes      [[x, y], ...]
+    sites      [{...site...}, ...]
+
+LOD levels (shardEngine/lod.py; recomputed from grid/elevation while
+building) carry the raster layers only - grid and elevation - chunked on
+their own downsampled grid, so a chunk at factor f covers f*CHUNK map tiles.
+
+Use:
+    cf = open_chunks(path, digest)          # builds the sidecar if missing/stale
+    body, etag = render_chunks(cf, name="...", x0=0, y0=0, x1=63, y1=63, layers=["grid"])
+    body, etag = render_chunks(cf, ..., zoom=0.25)   # served from the 4x level
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CHUNK = 32
+VERSION = 2
+MAGIC = b"SBCK"
+SUFFIX = ".chunks"
+LAYERS = ("grid", "elevation", "roads", "rivers", "lakes", "sites")
+LOD_LAYERS = ("grid", "elevation")
+
+_HEADER = struct.Struct("<4sHHIIH32s")
+_INDEX = struct.Struct("<QI8s")
+_LEVEL = struct.Struct("<BIIH")
+
+_LOCK = threading.Lock()
+# sidecar path -> (mtime_ns, ChunkFile)
+_OPEN: Dict[Path, Tuple[int, "ChunkFile"]] = {}
+
+
+class ChunkError(ValueError):
+    ...
+
+
+def sidecar_path(path: Path) -> Path:
+    return Path(path).with_name(Path(path).name + SUFFIX)
+
+
+# -------- Layer extraction ----------------------------------------------------
+
+def grid_of(data: Dict[str, Any]) -> Optional[List[List[str]]]:
+    grid = data.get("grid")
+    if isinstance(grid, list) and grid:
+        return grid
+    tiles = data.get("tiles")
+    if isinstance(tiles, list) and tiles:
+        # legacy shards: tiles[y][x] = {"tile"|"biome": id}
+        return [[(t.get("biome") or t.get("tile") or "") if isinstance(t, dict) else str(t) for t in row] for row in tiles]
+    return None
+
+def site_xy(site: Any) -> Optional[Tuple[int, int]]:
+    """Tile of a site / POI / settlement: x/y, pos / position [x, y] or anchor {x, y}; None if it has none."""
+    if not isinstance(site, dict):
+        return None
+    pos = site.get("pos") or site.get("position") or site.get("anchor")
+    try:
+        if isinstance(pos, (list, tuple)):
+            return int(pos[0]), int(pos[1])
+        if isinstance(pos, dict):
+            return int(pos["x"]), int(pos["y"])
+        return int(site["x"]), int(site["y"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+def elevation_of(data: Dict[str, Any]) -> Optional[List[List[int]]]:
+    elev = (data.get("layers") or {}).get("elevation")
+    if isinstance(elev, list) and elev:
+        return elev
+    tiles = data.get("tiles")
+    if isinstance(tiles, list) and tiles and isinstance(tiles[0][0], dict) and "elevation" in tiles[0][0]:
+        return [[int(t.get("elevation", 0)) for t in row] for row in tiles]
+    return None
+
+def _bucket(points: Iterable[Tuple[int, int]], cols: int, rows: int) -> Dict[Tuple[int, int], List[List[int]]]:
+    out: Dict[Tuple[int, int], List[List[int]]] = {}
+    for x, y in points:
+        cx, cy = int(x) // CHUNK, int(y) // CHUNK
+        if 0 <= cx < cols and 0 <= cy < rows:
+            out.setdefault((cx, cy), []).append([int(x), int(y)])
+    return out
+
+def _layer_sources(data: Dict[str, Any], cols: int, rows: int) -> Dict[str, Any]:
+    """Pre-bucket the vector layers so each chunk is a dict lookup."""
+    layers = data.get("layers") or {}
+    src: Dict[str, Any] = {}
+
+    grid = grid_of(data)
+    if grid is not None:
+        src["grid"] = grid
+    elev = elevation_of(data)
+    if elev is not None:
+        src["elevation"] = elev
+
+    roads = layers.get("roads")
+    if isinstance(roads, dict):
+        road_tiles = {(int(x), int(y)) for path in roads.get("paths", []) for x, y in path}
+        bridges = [(int(b["x"]), int(b["y"])) for b in roads.get("bridges", [])]
+        src["roads"] = (_bucket(sorted(road_tiles, key=lambda p: (p[1], p[0])), cols, rows),
+                        _bucket(bridges, cols, rows))
+
+    hydro = layers.get("hydrology")
+    if isinstance(hydro, dict):
+        river_tiles = {(int(x), int(y)) for path in hydro.get("rivers", []) for x, y in path}
+        src["rivers"] = _bucket(sorted(river_tiles, key=lambda p: (p[1], p[0])), cols, rows)
+        lake_tiles = {(int(x), int(y)) for lake in hydro.get("lakes", []) for x, y in lake.get("tiles", [])}
+        src["lakes"] = _bucket(sorted(lake_tiles, key=lambda p: (p[1], p[0])), cols, rows)
+
+    sites = data.get("sites")
+    if not isinstance(sites, list):
+        sites = data.get("pois") if isinstance(data.get("pois"), list) else None
+    if sites is not None:
+        by_chunk: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for s in sites:
+            xy = site_xy(s)
+            if xy is None:
+                continue
+            by_chunk.setdefault((xy[0] // CHUNK, xy[1] // CHUNK), []).append(s)
+        src["sites"] = by_chunk
+    return src
+
+def _chunk_value(layer: str, src: Any, x0: int, y0: int, x1: int, y1: int, key: Tuple[int, int]) -> Any:
+    if layer == "grid":
+        palette: Dict[str, int] = {}
+        rows = [[palette.setdefault(cell, len(palette)) for cell in row[x0:x1]] for row in src[y0:y1]]
+        return {"palette": list(palette), "rows": rows}
+    if layer == "elevation":
+        return [row[x0:x1] for row in src[y0:y1]]
+    if layer == "roads":
+        tiles, bridges = src
+        return {"tiles": tiles.get(key, []), "bridges": bridges.get(key, [])}
+    return src.get(key, [])
+
+def _lod_sources(grid: List[List[str]], elev: Optional[List[List[int]]]) -> List[Dict[str, Any]]:
+    """
+    Per-level raster sources ({"factor", "width", "height", "grid", "elevation"?}), coarsest last,
+    built from the grid being chunked.
+    """
+    from .lod import build_lod
+
+    lod = build_lod(grid, elev, chunk=CHUNK) or {"levels": []}
+    out: List[Dict[str, Any]] = []
+    for level in lod["levels"]:
+        g = level.get("grid") or {}
+        pal = g.get("palette") or []
+        src: Dict[str, Any] = {"factor": int(level["factor"]), "width": int(level["width"]), "height": int(level["height"]),
+                               "grid": [[pal[i] for i in row] for row in g.get("rows", [])]}
+        if level.get("elevation"):
+            src["elevation"] = level["elevation"]
+        out.append(src)
+    return out
+
+
+# -------- Build ---------------------------------------------------------------
+
+def _level_blobs(src: Dict[str, Any], names: List[str], width: int, height: int) -> List[Tuple[bytes, bytes]]:
+    blobs: List[Tuple[bytes, bytes]] = []
+    for cy in range(-(-height // CHUNK)):
+        for cx in range(-(-width // CHUNK)):
+            x0, y0 = cx * CHUNK, cy * CHUNK
+            x1, y1 = min(width, x0 + CHUNK), min(height, y0 + CHUNK)
+            for name in names:
+                text = json.dumps(_chunk_value(name, src[name], x0, y0, x1, y1, (cx, cy)), separators=(",", ":"))
+                raw = text.encode("utf-8")
+                blobs.append((zlib.compress(raw, 6), hashlib.blake2s(raw, digest_size=8).digest()))
+    return blobs
+
+def _names(names: List[str]) -> bytes:
+    return b"".join(struct.pack("<B", len(n)) + n.encode("ascii") for n in names)
+
+def build_sidecar(path: Path, data: Optional[Dict[str, Any]] = None, digest: Optional[str] = None) -> Path:
+    """(Re)write <file>.chunks for a shard; parses the JSON only if data is not given."""
+    from .manifest import file_digest
+    from .persistence import _atomic_write_binary
+
+    path = Path(path)
+    if data is None:
+        with path.open("r", encoding="utf-8-sig") as f:
+            data = json.load(f)
+    digest = digest or file_digest(path)
+
+    grid = grid_of(data)
+    if grid is None:
+        raise ChunkError(f"{path.name}: shard has no grid/tiles")
+    height, width = len(grid), len(grid[0]) if grid else 0
+    cols, rows = -(-width // CHUNK), -(-height // CHUNK)
+    src = _layer_sources(data, cols, rows)
+    names = [name for name in LAYERS if name in src]
+    blobs = _level_blobs(src, names, width, height)
+
+    levels = _lod_sources(grid, src.get("elevation"))
+    level_head = struct.pack("<B", len(levels))
+    for level in levels:
+        lnames = [name for name in LOD_LAYERS if name in level]
+        level_head += _LEVEL.pack(level["factor"], level["width"], level["height"], len(lnames)) + _names(lnames)
+        blobs += _level_blobs(level, lnames, level["width"], level["height"])
+
+    head = _HEADER.pack(MAGIC, VERSION, CHUNK, width, height, len(names), bytes.fromhex(digest))
+    head += _names(names) + level_head
+    offset = len(head) + _INDEX.size * len(blobs)
+
+    def fill(raw) -> None:
+        raw.write(head)
+        at = offset
+        for blob, h in blobs:
+            raw.write(_INDEX.pack(at, len(blob), h))
+            at += len(blob)
+        for blob, _ in blobs:
+            raw.write(blob)
+
+    out = sidecar_path(path)
+    _atomic_write_binary(out, fill)
+    return out
+
+
+# -------- Read ----------------------------------------------------------------
+
+class _Level:
+    """Chunk grid of one resolution: factor 1 is the map itself."""
+
+    def __init__(self, factor: int, width: int, height: int, chunk: int, layers: Tuple[str, ...], first: int):
+        self.factor, self.width, self.height, self.layers = factor, width, height, layers
+        self.cols, self.rows = -(-width // chunk), -(-height // chunk)
+        self.first = first  # position of this level's first entry in the index
+        self.count = self.cols * self.rows * len(layers)
+
+
+class ChunkFile:
+    """Header + index of a sidecar; payload blobs are read on demand."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) != _HEADER.size:
+                raise ChunkError(f"{self.path.name}: truncated header")
+            magic, version, chunk, width, height, n_layers, digest = _HEADER.unpack(head)
+            if magic != MAGIC or version != VERSION:
+                raise ChunkError(f"{self.path.name}: not a v{VERSION} chunk file")
+
+            def names(n_names: int) -> Tuple[str, ...]:
+                out = []
+                for _ in range(n_names):
+                    (n,) = struct.unpack("<B", f.read(1))
+                    out.append(f.read(n).decode("ascii"))
+                return tuple(out)
+
+            self.chunk, self.width, self.height = chunk, width, height
+            self.digest = digest.hex()
+            self.layers: Tuple[str, ...] = names(n_layers)
+            self.cols, self.rows = -(-width // chunk), -(-height // chunk)
+            base = _Level(1, width, height, chunk, self.layers, 0)
+            self.levels: Dict[int, _Level] = {1: base}
+            count = base.count
+            (n_levels,) = struct.unpack("<B", f.read(1))
+            for _ in range(n_levels):
+                factor, lw, lh, ln = _LEVEL.unpack(f.read(_LEVEL.size))
+                level = _Level(factor, lw, lh, chunk, names(ln), count)
+                self.levels[factor] = level
+                count += level.count
+            index = f.read(_INDEX.size * count)
+        if len(index) != _INDEX.size * count:
+            raise ChunkError(f"{self.path.name}: truncated index")
+        self._index = [_INDEX.unpack_from(index, i * _INDEX.size) for i in range(count)]
+
+    def level_for(self, zoom: float) -> _Level:
+        """Coarsest level whose cells are no bigger than one screen tile at `zoom` (1 = full resolution)."""
+        if not zoom > 0:
+            raise ChunkError("zoom must be > 0")
+        fits = [f for f in self.levels if f <= 1.0 / zoom]
+        return self.levels[max(fits) if fits else 1]
+
+    def bounds(self, cx: int, cy: int, factor: int = 1) -> Tuple[int, int, int, int]:
+        lv = self.levels[factor]
+        x0, y0 = cx * self.chunk, cy * self.chunk
+        return x0, y0, min(lv.width, x0 + self.chunk), min(lv.height, y0 + self.chunk)
+
+    def _entry(self, cx: int, cy: int, layer: str, factor: int = 1) -> Tuple[int, int, bytes]:
+        lv = self.levels[factor]
+        if not (0 <= cx < lv.cols and 0 <= cy < lv.rows):
+            raise ChunkError(f"chunk {cx},{cy} out of range")
+        li = lv.layers.index(layer)
+        return self._index[lv.first + (cy * lv.cols + cx) * len(lv.layers) + li]
+
+    def chunk_hash(self, cx: int, cy: int, layers: Iterable[str], factor: int = 1) -> str:
+        h = hashlib.blake2s(digest_size=8)
+        for layer in layers:
+            h.update(layer.encode("ascii"))
+            h.update(self._entry(cx, cy, layer, factor)[2])
+        return h.hexdigest()
+
+    def read_many(
+        self, cells: Iterable[Tuple[int, int]], layers: Iterable[str], factor: int = 1
+    ) -> Dict[Tuple[int, int, str], bytes]:
+        """Decompressed compact JSON for each (cx, cy, layer); one open, seeks in file order."""
+        wanted = sorted(((*self._entry(cx, cy, layer, factor), cx, cy, layer) for cx, cy in cells for layer in layers))
+        out: Dict[Tuple[int, int, str], bytes] = {}
+        with self.path.open("rb") as f:
+            for offset, length, _, cx, cy, layer in wanted:
+                f.seek(offset)
+                out[(cx, cy, layer)] = zlib.decompress(f.read(length))
+        return out
+
+
+def open_chunks(path: Path, digest: Optional[str] = None) -> ChunkFile:
+    """
+    Open the sidecar for a shard, (re)building it when it is missing or was
+    built from different shard bytes than `digest` (the manifest hash).
+    """
+    path = Path(path)
+    side = sidecar_path(path)
+    with _LOCK:
+        try:
+            st = side.stat()
+            cached = _OPEN.get(side)
+            cf = cached[1] if cached and cached[0] == st.st_mtime_ns else ChunkFile(side)
+            if digest is not None and cf.digest != digest:
+                raise ChunkError("stale")
+        except (FileNotFoundError, ChunkError):
+            build_sidecar(path, digest=digest)
+            st = side.stat()
+            cf = ChunkFile(side)
+        _OPEN[side] = (st.st_mtime_ns, cf)
+        return cf
+
+
+def render_chunks(
+    cf: ChunkFile,
+    *,
+    name: str,
+    x0: int,
+    y0: int,
+    x1: int,
+    y1: int,
+    layers: List[str],
+    zoom: float = 1.0,
+    max_chunks: int = 64,
+) -> Tuple[str, str]:
+    """
+    Response body + ETag for the chunks overlapping the inclusive tile rect
+    (x0, y0)-(x1, y1). Stored layer JSON is spliced in without re-encoding.
+
+    zoom < 1 serves the coarsest LOD level with factor <= 1/zoom; the rect is
+    still given in map tiles, while chunk x/y/w/h are in level cells (one
+    cell = `factor` x `factor` map tiles). The ETag covers only the chunks
+    sent, so the body carries no whole-shard hash that could go stale
+    under a 304.
+    """
+    if x1 < x0 or y1 < y0:
+        raise ChunkError("empty rect")
+    lv = cf.level_for(zoom)
+    f = lv.factor
+    x0, y0 = max(0, x0) // f, max(0, y0) // f
+    x1, y1 = min(cf.width - 1, x1) // f, min(cf.height - 1, y1) // f
+    layers = [layer for layer in layers if layer in lv.layers]
+    cells = [] if x1 < x0 or y1 < y0 else [
+        (cx, cy)
+        for cy in range(y0 // cf.chunk, y1 // cf.chunk + 1)
+        for cx in range(x0 // cf.chunk, x1 // cf.chunk + 1)
+    ]
+    if len(cells) > max_chunks:
+        raise ChunkError(f"too many chunks ({len(cells)} > {max_chunks})")
+
+    blobs = cf.read_many(cells, layers, f)
+    etag = hashlib.blake2s(digest_size=16)
+    etag.update(str(f).encode("ascii"))
+    parts = []
+    for cx, cy in cells:
+        bx0, by0, bx1, by1 = cf.bounds(cx, cy, f)
+        h = cf.chunk_hash(cx, cy, layers, f)
+        etag.update(h.encode("ascii"))
+        body = [f'"cx":{cx},"cy":{cy},"x":{bx0},"y":{by0},"w":{bx1 - bx0},"h":{by1 - by0},"hash":"{h}"']
+        body += [f'"{layer}":' + blobs[(cx, cy, layer)].decode("utf-8") for layer in layers]
+        parts.append("{" + ",".join(body) + "}")
+
+    head = json.dumps({
+        "shard": name, "chunk": cf.chunk,
+        "width": cf.width, "height": cf.height, "factor": f, "layers": layers,
+    }, separators=(",", ":"))
+    return head[:-1] + ',"chunks":[' + ",".join(parts) + "]}", etag.hexdigest()
@@ -0,0 +1,144 @@
+# /app/shardEngine/climate.py
+"""
+Shard Engine v2 - Moisture field + table-driven biome classification
+--------------------------------------------------------------------
+
+Runs after hydrology. Moisture is a flat row-major array built from
+
+- BFS distance to fresh water (river + lake tiles) and to salt water
+  (ocean / shoreline tags), each decayed exponentially
+- coarse value noise: one hash per lattice point (every NOISE_CELL tiles),
+  bilinearly interpolated, instead of hashes per tile
+
+Interior land tiles are then classified with the biome pack's table:
+
+    "classification": {
+      "elevation_bands": [0.55, 0.80],          # land-normalized, ascending
+      "moisture_bands":  [0.25, 0.50, 0.75],    # ascending
+      "table": [                                # table[elev band][moist band]
+        ["plains", "plains", "forest", "marsh-lite"],
+        ["hills",  "hills",  "forest", "forest"],
+        ["mountains", "mountains", "mountains", "mountains"]
+      ]
+    }
+
+Bands are quantized once per tile (bisect) and the biome is a single
+table lookup; packs without a table keep the legacy jitter classifier.
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .hydrology import _is_water
+
+Coord = Tuple[int, int]
+
+NOISE_CELL = 8          # lattice spacing of the moisture noise, in tiles
+NOISE_WEIGHT = 0.35     # share of noise in the final moisture
+FRESH_FALLOFF = 5.0     # tiles for fresh-water influence to drop to 1/e
+SALT_FALLOFF = 4.0
+SALT_STRENGTH = 0.55    # sea air is drier than a riverbank
+
+
+class ClassificationError(ValueError):
+    ...
+
+
+def _bfs_distance(w: int, h: int, sources: Iterable[int]) -> List[int]:
+    """Multi-source 4-neighbour BFS over flat indices; -1 where unreachable."""
+    dist = [-1] * (w * h)
+    q = deque()
+    for i in sources:
+        if dist[i] < 0:
+            dist[i] = 0
+            q.append(i)
+    while q:
+        i = q.popleft()
+        d = dist[i] + 1
+        x = i % w
+        if x > 0 and dist[i - 1] < 0:
+            dist[i - 1] = d; q.append(i - 1)
+        if x < w - 1 and dist[i + 1] < 0:
+            dist[i + 1] = d; q.append(i + 1)
+        if i >= w and dist[i - w] < 0:
+            dist[i - w] = d; q.append(i - w)
+        if i < w * (h - 1) and dist[i + w] < 0:
+            dist[i + w] = d; q.append(i + w)
+    return dist
+
+def _lattice_noise(rng, w: int, h: int, cell: int = NOISE_CELL) -> List[float]:
+    """0..1 value noise; hashes only the (w/cell+2) x (h/cell+2) lattice."""
+    gw, gh = w // cell + 2, h // cell + 2
+    lattice = [[rng.randf(f"moist.{gx}.{gy}") for gx in range(gw)] for gy in range(gh)]
+    fx = [((x % cell) / cell) for x in range(w)]
+    ux = [t * t * (3 - 2 * t) for t in fx]
+    out: List[float] = []
+    for y in range(h):
+        gy, ty = divmod(y, cell)
+        uy = (ty / cell) ** 2 * (3 - 2 * ty / cell)
+        row0, row1 = lattice[gy], lattice[gy + 1]
+        for x in range(w):
+            gx = x // cell
+            a = row0[gx] + (row0[gx + 1] - row0[gx]) * ux[x]
+            b = row1[gx] + (row1[gx + 1] - row1[gx]) * ux[x]
+            out.append(a + (b - a) * uy)
+    return out
+
+def moisture_field(
+    grid: List[List[str]],
+    rng,
+    rivers: Iterable[Iterable[Coord]] = (),
+    lakes: Iterable[Iterable[Coord]] = (),
+) -> List[float]:
+    """Row-major 0..1 moisture for every tile."""
+    h = len(grid); w = len(grid[0]) if h else 0
+    fresh = {y * w + x for path in rivers for x, y in path} | {y * w + x for blob in lakes for x, y in blob}
+    salt = [y * w + x for y in range(h) for x in range(w) if _is_water(grid[y][x])]
+    d_fresh = _bfs_distance(w, h, fresh)
+    d_salt = _bfs_distance(w, h, salt)
+    noise = _lattice_noise(rng, w, h)
+    out: List[float] = []
+    for i in range(w * h):
+        base = 0.0
+        if d_fresh[i] >= 0:
+            base = math.exp(-d_fresh[i] / FRESH_FALLOFF)
+        if d_salt[i] >= 0:
+            base = max(base, SALT_STRENGTH * math.exp(-d_salt[i] / SALT_FALLOFF))
+        m = base * (1.0 - NOISE_WEIGHT) + noise[i] * NOISE_WEIGHT
+        out.append(0.0 if m < 0.0 else (1.0 if m > 1.0 else m))
+    return out
+
+def load_table(pack: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Validated classification block of a biome pack, or None if it has none."""
+    spec = (pack or {}).get("classification")
+    if not spec:
+        return None
+    eb = [float(v) for v in spec.get("elevation_bands", [])]
+    mb = [float(v) for v in spec.get("moisture_bands", [])]
+    table = spec.get("table") or []
+    if eb != sorted(eb) or mb != sorted(mb):
+        raise ClassificationError("classification bands must be ascending")
+    if len(table) != len(eb) + 1 or any(len(row) != len(mb) + 1 for row in table):
+        raise ClassificationError(
+            f"classification table must be {len(eb) + 1} x {len(mb) + 1} (elevation x moisture bands)")
+    return {"elevation_bands": eb, "moisture_bands": mb, "table": [list(map(str, row)) for row in table]}
+
+def classify(
+    elevation: List[float],
+    moisture: List[float],
+    table: Dict[str, Any],
+    mask: Optional[Iterable[bool]] = None,
+) -> List[Optional[str]]:
+    """
+    Biome per tile from land-normalized elevation (0..1) and moisture (0..1);
+    None where mask is False.
+    """
+    eb, mb = table["elevation_bands"], table["moisture_bands"]
+    cols = len(mb) + 1
+    flat = [b for row in table["table"] for b in row]
+    mask = [True] * len(elevation) if mask is None else list(mask)
+    return [flat[bisect_right(eb, e) * cols + bisect_right(mb, m)] if keep else None
+            for e, m, keep in zip(elevation, moisture, mask)]
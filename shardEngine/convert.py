@@ -0,0 +1,295 @@
+# /app/shardEngine/convert.py
+"""
+Shard Engine v2 - Bulk shard conversion
+---------------------------------------
+
+Runs every shard file of a library through a fixed pipeline of steps, one
+file per task, across a process pool (see `shard_cli.py convert`):
+
+    grid    : legacy tiles[y][x] / pois -> canonical grid / sites; per-tile
+              elevation -> layers.elevation, any other non-default per-tile
+              field (tags, flags, resources, ...) -> layers.tiles[field] as
+              a sparse [{"x", "y", "value"}, ...] list
+    rename  : biome renames in grid and legacy tiles ({"old": "new"})
+    v2only  : drop the legacy tiles / pois copies and set meta.v2Only; refuses
+              while tiles still carry data that was not migrated
+
+Every converted document is validated (rectangular grid matching
+meta.width / meta.height, sites in bounds) before anything is written.
+Writes go through persistence._atomic_write and the same post-save hooks as
+save_shard_v2 (encoded variants, chunk sidecar, thumbnail); manifest.json is
+only touched by the parent process, so parallel workers never race on it.
+
+Each file reports {"file", "changed", "changes", "bytes_in", "bytes_out",
+"tiles", "ms"} (+ "errors" when validation fails). With dry_run nothing is
+written and "changes" is the diff that would be applied.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .chunks import elevation_of, grid_of, site_xy
+
+STEPS = ("grid", "rename", "v2only")
+
+# tile keys that the grid itself carries
+_TILE_BASE = {"x", "y", "biome", "tile"}
+
+
+class ConvertError(ValueError):
+    ...
+
+
+# -------- Steps ---------------------------------------------------------------
+
+def _step_grid(data: Dict[str, Any], changes: List[str], renames: Dict[str, str]) -> None:
+    if not (isinstance(data.get("grid"), list) and data["grid"]):
+        grid = grid_of(data)
+        if grid is None:
+            raise ConvertError("no grid or tiles")
+        data["grid"] = grid
+        changes.append("+grid")
+    if not isinstance(data.get("sites"), list) and isinstance(data.get("pois"), list):
+        data["sites"] = [{k: v for k, v in p.items() if k != "meta" or v} for p in data["pois"] if isinstance(p, dict)]
+        changes.append("+sites")
+    _migrate_tiles(data, changes)
+    meta = data.setdefault("meta", {})
+    h = len(data["grid"]); w = len(data["grid"][0]) if h else 0
+    for key, value in (("width", w), ("height", h)):
+        if meta.get(key) is None:
+            meta[key] = value
+            changes.append(f"meta.{key}: None -> {value}")
+
+def _has_value(value: Any) -> bool:
+    if isinstance(value, dict):
+        return any(_has_value(v) for v in value.values())
+    return bool(value)
+
+def _tile_extras(data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Non-default per-tile fields of the legacy tiles, sparse: {field: [{"x", "y", "value"}, ...]}."""
+    extras: Dict[str, List[Dict[str, Any]]] = {}
+    tiles = data.get("tiles")
+    if not isinstance(tiles, list):
+        return extras
+    for y, row in enumerate(tiles):
+        for x, cell in enumerate(row if isinstance(row, list) else []):
+            if not isinstance(cell, dict):
+                continue
+            for key, value in cell.items():
+                if key not in _TILE_BASE and _has_value(value):
+                    extras.setdefault(key, []).append({"x": x, "y": y, "value": value})
+    return extras
+
+def _unmigrated(data: Dict[str, Any]) -> List[str]:
+    """Per-tile fields that only the legacy tiles still hold."""
+    layers = data.get("layers") if isinstance(data.get("layers"), dict) else {}
+    moved = layers.get("tiles") if isinstance(layers.get("tiles"), dict) else {}
+    return sorted(key for key in _tile_extras(data)
+                  if not (key == "elevation" and isinstance(layers.get("elevation"), list)) and key not in moved)
+
+def _migrate_tiles(data: Dict[str, Any], changes: List[str]) -> None:
+    tiles = data.get("tiles")
+    if not isinstance(tiles, list):
+        return
+    layers = data.setdefault("layers", {})
+    if not isinstance(layers.get("elevation"), list):
+        elev = elevation_of(data)
+        if elev is not None:
+            layers["elevation"] = elev
+            changes.append("+layers.elevation")
+    moved = layers.setdefault("tiles", {})
+    for key, cells in _tile_extras(data).items():
+        if key != "elevation" and key not in moved:
+            moved[key] = cells
+            changes.append(f"+layers.tiles.{key}: {len(cells)}")
+    if not moved:
+        del layers["tiles"]
+
+def _step_rename(data: Dict[str, Any], changes: List[str], renames: Dict[str, str]) -> None:
+    if not renames:
+        return
+    counts: Dict[str, int] = {}
+
+    def swap(cell: str) -> str:
+        new = renames.get(cell)
+        if new is None:
+            return cell
+        counts[cell] = counts.get(cell, 0) + 1
+        return new
+
+    grid = data.get("grid")
+    if isinstance(grid, list):
+        data["grid"] = [[swap(cell) if cell in renames else cell for cell in row] for row in grid]
+    tiles = data.get("tiles")
+    if isinstance(tiles, list):
+        # the legacy copy mirrors the grid; only count it when it is the only map
+        rename = renames.__getitem__ if isinstance(grid, list) else swap
+        for row in tiles:
+            for cell in row:
+                if isinstance(cell, dict):
+                    for key in ("tile", "biome"):
+                        if cell.get(key) in renames:
+                            cell[key] = rename(cell[key])
+    changes += [f"rename {old} -> {renames[old]}: {n}" for old, n in sorted(counts.items())]
+
+def _step_v2only(data: Dict[str, Any], changes: List[str], renames: Dict[str, str]) -> None:
+    if not isinstance(data.get("grid"), list) or ("pois" in data and not isinstance(data.get("sites"), list)):
+        raise ConvertError("v2only needs grid / sites (run the grid step first)")
+    left = _unmigrated(data)
+    if left:
+        raise ConvertError(f"v2only would drop per-tile {', '.join(left)} (run the grid step first)")
+    for key in ("tiles", "pois"):
+        if key in data:
+            del data[key]
+            changes.append(f"-{key}")
+    meta = data.setdefault("meta", {})
+    if not meta.get("v2Only"):
+        changes.append(f"meta.v2Only: {meta.get('v2Only')} -> True")
+        meta["v2Only"] = True
+
+_STEP_FUNCS: Dict[str, Callable[[Dict[str, Any], List[str], Dict[str, str]], None]] = {
+    "grid": _step_grid,
+    "rename": _step_rename,
+    "v2only": _step_v2only,
+}
+
+
+def validate(data: Dict[str, Any]) -> List[str]:
+    """Structural problems of a converted shard (empty list = valid)."""
+    errors: List[str] = []
+    grid = grid_of(data)
+    if grid is None:
+        return ["no grid or tiles"]
+    h = len(grid); w = len(grid[0]) if h else 0
+    if any(len(row) != w for row in grid):
+        errors.append("grid is not rectangular")
+    if any(not isinstance(cell, str) or not cell for row in grid for cell in row):
+        errors.append("grid has empty / non-string cells")
+    meta = data.get("meta") or {}
+    if meta.get("width") not in (None, w) or meta.get("height") not in (None, h):
+        errors.append(f"meta size {meta.get('width')}x{meta.get('height')} != grid {w}x{h}")
+    for s in data.get("sites") or []:
+        xy = site_xy(s)
+        if xy is None:
+            errors.append(f"site without x/y: {s.get('type', '?') if isinstance(s, dict) else s!r}")
+            continue
+        x, y = xy
+        if not (0 <= x < w and 0 <= y < h):
+            errors.append(f"site {s.get('type', '?')} at {x},{y} out of bounds")
+    return errors
+
+
+def convert(data: Dict[str, Any], steps: Sequence[str], renames: Optional[Dict[str, str]] = None) -> List[str]:
+    """Apply `steps` (in STEPS order) to a parsed shard in place; returns the change list."""
+    unknown = [s for s in steps if s not in _STEP_FUNCS]
+    if unknown:
+        raise ConvertError(f"unknown steps: {', '.join(unknown)}")
+    changes: List[str] = []
+    for name in STEPS:
+        if name in steps:
+            _STEP_FUNCS[name](data, changes, renames or {})
+    return changes
+
+
+# -------- Files ---------------------------------------------------------------
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def convert_file(path: str, steps: Sequence[str], renames: Dict[str, str], dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Convert one shard file (worker entry point, so arguments stay picklable).
+    When written, "entry" carries the unrecorded manifest entry for the parent.
+    """
+    from .persistence import _atomic_write, finalize_shard
+
+    t0 = time.perf_counter()
+    p = Path(path)
+    raw = p.read_bytes()
+    stats: Dict[str, Any] = {"file": p.name, "changed": False, "changes": [], "bytes_in": len(raw), "bytes_out": len(raw)}
+    try:
+        data = json.loads(raw.decode("utf-8-sig"))
+        stats["changes"] = convert(data, steps, renames)
+        errors = validate(data)
+    except (ConvertError, ValueError) as ex:
+        errors, data = [str(ex)], None
+    if data is not None:
+        grid = grid_of(data) or []
+        stats["tiles"] = len(grid) * (len(grid[0]) if grid else 0)
+    if errors:
+        stats["errors"] = errors
+    elif stats["changes"]:
+        text = _dumps(data)
+        stats["changed"] = True
+        stats["bytes_out"] = len(text.encode("utf-8"))
+        if not dry_run:
+            _atomic_write(p, text)
+            stats["entry"] = finalize_shard(p, meta=data.get("meta"), payload=data, record=False)
+    stats["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return stats
+
+
+def convert_library(
+    shards_dir: Path,
+    steps: Sequence[str],
+    *,
+    files: Optional[Iterable[str]] = None,
+    renames: Optional[Dict[str, str]] = None,
+    dry_run: bool = False,
+    jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Convert `files` (default: every shard in the manifest) with `jobs` worker
+    processes (default: CPU count; 1 runs in-process). Returns per-file stats
+    in completion order plus totals.
+    """
+    from . import manifest
+
+    shards_dir = Path(shards_dir)
+    unknown = [s for s in steps if s not in _STEP_FUNCS]
+    if unknown:  # fail before forking, not once per file
+        raise ConvertError(f"unknown steps: {', '.join(unknown)}")
+    names = list(files) if files is not None else [e["file"] for e in manifest.load_manifest(shards_dir)]
+    args = [(str(shards_dir / n), list(steps), dict(renames or {}), dry_run) for n in names]
+    jobs = max(1, jobs or os.cpu_count() or 1)
+
+    t0 = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+
+    def done(path: str, run: Callable[[], Dict[str, Any]]) -> None:
+        try:
+            stats = run()
+        except Exception as ex:
+            results.append({"file": Path(path).name, "changed": False, "errors": [str(ex)]})
+            return
+        entry = stats.pop("entry", None)
+        if entry is not None:
+            manifest.record_shard(shards_dir / stats["file"], meta=entry["meta"], digest=entry["hash"])
+        results.append(stats)
+
+    if jobs == 1 or len(args) <= 1:
+        for a in args:
+            done(a[0], lambda a=a: convert_file(*a))
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(args))) as pool:
+            futures = {pool.submit(convert_file, *a): a[0] for a in args}
+            for fut in as_completed(futures):
+                done(futures[fut], fut.result)
+
+    return {
+        "ok": not any(r.get("errors") for r in results),
+        "dry_run": dry_run,
+        "steps": [s for s in STEPS if s in steps],
+        "files": len(results),
+        "changed": sum(1 for r in results if r["changed"]),
+        "failed": sum(1 for r in results if r.get("errors")),
+        "bytes_in": sum(r.get("bytes_in", 0) for r in results),
+        "bytes_out": sum(r.get("bytes_out", 0) for r in results),
+        "seconds": round(time.perf_counter() - t0, 3),
+        "results": results,
+    }
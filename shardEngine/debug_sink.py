@@ -0,0 +1,164 @@
+"""
+Shard Engine v2 - Bounded asynchronous debug sink
+-------------------------------------------------
+
+Replaces the synchronous "one pretty JSON file per request" debug logging of the
+plan/generate endpoints with a sink that:
+
+- samples requests (SHARD_DEBUG_SAMPLE, 0..1; 0 disables the sink)
+- encodes + writes records on a background daemon thread
+- caps the size of a single record (SHARD_DEBUG_MAX_BYTES); oversize responses
+  are replaced by a short summary
+- keeps a ring buffer of at most SHARD_DEBUG_MAX_FILES files, deleting the
+  oldest record files once the cap is exceeded
+- never blocks the caller: when the queue (SHARD_DEBUG_QUEUE) is full the
+  record is dropped and counted
+
+Use:
+    sink = DebugSink(Path("static/public/debug"))
+    sink.submit("generate", {"raw": raw, "effective": eff, "resp": payload})
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import random
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class DebugSink:
+    """Sampled, size-capped, ring-buffered JSON debug writer (background thread)."""
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        sample_rate: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_files: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.directory = Path(directory)
+        self.sample_rate = _env_float("SHARD_DEBUG_SAMPLE", 1.0) if sample_rate is None else float(sample_rate)
+        self.max_bytes = _env_int("SHARD_DEBUG_MAX_BYTES", 256 * 1024) if max_bytes is None else int(max_bytes)
+        self.max_files = _env_int("SHARD_DEBUG_MAX_FILES", 50) if max_files is None else int(max_files)
+        self._queue: "queue.Queue[Tuple[str, str, Dict[str, Any]]]" = queue.Queue(
+            maxsize=_env_int("SHARD_DEBUG_QUEUE", 64) if queue_size is None else int(queue_size)
+        )
+        self._files: Optional[Deque[Path]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.stats = {"submitted": 0, "sampled_out": 0, "dropped": 0, "written": 0, "truncated": 0, "deleted": 0}
+
+    # ----- producer side ------------------------------------------------------
+
+    def submit(self, name: str, data: Dict[str, Any]) -> bool:
+        """Queue a record for writing; returns False if sampled out or dropped."""
+        self.stats["submitted"] += 1
+        if self.sample_rate <= 0.0 or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            self.stats["sampled_out"] += 1
+            return False
+        self._ensure_thread()
+        ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        try:
+            self._queue.put_nowait((name, ts, data))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every queued record has been written (tests/shutdown)."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put((None, None, done), timeout=timeout)  # type: ignore[arg-type]
+        done.wait(timeout)
+
+    # ----- worker side --------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="shard-debug-sink", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            name, ts, data = self._queue.get()
+            try:
+                if name is None:
+                    data.set()  # flush marker
+                    continue
+                self._write(name, ts, data)
+            except Exception:
+                # debug output must never take the process down
+                pass
+            finally:
+                self._queue.task_done()
+
+    def _encode(self, data: Dict[str, Any]) -> Optional[str]:
+        text = json.dumps(data, separators=(",", ":"), default=str)
+        if len(text) <= self.max_bytes:
+            return text
+        # keep request/config, summarise the (usually huge) response
+        self.stats["truncated"] += 1
+        slim = {k: v for k, v in data.items() if k != "resp"}
+        resp = data.get("resp")
+        slim["resp"] = {
+            "truncated": True,
+            "bytes": len(text),
+            "keys": sorted(resp.keys()) if isinstance(resp, dict) else None,
+        }
+        text = json.dumps(slim, separators=(",", ":"), default=str)
+        return text if len(text) <= self.max_bytes else None
+
+    def _ring(self) -> Deque[Path]:
+        if self._files is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            existing = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            self._files = deque(existing)
+        return self._files
+
+    def _write(self, name: str, ts: str, data: Dict[str, Any]) -> None:
+        text = self._encode(data)
+        if text is None:
+            self.stats["dropped"] += 1
+            return
+        ring = self._ring()
+        self._seq += 1
+        path = self.directory / f"{name}-{ts}-{self._seq:04d}.json"
+        path.write_text(text, encoding="utf-8")
+        ring.append(path)
+        self.stats["written"] += 1
+        while len(ring) > max(0, self.max_files):
+            old = ring.popleft()
+            try:
+                old.unlink(missing_ok=True)
+                self.stats["deleted"] += 1
+            except OSError:
+                pass
@@ -0,0 +1,77 @@
+"""
+Shard Engine v2 - Shard file delivery
+-------------------------------------
+
+Serves saved shard files straight from disk instead of parsing + re-encoding
+them per request:
+
+- strong ETag = the manifest content hash ("<sha256>", or "<sha256>-gzip" /
+  "<sha256>-deflate" for the pre-encoded variants)
+- If-None-Match / If-Modified-Since answered with 304 by Werkzeug's
+  conditional handling
+- Range requests served against the identity bytes (206)
+- Accept-Encoding negotiated against the <file>.gz / <file>.deflate variants
+  written at save time by persistence.finalize_shard(); missing or stale
+  variants are rebuilt on first fetch
+
+Use:
+    return send_shard(SHARDS_DIR / "00089451_default.json")
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+from flask import request, send_file
+
+from . import manifest
+from .persistence import variant_path, write_encoded_variants
+
+# server preference when the client accepts several encodings equally
+_PREFERENCE = ("gzip", "deflate")
+
+
+def _negotiate() -> Optional[str]:
+    accepted = request.accept_encodings
+    best, best_q = None, 0.0
+    for encoding in _PREFERENCE:
+        q = accepted[encoding]
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _variant(path: Path, encoding: str) -> Path:
+    vpath = variant_path(path, encoding)
+    try:
+        stale = vpath.stat().st_mtime < path.stat().st_mtime
+    except FileNotFoundError:
+        stale = True
+    if stale:
+        write_encoded_variants(path)
+    return vpath
+
+
+def send_shard(path: Path, max_age: int = 0):
+    """Conditional, range-aware, encoding-negotiated response for a shard file."""
+    path = Path(path)
+    entry = manifest.fresh_entry(path)
+    digest = entry["hash"]
+
+    # byte ranges only make sense against the identity representation
+    encoding = None if request.range is not None else _negotiate()
+    if encoding is None:
+        resp = send_file(path, mimetype="application/json", etag=digest, conditional=True, max_age=max_age)
+    else:
+        resp = send_file(
+            _variant(path, encoding),
+            mimetype="application/json",
+            etag=f"{digest}-{encoding}",
+            conditional=True,
+            max_age=max_age,
+        )
+        resp.headers["Content-Encoding"] = encoding
+    resp.vary.add("Accept-Encoding")
+    return resp
+
@@ -11,6 +11,10 @@ import hashlib, json, random, re
 from .schemas import PlanRequest
 from .registry import Registry, overrides_hash_sha1
 from . import generator_v2 as gen
+from .debug_sink import DebugSink
+from . import manifest
+from .delivery import send_shard
+from .persistence import finalize_shard
 
 # --- v1 + misc deps moved from api.py ---
 from shard_gen import generate_shard_from_registry, save_shard
@@ -44,9 +48,11 @@ for p in (SHARDS_DIR, DEBUG_DIR, API_DIR):
 def _iso_now() -> str:
     return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
 
+# sampled, size-capped, ring-buffered; written off the request thread
+DEBUG_SINK = DebugSink(DEBUG_DIR)
+
 def log_json(name: str, data: dict):
-    ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    (DEBUG_DIR / f"{name}-{ts}.json").write_text(json.dumps(data, indent=2))
+    DEBUG_SINK.submit(name, data)
 
 def deep_merge(base: dict, patch: dict) -> dict:
     if not isinstance(base, dict):
@@ -228,6 +234,7 @@ def generate_endpoint():
             biome_doc=biome_doc,
             seed=seed,
             diff={"merge": "right_biased", "overrides_hash": overrides_hash_sha1(overrides_dict)},
+            poi_tables={pid: reg.get_poi(pid) for pid in (effective.get("poi") or {}).get("tables", []) if pid in reg.list_poi()},
         )
     except Exception as e:
         return jsonify({"ok": False, "error": f"generate error: {e}"}), 500
@@ -260,17 +267,10 @@ WORLD_REGISTRY = {
     },
 }
 
-SEED_PREFIX_RE = re.compile(r"^(\d{8})_")
 SAFE_NAME      = re.compile(r"^[A-Za-z0-9_\-]+$")
 
 def _existing_seed_ids() -> set[int]:
-    ids = set()
-    for p in SHARDS_DIR.glob("*.json"):
-        m = SEED_PREFIX_RE.match(p.name)
-        if m:
-            try: ids.add(int(m.group(1)))
-            except ValueError: pass
-    return ids
+    return manifest.seed_ids(SHARDS_DIR)
 
 def _unique_seed_id() -> int:
     used = _existing_seed_ids()
@@ -285,13 +285,7 @@ def api_registry():
 
 @api_bp.route("/shards", methods=["GET"])
 def list_shards():
-    items = []
-    for p in sorted(SHARDS_DIR.glob("*.json")):
-        try:
-            data = json.loads(p.read_text())
-            items.append({"file": p.name, "path": f"/static/public/shards/{p.name}", "meta": data.get("meta", {})})
-        except Exception:
-            items.append({"file": p.name, "path": f"/static/public/shards/{p.name}", "meta": {}})
+    items = [{"file": e["file"], "path": e["path"], "meta": e.get("meta") or {}} for e in manifest.load_manifest(SHARDS_DIR)]
     return jsonify(items)
 
 @api_bp.route("/shards/<name>", methods=["GET"])
@@ -300,7 +294,7 @@ def get_shard(name: str):
     path = SHARDS_DIR / f"{safe}.json"
     if not path.exists():
         abort(404, description=f"Shard '{safe}' not found")
-    return send_from_directory(path.parent, path.name, mimetype="application/json")
+    return send_shard(path)
 
 #ROUTE TO TEMPLATE TIERS
 @bp.route("/tiers", methods=["GET"])
@@ -365,6 +359,7 @@ def generate_shard():
         shard.meta.seed = int(seed_id)
 
         out = save_shard(shard, SHARDS_DIR)
+        finalize_shard(out)
         meta = shard.meta.__dict__ | {"seedId": int(seed_id), "template": template}
         return jsonify({"ok": True, "file": out.name, "path": f"/static/public/shards/{out.name}", "meta": meta})
     except KeyError:
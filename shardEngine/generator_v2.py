@@ -5,10 +5,14 @@ from typing import Any, Dict, List, Tuple, Optional
 import math
 
 from .schemas import PlanRequest
-from .registry import overrides_hash_sha1
+from .registry import Registry, RegistryError, overrides_hash_sha1
 from .rng import KeyedRNG
 from .persistence import save_shard_v2
 from .hydrology import generate_hydrology
+from .climate import classify, load_table, moisture_field
+from .erosion import erode, resolve as resolve_erosion
+from .resources import bake as bake_resources
+from .poi import place_pois
 
 Coord = Tuple[int, int]
 
@@ -115,6 +119,21 @@ def _fbm(rng: KeyedRNG, base_ns: str, x: float, y: float, octaves: int, lacunari
         amp *= gain
     return max(-1.0, min(1.0, total))
 
+def _load_poi_tables(ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    # callers without a registry at hand (CLI, tests) read the bundled templates
+    reg = Registry()
+    try:
+        reg.load_all()
+    except RegistryError:
+        return {}
+    out: Dict[str, Dict[str, Any]] = {}
+    for pid in ids:
+        try:
+            out[pid] = reg.get_poi(pid)
+        except RegistryError:
+            continue
+    return out
+
 # ---------- PLAN ----------
 
 def plan(
@@ -156,6 +175,11 @@ def plan(
             "settlements": {"requested": True},
             "roads": {"requested": True},
             "elevation": {"provided": True},
+            "poi": {
+                "budget": int((merged_tier.get("poi") or {}).get("budget", 0)),
+                "min_spacing": int((merged_tier.get("poi") or {}).get("min_spacing", 3)),
+                "tables": list((merged_tier.get("poi") or {}).get("tables") or []),
+            },
         },
         "wouldWrite": {"name": would_name, "path": would_path},
         "compat": {"v1_like_sites": True},
@@ -172,6 +196,7 @@ def generate(
     biome_doc: Any,
     seed: int,
     diff: Optional[Dict[str, Any]] = None,
+    poi_tables: Optional[Dict[str, Dict[str, Any]]] = None,
     **_ignored,
 ) -> Dict[str, Any]:
     rng = KeyedRNG(seed)
@@ -192,6 +217,7 @@ def generate(
     lacunarity = float(noise_cfg.get("lacunarity", 2.0))
     gain       = float(noise_cfg.get("gain", 0.5))
     smooth_it  = int(noise_cfg.get("smooth_iters", 1))
+    erosion    = resolve_erosion(noise_cfg.get("erosion"))
 
     # --- coast width
     water_cfg = merged_tier.get("water", {}) or {}
@@ -256,6 +282,11 @@ def generate(
                 new[y][x] = s / cnt
         elev = new
 
+    # optional erosion (thermal + hydraulic) on the flat heightmap; output stays 0..1
+    if erosion is not None:
+        flat = erode([v for row in elev for v in row], w, h, rng.with_namespace("erosion"), erosion)
+        elev = [flat[y * w:(y + 1) * w] for y in range(h)]
+
     # choose sea level by binary search to hit target land ratio
     def land_ratio_at(thr: float) -> float:
         land = 0
@@ -309,29 +340,6 @@ def generate(
                 if make_coast:
                     grid[y][x] = _choose_coast_biome(rng, f"coast.{x}.{y}", coast_entries)
 
-    # interior variety by elevation + jitter
-    # thresholds relative to land heights within [sea_level..1]
-    def land_norm(v: float) -> float:
-        return 0.0 if v < sea_level else (v - sea_level) / max(1e-6, 1.0 - sea_level)
-
-    for y in range(h):
-        for x in range(w):
-            b = grid[y][x]
-            if b == "plains":
-                z = land_norm(elev[y][x])  # 0 lowland .. 1 high
-                j = (rng.randf(f"bio.jit.{x}.{y}") - 0.5) * 0.10
-                z2 = max(0.0, min(1.0, z + j))
-                if z2 > 0.80:
-                    grid[y][x] = "mountains"
-                elif z2 > 0.55:
-                    grid[y][x] = "hills"
-                else:
-                    # sprinkle forests & marsh-lite in lowlands
-                    if rng.randf(f"forest.jit.{x}.{y}") < 0.28:
-                        grid[y][x] = "forest"
-                    elif rng.randf(f"marsh.jit.{x}.{y}") < 0.05:
-                        grid[y][x] = "marsh-lite"
-
     # ---------- hydrology ----------
     land_tiles = sum(1 for y in range(h) for x in range(w) if grid[y][x] != "ocean" and "coast" not in grid[y][x])
     area_scale = math.sqrt(max(1, land_tiles))
@@ -349,6 +357,50 @@ def generate(
     lakes  = [{"tiles": [[x, y] for (x, y) in blob]} for blob in hydro.get("lakes", [])]
     river_tiles = {(x, y) for path in rivers for (x, y) in path}
 
+    # ---------- climate: moisture + interior classification ----------
+    # interior land is still "plains" here; hydrology only reads water tags
+    def land_norm(v: float) -> float:
+        return 0.0 if v < sea_level else (v - sea_level) / max(1e-6, 1.0 - sea_level)
+
+    moisture = moisture_field(
+        grid,
+        rng.with_namespace("climate"),
+        rivers=hydro.get("rivers", []),
+        lakes=hydro.get("lakes", []),
+    )
+    class_table = load_table(getattr(biome_doc, "data", None))
+    if class_table is not None:
+        biomes = classify(
+            [land_norm(v) for row in elev for v in row],
+            moisture,
+            class_table,
+            mask=(b == "plains" for row in grid for b in row),
+        )
+        for y in range(h):
+            row = grid[y]
+            for x, b in enumerate(biomes[y * w:(y + 1) * w]):
+                if b is not None:
+                    row[x] = b
+    else:
+        # legacy: elevation thresholds + per-tile hashed jitter
+        for y in range(h):
+            for x in range(w):
+                b = grid[y][x]
+                if b == "plains":
+                    z = land_norm(elev[y][x])  # 0 lowland .. 1 high
+                    j = (rng.randf(f"bio.jit.{x}.{y}") - 0.5) * 0.10
+                    z2 = max(0.0, min(1.0, z + j))
+                    if z2 > 0.80:
+                        grid[y][x] = "mountains"
+                    elif z2 > 0.55:
+                        grid[y][x] = "hills"
+                    else:
+                        # sprinkle forests & marsh-lite in lowlands
+                        if rng.randf(f"forest.jit.{x}.{y}") < 0.28:
+                            grid[y][x] = "forest"
+                        elif rng.randf(f"marsh.jit.{x}.{y}") < 0.05:
+                            grid[y][x] = "marsh-lite"
+
     # ---------- ports (coast land, favor coves & river mouths) ----------
     def is_ocean(x: int, y: int) -> bool:
         return _inb(x, y, w, h) and grid[y][x] == "ocean"
@@ -536,6 +588,23 @@ def generate(
             tags.append("river_mouth")
         sites.append({"type": "port", "x": x, "y": y, "tags": tags})
 
+    # ---------- points of interest (blue-noise candidates + poi tables) ----------
+    poi_cfg = merged_tier.get("poi") or {}
+    if poi_tables is None and poi_cfg.get("tables"):
+        poi_tables = _load_poi_tables(poi_cfg["tables"])
+    poi_sites, poi_summary = place_pois(
+        grid,
+        poi_tables or {},
+        poi_cfg,
+        rng.with_namespace("poi"),
+        rivers=hydro.get("rivers", []),
+        lakes=hydro.get("lakes", []),
+        roads=roads,
+        bridges=bridges,
+        occupied=[(s["x"], s["y"]) for s in sites],
+    )
+    sites.extend(poi_sites)
+
     # pack elevation as a small integer grid for tooltips
     # scale to 0..100 (sea_level noted)
     elev_scaled = [[int(round(v * 100.0)) for v in row] for row in elev]
@@ -550,6 +619,7 @@ def generate(
         },
         "roads": {"paths": roads, "bridges": bridges},
         "elevation": elev_scaled,
+        "moisture": [[int(round(m * 100.0)) for m in moisture[y * w:(y + 1) * w]] for y in range(h)],
         "world": {
             "type": world_type,
             "landmass_ratio": land_target,
@@ -558,6 +628,24 @@ def generate(
         },
     }
 
+    if erosion is not None:
+        layers["world"]["noise"]["erosion"] = erosion
+    if poi_cfg:
+        layers["poi"] = poi_summary
+
+    # resource potentials for the room roller (tier "resources" block)
+    resources_cfg = merged_tier.get("resources") or {}
+    if resources_cfg.get("potentials"):
+        layers["resources"] = bake_resources(
+            grid,
+            [land_norm(v) for row in elev for v in row],
+            moisture,
+            hydro.get("rivers", []),
+            hydro.get("lakes", []),
+            rng.with_namespace("resources"),
+            resources_cfg,
+        )
+
     # NEW: movement layer derived from grid (standardize on grid as canonical biomes)
     # All ocean cells are blocked for land movement and require a boat for traversal.
     ocean_cells = [[x, y] for y in range(h) for x in range(w) if grid[y][x] == "ocean"]
@@ -15,14 +15,55 @@ def radial_island_mask(w, h, falloff=1.8):
     mask.append(row)
   return mask
 
+def land_threshold(mask, w, h, percent):
+  """
+  vals[int((1-percent)*n)] of the sorted mask values, without sorting them.
+  The radial mask only falls as the integer squared distance
+  d2 = (2x-(w-1))^2 + (2y-(h-1))^2 grows, and per row the cells with d2 <= T
+  form one x-interval, so bucket sizes are counted row by row with isqrt.
+  Binary search finds the d2 bucket holding the k-th value; only that bucket
+  (at most two cells per row) is sorted.
+  """
+  k = int((1-percent)*(w*h))
+  if not 0 <= k < w*h:
+    raise IndexError("landmass percent out of range")
+  dys = [(2*y-(h-1))**2 for y in range(h)]
+
+  def row_le(r2):
+    # cells in a row with (2x-(w-1))^2 <= r2
+    if r2 < 0: return 0
+    r = math.isqrt(r2)
+    lo, hi = max(0, -(-(w-1-r)//2)), min(w-1, (w-1+r)//2)
+    return max(0, hi-lo+1)
+
+  def farther(t):
+    # cells with d2 > t, i.e. mask values at or below the bucket's
+    return sum(w - row_le(t-dy) for dy in dys)
+
+  lo, hi = 0, (w-1)**2 + (h-1)**2
+  while lo < hi:  # largest t with farther(t-1) > k
+    mid = (lo+hi+1)//2
+    if farther(mid-1) > k: lo = mid
+    else: hi = mid-1
+  seen = farther(lo)
+  vals = []
+  for y, dy in enumerate(dys):
+    r2 = lo-dy
+    if r2 < 0: continue
+    r = math.isqrt(r2)
+    if r*r != r2 or (w-1-r) % 2: continue
+    for x in {(w-1-r)//2, (w-1+r)//2}:
+      if 0 <= x < w: vals.append(mask[y][x])
+  vals.sort()
+  return vals[k-seen]
+
 def generate(cfg) -> dict:
   w,h = cfg.size
   rnd = random.Random(cfg.seed)
 
   mask = radial_island_mask(w,h,cfg.landmass.falloff)
   # pick land threshold to hit target land %
-  vals = sorted(v for row in mask for v in row)
-  thresh = vals[int((1-cfg.landmass.percent)*len(vals))]
+  thresh = land_threshold(mask, w, h, cfg.landmass.percent)
   grid = []
   for y in range(h):
     row=[]
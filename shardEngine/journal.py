@@ -0,0 +1,316 @@
+"""
+Shard Engine v2 - Shard edit journal
+------------------------------------
+
+Delta edits for the shard editor. Instead of PUTting the whole shard, the
+editor PATCHes small batches of operations; each batch is appended as one line
+to "<file>.journal.jsonl" and the base file is only rewritten when the journal
+is compacted (every COMPACT_BATCHES batches / COMPACT_BYTES, or before the
+shard is read through the API).
+
+Operations (coordinates are tile x/y):
+
+    {"op": "set_tiles",  "tiles": [{"x": 1, "y": 2, "biome": "forest"}, ...]}
+    {"op": "add_poi",    "poi": {"type": "ruin", "x": 3, "y": 4, ...}, "index"?: int}
+                         # without index the poi is appended and given an id;
+                         # undo of remove_poi adds "restore": {list: {index, poi}}
+    {"op": "remove_poi", "id": "poi_..."}            # or "x"/"y"(/"type")
+    {"op": "edit_road",  "index": i, "path": [[x, y], ...] | null, "insert"?: bool}
+                         # replace road i; index == len appends; path null deletes
+
+apply_ops() returns the inverse batch, so undo is just PATCHing the inverse
+back. Every journal line records the content hash of the base file it applies
+to; after a compaction (or a full PUT) older lines no longer match and are
+dropped instead of being replayed twice.
+
+Journal line:
+    {"seq": 3, "base": "<sha256>", "ops": [...], "inverse": [...], "ts": 1700000000.0}
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import manifest
+
+SUFFIX = ".journal.jsonl"
+COMPACT_BATCHES = 64
+COMPACT_BYTES = 1 << 20
+
+_LOCK = threading.RLock()
+# shard path -> ((base mtime_ns, journal size), materialized data, next seq, pending batches)
+_STATE: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any], int, int]] = {}
+
+
+class JournalError(ValueError):
+    ...
+
+
+def journal_path(path: Path) -> Path:
+    return Path(path).with_name(Path(path).name + SUFFIX)
+
+
+# -------- Operations ----------------------------------------------------------
+
+def _dims(data: Dict[str, Any]) -> Tuple[int, int]:
+    grid = data.get("grid") if isinstance(data.get("grid"), list) else data.get("tiles")
+    if not isinstance(grid, list) or not grid:
+        raise JournalError("shard has no grid/tiles")
+    return len(grid[0]), len(grid)
+
+def _xy(obj: Dict[str, Any], w: int, h: int) -> Tuple[int, int]:
+    try:
+        x, y = int(obj["x"]), int(obj["y"])
+    except (KeyError, TypeError, ValueError):
+        raise JournalError("x/y required")
+    if not (0 <= x < w and 0 <= y < h):
+        raise JournalError(f"tile {x},{y} out of bounds")
+    return x, y
+
+def _poi_lists(data: Dict[str, Any]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    # v2 sites are canonical; legacy pois are kept in step when present
+    lists = [(k, data[k]) for k in ("sites", "pois") if isinstance(data.get(k), list)]
+    if not lists:
+        data["sites"] = []
+        lists = [("sites", data["sites"])]
+    return lists
+
+def _find_poi(items: List[Dict[str, Any]], op: Dict[str, Any]) -> Optional[int]:
+    for i, p in enumerate(items):
+        if "id" in op:
+            if p.get("id") == op["id"]:
+                return i
+        elif p.get("x") == op.get("x") and p.get("y") == op.get("y") and op.get("type") in (None, p.get("type")):
+            return i
+    return None
+
+def _set_tiles(data: Dict[str, Any], op: Dict[str, Any]) -> Dict[str, Any]:
+    w, h = _dims(data)
+    grid = data.get("grid") if isinstance(data.get("grid"), list) else None
+    tiles = data.get("tiles") if isinstance(data.get("tiles"), list) else None
+    edits = []
+    for t in op.get("tiles") or []:
+        if not isinstance(t, dict):
+            raise JournalError("set_tiles: tile objects required")
+        x, y = _xy(t, w, h)
+        biome = t.get("biome", t.get("tile"))
+        if not isinstance(biome, str) or not biome:
+            raise JournalError(f"tile {x},{y}: biome required")
+        edits.append((x, y, biome))
+    old = []
+    for x, y, biome in edits:
+        if grid is not None:
+            prev = grid[y][x]
+            grid[y][x] = biome
+        if tiles is not None:
+            cell = tiles[y][x]
+            if grid is None:
+                prev = cell.get("biome", cell.get("tile"))
+            for key in [k for k in ("biome", "tile") if k in cell] or ["tile"]:
+                cell[key] = biome
+        old.append({"x": x, "y": y, "biome": prev})
+    return {"op": "set_tiles", "tiles": old[::-1]}
+
+def _add_poi(data: Dict[str, Any], op: Dict[str, Any], seq: int, n: int) -> Dict[str, Any]:
+    w, h = _dims(data)
+    poi = op.get("poi")
+    if not isinstance(poi, dict):
+        raise JournalError("add_poi: poi object required")
+    _xy(poi, w, h)
+    poi = dict(poi)
+    index = op.get("index")
+    restore = op.get("restore") or {}
+    if index is None and not restore:
+        # fresh placements get an id; restores (undo of remove_poi) go back verbatim
+        poi.setdefault("id", f"poi_{seq}_{n}")
+        op["poi"] = poi  # journal records the assigned id
+    inserts = []
+    for key, items in _poi_lists(data):
+        at, obj = index, poi
+        if key in restore:
+            at, obj = restore[key]["index"], restore[key]["poi"]
+        try:
+            at = len(items) if at is None else max(0, min(len(items), int(at)))
+        except (TypeError, ValueError):
+            raise JournalError(f"add_poi: bad index {at!r}")
+        inserts.append((items, at, obj))
+    for items, at, obj in inserts:
+        items.insert(at, copy.deepcopy(obj))
+    if "id" in poi:
+        return {"op": "remove_poi", "id": poi["id"]}
+    return {"op": "remove_poi", "x": poi["x"], "y": poi["y"], "type": poi.get("type")}
+
+def _remove_poi(data: Dict[str, Any], op: Dict[str, Any]) -> Dict[str, Any]:
+    found = [(key, items, _find_poi(items, op)) for key, items in _poi_lists(data)]
+    restore = {key: {"index": i, "poi": items.pop(i)} for key, items, i in found if i is not None}
+    if not restore:
+        raise JournalError("remove_poi: no matching poi")
+    first = next(iter(restore.values()))
+    return {"op": "add_poi", "poi": first["poi"], "index": first["index"], "restore": restore}
+
+def _edit_road(data: Dict[str, Any], op: Dict[str, Any]) -> Dict[str, Any]:
+    w, h = _dims(data)
+    try:
+        index = int(op["index"])
+    except (KeyError, TypeError, ValueError):
+        raise JournalError("edit_road: index required")
+    path = op.get("path")
+    if path is not None:
+        try:
+            path = [[int(p[0]), int(p[1])] for p in path]
+        except (IndexError, TypeError, ValueError):
+            raise JournalError("edit_road: path of [x, y] points required")
+        for x, y in path:
+            _xy({"x": x, "y": y}, w, h)
+    roads = data.setdefault("layers", {}).setdefault("roads", {})
+    paths = roads.setdefault("paths", [])
+
+    if op.get("insert") or index == len(paths):
+        if path is None or not 0 <= index <= len(paths):
+            raise JournalError("edit_road: bad insert")
+        paths.insert(index, path)
+        return {"op": "edit_road", "index": index, "path": None}
+    if not 0 <= index < len(paths):
+        raise JournalError(f"edit_road: no road {index}")
+    old = paths[index]
+    if path is None:
+        del paths[index]
+        return {"op": "edit_road", "index": index, "path": old, "insert": True}
+    paths[index] = path
+    return {"op": "edit_road", "index": index, "path": old}
+
+def _apply(data: Dict[str, Any], op: Any, seq: int, n: int) -> Dict[str, Any]:
+    # each op validates its input before it mutates anything
+    kind = op.get("op") if isinstance(op, dict) else None
+    try:
+        if kind == "set_tiles":
+            return _set_tiles(data, op)
+        if kind == "add_poi":
+            return _add_poi(data, op, seq, n)
+        if kind == "remove_poi":
+            return _remove_poi(data, op)
+        if kind == "edit_road":
+            return _edit_road(data, op)
+    except JournalError:
+        raise
+    except Exception as ex:
+        raise JournalError(f"op {n} ({kind}): malformed: {ex}") from ex
+    raise JournalError(f"unknown op {kind!r}")
+
+def apply_ops(data: Dict[str, Any], ops: List[Dict[str, Any]], seq: int = 0) -> List[Dict[str, Any]]:
+    """
+    Apply a batch in place and return its inverse batch. If an op fails
+    (malformed ones included, reported as JournalError) the ops already
+    applied are undone with their inverses, so `data` is left untouched.
+    """
+    if not isinstance(ops, list) or not ops:
+        raise JournalError("ops list required")
+    inverse: List[Dict[str, Any]] = []
+    try:
+        for n, op in enumerate(ops):
+            inverse.append(_apply(data, op, seq, n))
+    except JournalError:
+        for n, op in enumerate(reversed(inverse)):
+            _apply(data, op, seq, n)
+        raise
+    return inverse[::-1]
+
+
+# -------- Journal -------------------------------------------------------------
+
+def _key(path: Path) -> Tuple[int, int]:
+    jp = journal_path(path)
+    return path.stat().st_mtime_ns, jp.stat().st_size if jp.exists() else 0
+
+def _read_lines(path: Path) -> List[Dict[str, Any]]:
+    jp = journal_path(path)
+    if not jp.exists():
+        return []
+    out = []
+    with jp.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    break  # torn tail from a crash mid-append
+    return out
+
+def _load(path: Path) -> Tuple[Dict[str, Any], int, int]:
+    """Materialized shard (base + matching journal batches), the next seq and the pending batch count."""
+    cached = _STATE.get(path)
+    key = _key(path)
+    if cached and cached[0] == key:
+        return cached[1], cached[2], cached[3]
+    with path.open("r", encoding="utf-8-sig") as f:
+        data = json.load(f)
+    base = manifest.fresh_entry(path)["hash"]
+    seq = batches = 0
+    lines = _read_lines(path)
+    for entry in lines:
+        if entry.get("base") == base:
+            apply_ops(data, entry["ops"])  # the parsed line is not kept, so ops may be consumed
+            seq = int(entry.get("seq", seq)) + 1
+            batches += 1
+    if lines and seq == 0:
+        discard(path)  # written against an older base
+        key = _key(path)
+    _STATE[path] = (key, data, seq, batches)
+    return data, seq, batches
+
+def pending(path: Path) -> int:
+    """Number of journal batches not yet compacted into the base file."""
+    with _LOCK:
+        return _load(Path(path))[2]
+
+def patch(path: Path, ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply + journal one batch; compacts when the journal grows past the thresholds."""
+    path = Path(path)
+    with _LOCK:
+        data, seq, batches = _load(path)
+        ops = copy.deepcopy(ops)
+        inverse = apply_ops(data, ops, seq)
+        base = manifest.fresh_entry(path)["hash"]
+        line = json.dumps({"seq": seq, "base": base, "ops": ops, "inverse": inverse, "ts": time.time()},
+                          separators=(",", ":"))
+        jp = journal_path(path)
+        with jp.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        batches += 1
+        _STATE[path] = (_key(path), data, seq + 1, batches)
+
+        compacted = batches >= COMPACT_BATCHES or jp.stat().st_size >= COMPACT_BYTES
+        if compacted:
+            compact(path)
+        return {"seq": seq, "inverse": inverse, "pending": 0 if compacted else batches, "compacted": compacted}
+
+def compact(path: Path) -> bool:
+    """Fold pending batches into the base file (atomic write + finalize). Returns False if nothing was pending."""
+    from .persistence import _atomic_write, finalize_shard
+
+    path = Path(path)
+    with _LOCK:
+        if not journal_path(path).exists():
+            return False
+        data, _, _ = _load(path)
+        if not journal_path(path).exists():  # _load dropped a stale journal
+            return False
+        _atomic_write(path, json.dumps(data, separators=(",", ":")))
+        meta = data.get("meta") if isinstance(data.get("meta"), dict) else {}
+        finalize_shard(path, meta=meta, payload=data)
+        discard(path)
+        _STATE[path] = (_key(path), data, 0, 0)
+        return True
+
+def discard(path: Path) -> None:
+    """Drop the journal (full rewrites such as PUT supersede it)."""
+    path = Path(path)
+    with _LOCK:
+        journal_path(path).unlink(missing_ok=True)
+        _STATE.pop(path, None)
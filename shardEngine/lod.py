@@ -0,0 +1,102 @@
+# /app/shardEngine/lod.py
+"""
+Shard Engine v2 - LOD pyramids
+------------------------------
+
+Downsampled copies of the raster layers for zoomed-out viewers. They are
+derived data: the chunk sidecar (chunks.py) builds them from the current
+grid/elevation and serves them, nothing is stored in the shard itself.
+
+    {"levels": [
+      {"factor": 2, "width": 128, "height": 96,
+       "elevation": [[int, ...], ...],                       # block mean
+       "grid": {"palette": [biome, ...], "rows": [[i, ...], ...]}},   # block majority
+      ...
+    ]}
+
+Level `f` covers f x f source tiles per cell; edge blocks that run past the
+map only average / vote over the tiles that exist. Majority ties go to the
+biome seen first in the block (row-major), so output is deterministic.
+
+A level is only emitted while the previous one is still wider or taller than
+one chunk; a shard that already fits a single chunk gets no pyramid.
+
+Reductions work on whole row slices: elevation sums are `sum()` over each
+block's slice of a row followed by a column-wise `map(add, ...)` over the
+band, and votes count a block's palette codes in one `Counter` call.
+"""
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from operator import add
+from typing import Any, Dict, List, Optional, Sequence
+
+FACTORS = (2, 4, 8)
+
+
+def _dims(width: int, height: int, f: int):
+    return -(-width // f), -(-height // f)
+
+
+def downsample_elevation(elev: Sequence[Sequence[int]], f: int) -> List[List[int]]:
+    """Mean of each f x f block, rounded to int."""
+    h = len(elev); w = len(elev[0]) if h else 0
+    starts = range(0, w, f)
+    widths = [min(f, w - x) for x in starts]
+    out: List[List[int]] = []
+    for y in range(0, h, f):
+        band = elev[y:y + f]
+        first = band[0]
+        sums = [sum(first[x:x + f]) for x in starts]
+        for row in band[1:]:
+            sums = list(map(add, sums, (sum(row[x:x + f]) for x in starts)))
+        n = len(band)
+        out.append([int(round(s / (bw * n))) for s, bw in zip(sums, widths)])
+    return out
+
+
+def downsample_grid(grid: Sequence[Sequence[str]], f: int) -> Dict[str, Any]:
+    """Majority biome of each f x f block as {"palette", "rows"} (palette in first-seen order)."""
+    palette: Dict[str, int] = {}
+    codes = [array("H", [palette.setdefault(cell, len(palette)) for cell in row]) for row in grid]
+    names = list(palette)
+    h = len(codes); w = len(codes[0]) if h else 0
+    out_pal: Dict[str, int] = {}
+    rows: List[List[int]] = []
+    for y in range(0, h, f):
+        band = codes[y:y + f]
+        out_row: List[int] = []
+        for x in range(0, w, f):
+            block = array("H")
+            for row in band:
+                block.extend(row[x:x + f])
+            code = Counter(block).most_common(1)[0][0]
+            out_row.append(out_pal.setdefault(names[code], len(out_pal)))
+        rows.append(out_row)
+    return {"palette": list(out_pal), "rows": rows}
+
+
+def build_lod(
+    grid: Sequence[Sequence[str]],
+    elevation: Optional[Sequence[Sequence[int]]] = None,
+    *,
+    chunk: int = 32,
+    factors: Sequence[int] = FACTORS,
+) -> Optional[Dict[str, Any]]:
+    """The LOD pyramid of a shard, or None if the map already fits one chunk."""
+    h = len(grid); w = len(grid[0]) if h else 0
+    levels: List[Dict[str, Any]] = []
+    prev = 1
+    for f in factors:
+        pw, ph = _dims(w, h, prev)
+        if max(pw, ph) <= chunk:
+            break
+        lw, lh = _dims(w, h, f)
+        level: Dict[str, Any] = {"factor": f, "width": lw, "height": lh, "grid": downsample_grid(grid, f)}
+        if elevation:
+            level["elevation"] = downsample_elevation(elevation, f)
+        levels.append(level)
+        prev = f
+    return {"levels": levels} if levels else None
+
@@ -0,0 +1,203 @@
+"""
+Shard Engine v2 - Shard manifest index
+--------------------------------------
+
+Maintains <shards_dir>/manifest.json as the index of saved shards so listing
+endpoints and seed-id allocation never have to glob + parse every shard file.
+
+The manifest stays a JSON array (the viewer's fallback loader reads it with
+Array.isArray); each entry is:
+
+    {"file": "<name>.json", "path": "/static/public/shards/<name>.json",
+     "meta": {...}, "size": <bytes>, "hash": "<sha256 hex>", "mtime": <epoch>}
+
+Writers (save_shard_v2, put_shard, the legacy generate path) call
+persistence.finalize_shard() -> record_shard() after their atomic write; the
+manifest itself is replaced
+atomically too. rebuild_manifest() re-derives it from disk (see shard_cli.py).
+Readers go through load_manifest(), which caches the parsed index until the
+manifest file changes. Writers take an advisory file lock (".manifest.lock",
+POSIX only) on top of the in-process lock and re-read the manifest from disk
+under it, so workers in other processes do not drop each other's entries.
+
+manifest.json is generated (it records local mtimes) and is not committed; a
+missing one is rebuilt from the shard files on first load.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".manifest.lock"
+SEED_PREFIX_RE = re.compile(r"^(\d{8})_")
+
+_LOCK = threading.RLock()
+_HELD: Set[Path] = set()  # lock files this process holds (only touched under _LOCK)
+# shards_dir -> ((mtime_ns, size), entries)
+_CACHE: Dict[Path, Tuple[Tuple[int, int], List[Dict[str, Any]]]] = {}
+
+
+# -------- Helpers -------------------------------------------------------------
+
+def manifest_path(shards_dir: Path) -> Path:
+    return Path(shards_dir) / MANIFEST_NAME
+
+def file_digest(path: Path, chunk_size: int = 1 << 16) -> str:
+    """sha256 hex of a file, read in chunks (content hash used as the shard's identity)."""
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _is_shard_file(path: Path) -> bool:
+    return path.suffix == ".json" and path.name != MANIFEST_NAME and not path.name.startswith(".")
+
+def build_entry(path: Path, meta: Optional[Dict[str, Any]], digest: Optional[str] = None) -> Dict[str, Any]:
+    st = path.stat()
+    return {
+        "file": path.name,
+        "path": f"/static/public/shards/{path.name}",
+        "meta": meta or {},
+        "size": st.st_size,
+        "hash": digest or file_digest(path),
+        "mtime": st.st_mtime,
+    }
+
+def read_meta(path: Path) -> Dict[str, Any]:
+    try:
+        with path.open("r", encoding="utf-8-sig") as f:
+            data = json.load(f)
+        meta = data.get("meta") if isinstance(data, dict) else None
+        return meta if isinstance(meta, dict) else {}
+    except Exception:
+        return {}
+
+@contextlib.contextmanager
+def _locked(shards_dir: Path):
+    """In-process lock plus an exclusive lock file shared with other processes (reentrant)."""
+    with _LOCK:
+        lock_path = Path(shards_dir) / LOCK_NAME
+        if fcntl is None or lock_path in _HELD:
+            yield
+            return
+        with lock_path.open("a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            _HELD.add(lock_path)
+            try:
+                yield
+            finally:
+                _HELD.discard(lock_path)
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+def _read_entries(shards_dir: Path) -> Optional[List[Dict[str, Any]]]:
+    # bypasses _CACHE: writers must see entries other processes just wrote
+    try:
+        entries = json.loads(manifest_path(shards_dir).read_text(encoding="utf-8-sig"))
+    except Exception:
+        return None
+    if not isinstance(entries, list) or not all(isinstance(e, dict) and "file" in e for e in entries):
+        return None
+    return entries
+
+def _write(shards_dir: Path, entries: List[Dict[str, Any]]) -> None:
+    from .persistence import _atomic_write  # local import: persistence records into the manifest
+
+    entries = sorted(entries, key=lambda e: e["file"])
+    path = manifest_path(shards_dir)
+    _atomic_write(path, json.dumps(entries, separators=(",", ":")))
+    st = path.stat()
+    _CACHE[Path(shards_dir)] = ((st.st_mtime_ns, st.st_size), entries)
+
+
+# -------- Public API ----------------------------------------------------------
+
+def rebuild_manifest(shards_dir: Path) -> List[Dict[str, Any]]:
+    """Re-index every shard file in shards_dir (parses each file once)."""
+    shards_dir = Path(shards_dir)
+    with _locked(shards_dir):
+        entries = [build_entry(p, read_meta(p)) for p in sorted(shards_dir.glob("*.json")) if _is_shard_file(p)]
+        _write(shards_dir, entries)
+        return entries
+
+def load_manifest(shards_dir: Path) -> List[Dict[str, Any]]:
+    """
+    Return the manifest entries, rebuilding once if the manifest is missing or
+    still in the old list-of-paths format.
+    """
+    shards_dir = Path(shards_dir)
+    path = manifest_path(shards_dir)
+    with _LOCK:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return rebuild_manifest(shards_dir)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = _CACHE.get(shards_dir)
+        if cached and cached[0] == key:
+            return cached[1]
+        entries = _read_entries(shards_dir)
+        if entries is None:
+            return rebuild_manifest(shards_dir)
+        _CACHE[shards_dir] = (key, entries)
+        return entries
+
+def record_shard(path: Path, meta: Optional[Dict[str, Any]] = None, digest: Optional[str] = None) -> Dict[str, Any]:
+    """Insert/replace the manifest entry for a freshly written shard file."""
+    path = Path(path)
+    shards_dir = path.parent
+    with _locked(shards_dir):
+        current = _read_entries(shards_dir)
+        if current is None:
+            current = rebuild_manifest(shards_dir)
+        entries = [e for e in current if e.get("file") != path.name]
+        entry = build_entry(path, meta if meta is not None else read_meta(path), digest)
+        entries.append(entry)
+        _write(shards_dir, entries)
+        return entry
+
+def fresh_entry(path: Path) -> Dict[str, Any]:
+    """Manifest entry for path, re-recorded if the file changed behind the manifest's back."""
+    path = Path(path)
+    entry = get_entry(path.parent, path.name)
+    st = path.stat()
+    if entry is None or entry.get("size") != st.st_size or entry.get("mtime") != st.st_mtime:
+        entry = record_shard(path)
+    return entry
+
+def remove_shard(path: Path) -> bool:
+    path = Path(path)
+    with _locked(path.parent):
+        entries = _read_entries(path.parent) or []
+        kept = [e for e in entries if e.get("file") != path.name]
+        if len(kept) == len(entries):
+            return False
+        _write(path.parent, kept)
+        return True
+
+def get_entry(shards_dir: Path, file: str) -> Optional[Dict[str, Any]]:
+    for e in load_manifest(shards_dir):
+        if e.get("file") == file:
+            return e
+    return None
+
+def seed_ids(shards_dir: Path) -> Set[int]:
+    """Seed ids already taken by "<seedId>_<name>.json" files."""
+    ids: Set[int] = set()
+    for e in load_manifest(shards_dir):
+        m = SEED_PREFIX_RE.match(e.get("file", ""))
+        if m:
+            ids.add(int(m.group(1)))
+    return ids
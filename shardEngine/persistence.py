@@ -1,10 +1,10 @@
 # /app/shardEngine/persistence.py
 from __future__ import annotations
 
-import json, time, tempfile, os
+import gzip, io, json, time, tempfile, os, zlib
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, TextIO, Tuple
 
 # ---------- Errors & result ----------
 
@@ -42,10 +42,11 @@ def _grid_to_legacy_tiles(grid: List[List[str]]) -> List[List[Dict[str, str]]]:
 
 def _sites_to_legacy_pois(sites: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # legacy POIs are shallow dicts; keep v2 fields where possible
+    from .chunks import site_xy
+
     out = []
     for s in sites:
-        pos = s.get("pos") or s.get("position") or [s.get("x"), s.get("y")]
-        x, y = (int(pos[0]), int(pos[1])) if isinstance(pos, (list, tuple)) else (int(s.get("x", 0)), int(s.get("y", 0)))
+        x, y = site_xy(s) or (0, 0)
         out.append({
             "type": s.get("type", "POI"),
             "name": s.get("name", s.get("tag", "POI")),
@@ -61,9 +62,41 @@ def _validate_rect(name: str, grid: List[List[str]], w: int, h: int) -> None:
         if len(row) != w:
             raise SaveError(f"{name}: grid width mismatch (got {len(row)} vs {w})")
 
+FILE_MODE = 0o644
+
 def _atomic_write(path: Path, text: str, retries: int = 5, delay: float = 0.05) -> None:
     """
     Write text to a temp file and atomically replace the target.
+    """
+    _atomic_write_stream(path, lambda fh: fh.write(text), retries=retries, delay=delay)
+
+def _atomic_write_bytes(path: Path, data: bytes, retries: int = 5, delay: float = 0.05) -> None:
+    _atomic_write_binary(path, lambda raw: raw.write(data), retries=retries, delay=delay)
+
+def _atomic_write_stream(
+    path: Path,
+    write: Callable[[TextIO], None],
+    *,
+    retries: int = 5,
+    delay: float = 0.05,
+) -> None:
+    """
+    Stream text into a temp file and atomically replace the target.
+    """
+    def fill(raw: BinaryIO) -> None:
+        with io.TextIOWrapper(raw, encoding="utf-8") as fh:
+            write(fh)
+
+    _atomic_write_binary(path, fill, retries=retries, delay=delay)
+
+def _atomic_write_binary(
+    path: Path,
+    fill: Callable[[BinaryIO], None],
+    retries: int = 5,
+    delay: float = 0.05,
+) -> None:
+    """
+    Fill a temp file next to the target and atomically replace the target.
     Windows needs the mkstemp fd closed before we re-open/replace.
     Includes a small retry loop for transient AV/indexer locks.
     """
@@ -74,7 +107,10 @@ def _atomic_write(path: Path, text: str, retries: int = 5, delay: float = 0.05)
         os.close(fd)
 
         # Write the content
-        tmp.write_text(text, encoding="utf-8")
+        with tmp.open("wb") as raw:
+            fill(raw)
+        # mkstemp creates 0600; shards, variants and the manifest are served as static files
+        os.chmod(tmp, FILE_MODE)
 
         # Atomic replace with a few retries for transient locks
         for attempt in range(retries):
@@ -93,8 +129,130 @@ def _atomic_write(path: Path, text: str, retries: int = 5, delay: float = 0.05)
         except Exception:
             pass
 
+# ---------- Pre-encoded variants ----------
+
+# Content-Encoding -> suffix appended to the shard file name
+ENCODED_VARIANTS = {"gzip": ".gz", "deflate": ".deflate"}
+
+def variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + ENCODED_VARIANTS[encoding])
+
+def write_encoded_variants(path: Path, chunk_size: int = 1 << 16) -> Dict[str, Path]:
+    """Write <file>.gz / <file>.deflate next to a saved shard so fetches can skip compression."""
+    out: Dict[str, Path] = {}
+    for encoding in ENCODED_VARIANTS:
+        def fill(raw: BinaryIO, encoding: str = encoding) -> None:
+            if encoding == "gzip":
+                comp = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0)
+                write, finish = comp.write, comp.close
+            else:
+                z = zlib.compressobj(6)
+                write = lambda b: raw.write(z.compress(b))
+                finish = lambda: raw.write(z.flush())
+            with path.open("rb") as src:
+                for chunk in iter(lambda: src.read(chunk_size), b""):
+                    write(chunk)
+            finish()
+
+        dest = variant_path(path, encoding)
+        _atomic_write_binary(dest, fill)
+        out[encoding] = dest
+    return out
+
+# ---------- Streaming encoder ----------
+
+_COMPACT = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+SectionWriter = Callable[[TextIO], None]
+
+def _value_writer(value: Any) -> SectionWriter:
+    def write(fh: TextIO) -> None:
+        for chunk in _COMPACT.iterencode(value):
+            fh.write(chunk)
+    return write
+
+def _rows_writer(rows: Iterable[Any]) -> SectionWriter:
+    # encode a 2D array one row at a time so only a single row is ever materialized
+    def write(fh: TextIO) -> None:
+        fh.write("[")
+        for i, row in enumerate(rows):
+            if i:
+                fh.write(",")
+            fh.write(_COMPACT.encode(row))
+        fh.write("]")
+    return write
+
+def _write_object(fh: TextIO, sections: Iterable[Tuple[str, SectionWriter]]) -> None:
+    """Write a top-level JSON object section by section."""
+    fh.write("{")
+    for i, (key, write) in enumerate(sections):
+        if i:
+            fh.write(",")
+        fh.write(_COMPACT.encode(key))
+        fh.write(":")
+        write(fh)
+    fh.write("}")
+
+def _build_meta(
+    *,
+    name: str,
+    display_name: str,
+    seed: int,
+    width: int,
+    height: int,
+    meta_extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    created_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    meta = {
+        "name": name,
+        "displayName": display_name,
+        "seed": int(seed),
+        "width": int(width),
+        "height": int(height),
+        "createdAt": created_at,
+        "version": "2.0.0",
+    }
+    if meta_extra:
+        meta.update(meta_extra)
+    return meta
+
+def _is_v2_only(meta: Dict[str, Any]) -> bool:
+    # consumers that only read grid/sites can opt out of the legacy tiles/pois copies
+    return bool(meta.get("v2Only"))
+
 # ---------- Public API ----------
 
+def finalize_shard(
+    path: Path,
+    meta: Optional[Dict[str, Any]] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    record: bool = True,
+) -> Dict[str, Any]:
+    """
+    Post-save hooks for a shard file that was just written atomically:
+    pre-encoded delivery variants, manifest entry, the chunk sidecar and the
+    default thumbnail (built from `payload` when the caller still has it in
+    memory). Returns the manifest entry; record=False builds it without
+    writing manifest.json (worker processes leave that to their parent).
+    """
+    from . import chunks, manifest, thumbnails  # local import: all reuse the atomic writers
+
+    write_encoded_variants(path)
+    if record:
+        entry = manifest.record_shard(path, meta=meta)
+    else:
+        entry = manifest.build_entry(path, meta if meta is not None else manifest.read_meta(path), manifest.file_digest(path))
+    if payload is None:
+        with path.open("r", encoding="utf-8-sig") as f:
+            payload = json.load(f)
+    try:
+        chunks.build_sidecar(path, data=payload, digest=entry["hash"])
+        thumbnails.ensure_thumbnail(path, entry["hash"], data=payload)
+    except (chunks.ChunkError, ValueError):
+        pass  # nothing to chunk/render (no grid/tiles)
+    return entry
+
 def assemble_payload_v2(
     *,
     name: str,
@@ -115,18 +273,14 @@ def assemble_payload_v2(
     """
     _validate_rect("assemble_payload_v2", grid, width, height)
 
-    created_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-    meta = {
-        "name": name,
-        "displayName": display_name,
-        "seed": int(seed),
-        "width": int(width),
-        "height": int(height),
-        "createdAt": created_at,
-        "version": "2.0.0",
-    }
-    if meta_extra:
-        meta.update(meta_extra)
+    meta = _build_meta(
+        name=name,
+        display_name=display_name,
+        seed=seed,
+        width=width,
+        height=height,
+        meta_extra=meta_extra,
+    )
 
     payload = {
         "meta": meta,
@@ -156,35 +310,53 @@ def save_shard_v2(
     meta_extra: Optional[Dict[str, Any]] = None,
     legacy_tiles: Optional[List[List[Dict[str, str]]]] = None,
     legacy_pois: Optional[List[Dict[str, Any]]] = None,
+    compress: bool = False,
 ) -> SaveResult:
     """
     Save a v2 shard JSON using the v1 filename convention "<seedId>_<name>.json".
+
+    The payload is streamed section by section into the temp file with compact
+    separators; legacy tiles are encoded row by row instead of being copied up
+    front. meta_extra={"v2Only": True} drops the legacy tiles/pois sections.
+    LOD pyramids are not stored; the chunk sidecar derives them (see lod.py),
+    so a layers["lod"] passed in is dropped. compress=True returns the pre-encoded gzip variant
+    ("<seedId>_<name>.json.gz", see write_encoded_variants) instead of the
+    plain file, which is still written so the two never disagree.
     Returns SaveResult(path, name, url_path).
     """
     shards_dir = shards_dir or default_shards_dir()
     fname = _format_filename(seed, base_name)
     path = shards_dir / fname
 
-    payload = assemble_payload_v2(
+    _validate_rect("save_shard_v2", grid, width, height)
+    meta = _build_meta(
         name=fname[:-5],  # without .json, matches v1 meta.name style
         display_name=(display_name or _safe_name(base_name).replace("_", " ").title()),
         seed=seed,
         width=width,
         height=height,
-        grid=grid,
-        sites=sites,
-        layers=layers or {},
-        provenance=provenance or {},
         meta_extra=meta_extra,
-        legacy_tiles=legacy_tiles,
-        legacy_pois=legacy_pois,
     )
 
-    # final validation parity with v1 save (tiles/pois present etc.)
-    if "meta" not in payload or "grid" not in payload or "sites" not in payload:
-        raise SaveError("payload missing required sections (meta/grid/sites)")
+    layers = dict(layers or {})
+    layers.pop("lod", None)
+
+    sections: List[Tuple[str, SectionWriter]] = [("meta", _value_writer(meta))]
+    if not _is_v2_only(meta):
+        # Legacy shapes (existing UI/loader paths use these today)
+        tiles = legacy_tiles if legacy_tiles is not None else ([{"tile": cell} for cell in row] for row in grid)
+        pois = legacy_pois if legacy_pois is not None else _sites_to_legacy_pois(sites)
+        sections.append(("tiles", _rows_writer(tiles)))
+        sections.append(("pois", _value_writer(pois)))
+    # Canonical/v2
+    sections.append(("grid", _rows_writer(grid)))
+    sections.append(("sites", _value_writer(sites)))
+    sections.append(("layers", _value_writer(layers)))
+    sections.append(("provenance", _value_writer(provenance or {})))
 
-    text = json.dumps(payload, indent=2)
-    _atomic_write(path, text)
+    _atomic_write_stream(path, lambda fh: _write_object(fh, sections))
+    finalize_shard(path, meta=meta, payload={"grid": grid, "sites": sites, "layers": layers})
+    if compress:
+        path = variant_path(path, "gzip")
 
     return SaveResult(path=path, name=path.name, url_path=f"/static/public/shards/{path.name}")
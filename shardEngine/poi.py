@@ -0,0 +1,227 @@
+# /app/shardEngine/poi.py
+"""
+Shard Engine v2 - POI placement
+-------------------------------
+
+Places the tier's `poi` block ({"budget", "min_spacing", "tables"}) after
+roads are routed:
+
+1. Blue-noise candidates: Bridson's Poisson-disk sampler on the tile grid
+   (background grid of r/sqrt(2) cells, so each cell holds at most one
+   sample and every conflict check looks at a fixed 5x5 block of cells).
+   Work is O(samples * k), independent of the budget.
+2. Each table entry's "near" tag (or explicit "biomes" list) is a flat
+   bytearray mask; candidates outside every mask, or on a settlement, are
+   dropped.
+3. Candidates are visited in a seeded shuffled order and each one draws an
+   entry from the eligible table entries by weight (cumulative weights +
+   bisect), until the budget is spent.
+
+POI table entries:
+
+    {"tag": "ruin_tower", "weight": 4, "near": "forest_edge"}
+    {"tag": "cairn", "weight": 1, "biomes": ["hills", "mountains"]}
+
+Known "near" tags: forest_edge, crossroads, river, road, lake_shore, coast,
+river_crossing, ocean_headland. Unknown tags fall back to any land tile.
+"""
+from __future__ import annotations
+
+import math
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+Coord = Tuple[int, int]
+
+ATTEMPTS = 20           # Bridson candidates per active sample
+WOODED = {"forest", "taiga", "jungle"}
+SHORE = {"coast", "beach"}
+
+
+# -------- sampling --------------------------------------------------------------
+
+def poisson_disk(w: int, h: int, r: float, rnd: random.Random, attempts: int = ATTEMPTS) -> List[Coord]:
+    """Tiles at least `r` apart (Euclidean), covering the w x h grid."""
+    if w <= 0 or h <= 0:
+        return []
+    if r <= 1.0:
+        return [(x, y) for y in range(h) for x in range(w)]
+    cell = r / math.sqrt(2.0)
+    inv = 1.0 / cell
+    # background grid padded by two cells so conflict checks need no bounds tests
+    gw, gh = int(math.ceil(w * inv)) + 4, int(math.ceil(h * inv)) + 4
+    slots: List[Optional[Coord]] = [None] * (gw * gh)
+    # the 5x5 block minus its corners: corner cells are always >= r away
+    offsets = [dy * gw + dx for dy in range(-2, 3) for dx in range(-2, 3) if abs(dx) + abs(dy) < 4]
+    r2 = r * r
+    tau, cos, sin, rand = math.tau, math.cos, math.sin, rnd.random
+
+    out: List[Coord] = []
+    active: List[Coord] = []
+
+    def put(x: int, y: int, slot: int) -> None:
+        slots[slot] = (x, y)
+        out.append((x, y))
+        active.append((x, y))
+
+    x0, y0 = rnd.randrange(w), rnd.randrange(h)
+    put(x0, y0, (int(y0 * inv) + 2) * gw + int(x0 * inv) + 2)
+    while active:
+        i = rnd.randrange(len(active))
+        ax, ay = active[i]
+        for _ in range(attempts):
+            ang = rand() * tau
+            dist = r * (1.0 + rand())
+            x, y = int(ax + cos(ang) * dist), int(ay + sin(ang) * dist)
+            if not (0 <= x < w and 0 <= y < h):
+                continue
+            slot = (int(y * inv) + 2) * gw + int(x * inv) + 2
+            for off in offsets:
+                p = slots[slot + off]
+                if p is not None and (p[0] - x) ** 2 + (p[1] - y) ** 2 < r2:
+                    break
+            else:
+                put(x, y, slot)
+                break
+        else:
+            active[i] = active[-1]
+            active.pop()
+    return out
+
+
+# -------- masks -----------------------------------------------------------------
+
+def near_masks(
+    grid: List[List[str]],
+    rivers: Iterable[Iterable[Coord]],
+    lakes: Iterable[Iterable[Coord]],
+    roads: Iterable[Iterable[Iterable[int]]],
+    bridges: Iterable[Dict[str, Any]],
+) -> Dict[str, bytearray]:
+    """One flat row-major mask per known "near" tag (1 = eligible)."""
+    h = len(grid); w = len(grid[0]) if h else 0
+    n = w * h
+    flat = [b for row in grid for b in row]
+    land = bytearray(b != "ocean" for b in flat)
+    river = bytearray(n)
+    for path in rivers:
+        for x, y in path:
+            river[y * w + x] = 1
+    lake = bytearray(n)
+    for blob in lakes:
+        for x, y in blob:
+            lake[y * w + x] = 1
+    road = bytearray(n)
+    road_hits = [0] * n
+    for path in roads:
+        seen: Set[int] = set()
+        for x, y in path:
+            i = y * w + x
+            road[i] = 1
+            if i not in seen:
+                seen.add(i)
+                road_hits[i] += 1
+    bridge = bytearray(n)
+    for b in bridges:
+        bridge[int(b["y"]) * w + int(b["x"])] = 1
+
+    def nbrs(i: int, diag: bool = False) -> List[int]:
+        x, y = i % w, i // w
+        steps = ((1, 0), (-1, 0), (0, 1), (0, -1)) + (((1, 1), (1, -1), (-1, 1), (-1, -1)) if diag else ())
+        return [(y + dy) * w + x + dx for dx, dy in steps if 0 <= x + dx < w and 0 <= y + dy < h]
+
+    masks = {k: bytearray(n) for k in ("forest_edge", "crossroads", "river", "road", "lake_shore",
+                                      "coast", "river_crossing", "ocean_headland")}
+    for i in range(n):
+        if not land[i]:
+            continue
+        b = flat[i]
+        adj = nbrs(i)
+        if b in WOODED and any(land[j] and flat[j] not in WOODED for j in adj):
+            masks["forest_edge"][i] = 1
+        if road[i]:
+            masks["road"][i] = 1
+            if road_hits[i] >= 2 or sum(road[j] for j in adj) >= 3:
+                masks["crossroads"][i] = 1
+            if bridge[i] or any(river[j] for j in adj):
+                masks["river_crossing"][i] = 1
+        if river[i] or any(river[j] for j in adj):
+            masks["river"][i] = 1
+        if not lake[i] and any(lake[j] for j in adj):
+            masks["lake_shore"][i] = 1
+        if b in SHORE:
+            masks["coast"][i] = 1
+            if sum(1 for j in nbrs(i, diag=True) if not land[j]) >= 5:
+                masks["ocean_headland"][i] = 1
+        if bridge[i]:
+            masks["river_crossing"][i] = 1
+    masks["land"] = land
+    return masks
+
+def _entry_mask(entry: Dict[str, Any], grid: List[List[str]], masks: Dict[str, bytearray]) -> bytearray:
+    biomes = entry.get("biomes")
+    if biomes:
+        allowed = {str(b) for b in biomes}
+        return bytearray(b in allowed for row in grid for b in row)
+    return masks.get(str(entry.get("near", "")), masks["land"])
+
+
+# -------- placement -------------------------------------------------------------
+
+def place_pois(
+    grid: List[List[str]],
+    tables: Dict[str, Dict[str, Any]],
+    cfg: Dict[str, Any],
+    rng,
+    *,
+    rivers: Iterable[Iterable[Coord]] = (),
+    lakes: Iterable[Iterable[Coord]] = (),
+    roads: Iterable[Iterable[Iterable[int]]] = (),
+    bridges: Iterable[Dict[str, Any]] = (),
+    occupied: Iterable[Coord] = (),
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    POI sites for a generated shard, plus a summary for layers["poi"].
+    `tables` maps table id -> POI table doc ({"entries": [...]}).
+    """
+    h = len(grid); w = len(grid[0]) if h else 0
+    budget = max(0, int(cfg.get("budget", 0)))
+    spacing = max(1, int(cfg.get("min_spacing", 3)))
+    table_ids = [t for t in (cfg.get("tables") or []) if t in tables]
+    summary: Dict[str, Any] = {"budget": budget, "min_spacing": spacing, "tables": table_ids, "candidates": 0, "placed": 0}
+    if not budget or not table_ids or not w:
+        return [], summary
+
+    masks = near_masks(grid, rivers, lakes, roads, bridges)
+    entries: List[Tuple[str, Dict[str, Any], bytearray]] = []
+    for tid in table_ids:
+        for e in tables[tid].get("entries") or []:
+            if float(e.get("weight", 1.0)) > 0 and e.get("tag"):
+                entries.append((tid, e, _entry_mask(e, grid, masks)))
+    if not entries:
+        return [], summary
+
+    # stdlib RNG seeded from the keyed stream: deterministic per seed, cheap per draw
+    rnd = random.Random(rng.randi("poi.sampler", 0, 2**31 - 1))
+    blocked = {y * w + x for x, y in occupied}
+    candidates = [(x, y) for x, y in poisson_disk(w, h, float(spacing), rnd)
+                  if y * w + x not in blocked and any(m[y * w + x] for _, _, m in entries)]
+    rnd.shuffle(candidates)
+    summary["candidates"] = len(candidates)
+
+    sites: List[Dict[str, Any]] = []
+    for x, y in candidates:
+        if len(sites) >= budget:
+            break
+        i = y * w + x
+        eligible = [(tid, e) for tid, e, m in entries if m[i]]
+        cum = list(accumulate(float(e.get("weight", 1.0)) for _, e in eligible))
+        tid, e = eligible[min(len(eligible) - 1, bisect_right(cum, rnd.random() * cum[-1]))]
+        site = {"type": str(e["tag"]), "x": x, "y": y, "category": "poi", "table": tid}
+        if e.get("near"):
+            site["near"] = e["near"]
+        sites.append(site)
+    summary["placed"] = len(sites)
+    return sites, summary
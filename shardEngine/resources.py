@@ -0,0 +1,138 @@
+# /app/shardEngine/resources.py
+"""
+Shard Engine v2 - Resource potential fields
+-------------------------------------------
+
+Bakes the tier's `resources` block into the shard at generation time so the
+room roller (engine/world_loader.py) only has to look values up:
+
+- ore    : land-normalized elevation + coarse vein noise
+- timber : share of wooded tiles in a 5x5 window (summed-area table)
+- fish   : BFS distance to ocean / lake / river tiles
+- herbs  : the climate moisture field
+
+Each field is quantized to one byte per tile (0..255 = potential 0..1),
+row-major, base64 encoded:
+
+    "resources": {
+      "encoding": "u8/base64", "width": 32, "height": 32,
+      "fields": {"ore": "<base64>", ...},
+      "nodes": {"ore": "ore", "timber": "wood", "herbs": "herb", "fish": "fish"},
+      "thresholds": {...}, "max_nodes_per_room": 2, "ambient_roll": true,
+      "respawn_seconds": {"small": 600, ...}
+    }
+
+Ocean tiles are 0 in every field.
+"""
+from __future__ import annotations
+
+import base64
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .climate import _bfs_distance, _lattice_noise
+
+Coord = Tuple[int, int]
+
+ENCODING = "u8/base64"
+# potential name -> node type the room roller creates
+NODE_TYPES: Dict[str, str] = {"ore": "ore", "timber": "wood", "herbs": "herb", "fish": "fish"}
+WOODED = {"forest", "taiga", "jungle"}
+TIMBER_RADIUS = 2
+FISH_FALLOFF = 1.5
+ORE_NOISE_CELL = 4
+ORE_NOISE_WEIGHT = 0.25
+
+
+def encode_field(values: Iterable[float]) -> str:
+    return base64.b64encode(bytes(int(round(min(1.0, max(0.0, v)) * 255)) for v in values)).decode("ascii")
+
+def decode_field(data: str) -> bytes:
+    return base64.b64decode(data)
+
+
+# -------- fields ----------------------------------------------------------------
+
+def _ore(land: List[bool], elevation: List[float], rng, w: int, h: int) -> List[float]:
+    noise = _lattice_noise(rng.with_namespace("ore"), w, h, ORE_NOISE_CELL)
+    k = ORE_NOISE_WEIGHT
+    return [(e * (1.0 - k) + n * k) if is_land else 0.0 for is_land, e, n in zip(land, elevation, noise)]
+
+def _timber(grid: List[List[str]], land: List[bool], w: int, h: int) -> List[float]:
+    # summed-area table of wooded tiles; each window is four lookups
+    sat = [[0] * (w + 1) for _ in range(h + 1)]
+    for y in range(h):
+        run = 0
+        above, row = sat[y], sat[y + 1]
+        for x in range(w):
+            run += grid[y][x] in WOODED
+            row[x + 1] = above[x + 1] + run
+    r = TIMBER_RADIUS
+    out: List[float] = []
+    for y in range(h):
+        y0, y1 = max(0, y - r), min(h, y + r + 1)
+        for x in range(w):
+            x0, x1 = max(0, x - r), min(w, x + r + 1)
+            n = sat[y1][x1] - sat[y0][x1] - sat[y1][x0] + sat[y0][x0]
+            out.append(n / ((y1 - y0) * (x1 - x0)))
+    return [v if is_land else 0.0 for v, is_land in zip(out, land)]
+
+def _fish(land: List[bool], fresh: Iterable[int], w: int, h: int) -> List[float]:
+    fresh = set(fresh)
+    sources = [i for i, is_land in enumerate(land) if not is_land or i in fresh]
+    dist = _bfs_distance(w, h, sources)
+    out: List[float] = []
+    for i, (d, is_land) in enumerate(zip(dist, land)):
+        if not is_land or d < 0:
+            out.append(0.0)
+        elif i in fresh:
+            out.append(1.0)
+        else:
+            # d == 1 is a shore tile
+            out.append(math.exp(-(d - 1) / FISH_FALLOFF))
+    return out
+
+
+def bake(
+    grid: List[List[str]],
+    elevation: List[float],
+    moisture: List[float],
+    rivers: Iterable[Iterable[Coord]],
+    lakes: Iterable[Iterable[Coord]],
+    rng,
+    cfg: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Resources layer for a generated shard. `elevation` is land-normalized
+    (0 at sea level .. 1) and `moisture` 0..1, both flat row-major.
+    """
+    h = len(grid); w = len(grid[0]) if h else 0
+    # coast / beach tiles are walkable rooms, so only open ocean counts as water here
+    land = [b != "ocean" for row in grid for b in row]
+    fresh = {y * w + x for path in rivers for x, y in path} | {y * w + x for blob in lakes for x, y in blob}
+
+    fields: Dict[str, str] = {}
+    for name in cfg.get("potentials") or []:
+        if name == "ore":
+            values = _ore(land, elevation, rng, w, h)
+        elif name == "timber":
+            values = _timber(grid, land, w, h)
+        elif name == "fish":
+            values = _fish(land, fresh, w, h)
+        elif name == "herbs":
+            values = [m if is_land else 0.0 for m, is_land in zip(moisture, land)]
+        else:
+            continue
+        fields[name] = encode_field(values)
+
+    return {
+        "encoding": ENCODING,
+        "width": w,
+        "height": h,
+        "fields": fields,
+        "nodes": {k: NODE_TYPES[k] for k in fields},
+        "thresholds": {k: float(v) for k, v in (cfg.get("thresholds") or {}).items() if k in fields},
+        "max_nodes_per_room": int(cfg.get("max_nodes_per_room", 2)),
+        "ambient_roll": bool(cfg.get("ambient_roll", False)),
+        "respawn_seconds": {k: int(v) for k, v in (cfg.get("respawn_seconds") or {}).items()},
+    }
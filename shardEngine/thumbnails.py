@@ -0,0 +1,201 @@
+"""
+Shard Engine v2 - Shard thumbnails / minimaps
+---------------------------------------------
+
+Renders a small PNG minimap of a shard (biome palette, rivers, roads,
+settlements) with a dependency-free PNG encoder (zlib + struct), so shard
+pickers can show previews without downloading the shard JSON.
+
+Thumbnails live next to the shard, keyed by its content hash:
+
+    <stem>.<sha256[:16]>.<size>.png
+
+so a re-saved shard never serves a stale image; renders for older hashes are
+pruned when a new one is written. persistence.finalize_shard() renders the
+DEFAULT_SIZE on save, other sizes are rendered on first request
+(GET /api/shards/<name>/thumb?size=) and `shard_cli.py backfill-thumbs`
+covers shards saved before thumbnails existed.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_SIZE = 128
+MIN_SIZE, MAX_SIZE = 16, 512
+
+Color = Tuple[int, int, int]
+
+def _hex(c: str) -> Color:
+    return int(c[1:3], 16), int(c[3:5], 16), int(c[5:7], 16)
+
+# matches the shard viewer's biome fills (client/js/shard-viewer-v2.js)
+BIOME_COLORS: Dict[str, Color] = {k: _hex(v) for k, v in {
+    "ocean": "#0b3a74", "river": "#3B90B8", "lake": "#2D7DA6", "reef": "#1EA3A8",
+    "coast": "#d9c38c", "beach": "#d9c38c",
+    "plains": "#91c36e", "forest": "#2e7d32", "savanna": "#C2B33C", "shrubland": "#9A8F44",
+    "taiga": "#2D6248", "jungle": "#1C6B46",
+    "hills": "#97b06b", "mountains": "#8e3c3c", "alpine": "#BFCADD", "glacier": "#A7D3E9",
+    "tundra": "#b2c2c2", "desert": "#e0c067", "volcano": "#A14034", "lavafield": "#5B2320",
+    "urban": "#555555", "wetland": "#2E5D4E",
+}.items()}
+UNKNOWN_COLOR: Color = _hex("#3a3f4b")
+RIVER_COLOR: Color = BIOME_COLORS["river"]
+ROAD_COLOR: Color = _hex("#a0a4ad")
+SITE_COLORS: Dict[str, Color] = {
+    "city": _hex("#f5f5f5"), "town": _hex("#ffd60a"), "village": _hex("#ffb703"), "port": _hex("#2c7da0"),
+}
+SITE_DEFAULT: Color = _hex("#ff5252")
+
+
+def clamp_size(size: Any) -> int:
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        size = DEFAULT_SIZE
+    return max(MIN_SIZE, min(MAX_SIZE, size))
+
+
+# -------- PNG -----------------------------------------------------------------
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+def encode_png(width: int, height: int, rows: Iterable[bytes]) -> bytes:
+    """8-bit RGB PNG from `height` rows of width*3 bytes (filter type 0)."""
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+        _png_chunk(b"IDAT", zlib.compress(raw, 9)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+# -------- Render --------------------------------------------------------------
+
+def _grid_of(data: Dict[str, Any]) -> List[List[str]]:
+    from .chunks import grid_of  # same legacy tiles fallback as the chunk sidecar
+
+    grid = grid_of(data)
+    if not grid:
+        raise ValueError("shard has no grid/tiles")
+    return grid
+
+_SETTLEMENT_KINDS = {"cities": "city", "towns": "town", "villages": "village", "ports": "port"}
+
+def _markers_of(data: Dict[str, Any]) -> List[Tuple[int, int, str]]:
+    """(x, y, type) of sites / legacy pois, then settlements drawn on top of them."""
+    from .chunks import site_xy
+
+    out: List[Tuple[int, int, str]] = []
+
+    def add(site: Any, kind: Optional[str]) -> None:
+        xy = list(site[:2]) if isinstance(site, (list, tuple)) else site_xy(site)
+        try:
+            x, y = int(xy[0]), int(xy[1])
+        except (IndexError, TypeError, ValueError):
+            return
+        out.append((x, y, str(kind or "").lower()))
+
+    sites = data.get("sites")
+    if not isinstance(sites, list):
+        sites = data.get("pois") if isinstance(data.get("pois"), list) else []
+    for s in sites:
+        add(s, s.get("type") if isinstance(s, dict) else None)
+    # top-level settlements (anchor + footprint) and generator settlement layers
+    settlements = data.get("settlements")
+    for s in settlements if isinstance(settlements, list) else []:
+        add(s, (s.get("type") if isinstance(s, dict) else None) or "town")
+    layer = (data.get("layers") or {}).get("settlements")
+    if isinstance(layer, dict):
+        for key, kind in _SETTLEMENT_KINDS.items():
+            for s in layer.get(key) or []:
+                add(s, kind)
+    return out
+
+def render_minimap(data: Dict[str, Any], size: int = DEFAULT_SIZE) -> bytes:
+    """
+    PNG whose longer side is `size` px. Biomes are point-sampled; rivers,
+    roads and sites are projected onto pixels so thin features survive
+    downscaling.
+    """
+    grid = _grid_of(data)
+    h, w = len(grid), len(grid[0])
+    scale = size / max(w, h)
+    ow, oh = max(1, round(w * scale)), max(1, round(h * scale))
+
+    xs = [min(w - 1, px * w // ow) for px in range(ow)]
+    pixels = [bytearray(b"".join(bytes(BIOME_COLORS.get(str(grid[py * h // oh][tx]).lower(), UNKNOWN_COLOR)) for tx in xs))
+              for py in range(oh)]
+
+    def fill(x0: int, y0: int, x1: int, y1: int, color: Color) -> None:
+        c = bytes(color)
+        for py in range(max(0, y0), min(oh, y1)):
+            row = pixels[py]
+            for px in range(max(0, x0), min(ow, x1)):
+                row[px * 3:px * 3 + 3] = c
+
+    def tile(x: int, y: int, color: Color) -> None:
+        # pixel block covered by tile (x, y), at least one pixel
+        x0, y0 = x * ow // w, y * oh // h
+        fill(x0, y0, max(x0 + 1, (x + 1) * ow // w), max(y0 + 1, (y + 1) * oh // h), color)
+
+    layers = data.get("layers") or {}
+    hydro = layers.get("hydrology") or {}
+    for path in hydro.get("rivers", []) if isinstance(hydro, dict) else []:
+        for x, y in path:
+            tile(int(x), int(y), RIVER_COLOR)
+    roads = layers.get("roads") or {}
+    for path in roads.get("paths", []) if isinstance(roads, dict) else []:
+        for x, y in path:
+            tile(int(x), int(y), ROAD_COLOR)
+
+    r = max(1, min(ow, oh) // 48)
+    for x, y, kind in _markers_of(data):
+        cx, cy = (2 * x + 1) * ow // (2 * w), (2 * y + 1) * oh // (2 * h)
+        fill(cx - r, cy - r, cx + r + 1, cy + r + 1, SITE_COLORS.get(kind, SITE_DEFAULT))
+
+    return encode_png(ow, oh, pixels)
+
+
+# -------- Storage -------------------------------------------------------------
+
+def thumb_path(path: Path, digest: str, size: int) -> Path:
+    path = Path(path)
+    stem = path.name[:-5] if path.name.endswith(".json") else path.stem
+    return path.with_name(f"{stem}.{digest[:16]}.{int(size)}.png")
+
+def _prune(path: Path, keep: Path, size: int) -> None:
+    stem = keep.name.split(".", 1)[0]
+    for old in path.parent.glob(f"{stem}.*.{int(size)}.png"):
+        if old != keep:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+def ensure_thumbnail(
+    path: Path,
+    digest: str,
+    size: int = DEFAULT_SIZE,
+    data: Optional[Dict[str, Any]] = None,
+    force: bool = False,
+) -> Path:
+    """Path of the cached thumbnail for this shard content, rendering it if needed."""
+    from .persistence import _atomic_write_bytes
+
+    size = clamp_size(size)
+    out = thumb_path(path, digest, size)
+    if out.exists() and not force:
+        return out
+    if data is None:
+        with Path(path).open("r", encoding="utf-8-sig") as f:
+            data = json.load(f)
+    _atomic_write_bytes(out, render_minimap(data, size))
+    _prune(Path(path), out, size)
+    return out
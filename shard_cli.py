@@ -0,0 +1,130 @@
+# shard_cli.py — Shardbound shard library maintenance CLI
+#
+# Examples (from project root):
+#   python shard_cli.py rebuild-manifest
+#   python shard_cli.py rebuild-manifest --dir static/public/shards
+#   python shard_cli.py backfill-thumbs --size 128 --size 256
+#   python shard_cli.py build-atlas --file 00089451_default.json
+#   python shard_cli.py convert --step grid --step v2only --dry-run
+#   python shard_cli.py convert --step rename --rename desert=desert_sand --jobs 4
+import os, sys, json, argparse
+from pathlib import Path
+
+# Ensure local package import works when running directly
+sys.path.insert(0, os.path.abspath("."))
+
+from shardEngine import manifest, thumbnails  # type: ignore
+from shardEngine.persistence import default_shards_dir  # type: ignore
+
+
+def _dir(args) -> Path:
+    return Path(args.dir) if args.dir else default_shards_dir()
+
+# --------------------
+# Commands
+# --------------------
+
+def cmd_rebuild_manifest(args):
+    entries = manifest.rebuild_manifest(_dir(args))
+    total = sum(int(e.get("size", 0)) for e in entries)
+    print(json.dumps({"ok": True, "manifest": str(manifest.manifest_path(_dir(args))),
+                      "shards": len(entries), "bytes": total}, indent=2))
+
+def cmd_backfill_thumbs(args):
+    d = _dir(args)
+    sizes = args.size or [thumbnails.DEFAULT_SIZE]
+    stats = {"rendered": 0, "cached": 0, "failed": []}
+    for e in manifest.load_manifest(d):
+        path = d / e["file"]
+        digest = manifest.fresh_entry(path)["hash"]
+        for size in sizes:
+            existed = thumbnails.thumb_path(path, digest, thumbnails.clamp_size(size)).exists()
+            try:
+                thumbnails.ensure_thumbnail(path, digest, size, force=args.force)
+            except Exception as ex:
+                stats["failed"].append({"file": e["file"], "size": size, "error": str(ex)})
+                continue
+            stats["cached" if existed and not args.force else "rendered"] += 1
+    print(json.dumps({"ok": not stats["failed"], **stats}, indent=2))
+
+def cmd_build_atlas(args):
+    from engine import room_atlas  # type: ignore
+    from engine.world_loader import load_world  # type: ignore
+
+    d = _dir(args)
+    files = args.file or [e["file"] for e in manifest.load_manifest(d)]
+    stats = {"built": 0, "fresh": 0, "rooms": 0, "failed": []}
+    for name in files:
+        path = d / name
+        try:
+            world = load_world(path)
+            if world.atlas is not None and not args.force:
+                stats["fresh"] += 1
+                continue
+            room_atlas.save_atlas(world, path)
+        except Exception as ex:
+            stats["failed"].append({"file": name, "error": str(ex)})
+            continue
+        stats["built"] += 1
+        stats["rooms"] += world.size[0] * world.size[1]
+    print(json.dumps({"ok": not stats["failed"], **stats}, indent=2))
+
+def cmd_convert(args):
+    from shardEngine import convert  # type: ignore
+
+    renames = {}
+    if args.rename_map:
+        renames.update(json.loads(Path(args.rename_map).read_text(encoding="utf-8")))
+    for pair in args.rename or []:
+        old, sep, new = pair.partition("=")
+        if not sep or not old or not new:
+            raise SystemExit(f"--rename expects old=new, got {pair!r}")
+        renames[old] = new
+    steps = args.step or ["grid"]
+    if renames and "rename" not in steps:
+        steps.append("rename")
+    report = convert.convert_library(_dir(args), steps, files=args.file, renames=renames,
+                                     dry_run=args.dry_run, jobs=args.jobs)
+    print(json.dumps(report, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Shardbound shard library CLI")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("rebuild-manifest", help="Re-index shard files into manifest.json")
+    s.add_argument("--dir", help="Shards directory (default: client/public/shards)")
+    s.set_defaults(func=cmd_rebuild_manifest)
+
+    s = sub.add_parser("backfill-thumbs", help="Render missing shard thumbnails")
+    s.add_argument("--dir", help="Shards directory (default: client/public/shards)")
+    s.add_argument("--size", type=int, action="append", help="Thumbnail size in px (repeatable, default 128)")
+    s.add_argument("--force", action="store_true", help="Re-render even if a thumbnail exists")
+    s.set_defaults(func=cmd_backfill_thumbs)
+
+    s = sub.add_parser("build-atlas", help="Pre-roll every room of each shard into <file>.rooms.json.gz")
+    s.add_argument("--dir", help="Shards directory (default: client/public/shards)")
+    s.add_argument("--file", action="append", help="Shard file name (repeatable, default: every shard in the manifest)")
+    s.add_argument("--force", action="store_true", help="Rebuild even if the atlas is up to date")
+    s.set_defaults(func=cmd_build_atlas)
+
+    s = sub.add_parser("convert", help="Run shard files through conversion steps + validation in a process pool")
+    s.add_argument("--dir", help="Shards directory (default: client/public/shards)")
+    s.add_argument("--file", action="append", help="Shard file name (repeatable, default: every shard in the manifest)")
+    s.add_argument("--step", action="append", choices=["grid", "rename", "v2only"],
+                   help="Conversion step (repeatable, applied in grid, rename, v2only order; default: grid)")
+    s.add_argument("--rename", action="append", metavar="OLD=NEW", help="Biome rename (repeatable, implies --step rename)")
+    s.add_argument("--rename-map", help="JSON file of {old: new} biome renames")
+    s.add_argument("--jobs", type=int, help="Worker processes (default: CPU count, 1 = in-process)")
+    s.add_argument("--dry-run", action="store_true", help="Report the changes per file without writing anything")
+    s.set_defaults(func=cmd_convert)
+
+    return p
+
+def main():
+    args = build_parser().parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
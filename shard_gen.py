@@ -85,6 +85,97 @@ def neighbors4(x: int, y: int, w: int, h: int):
     if y > 0: yield (x, y-1)
     if y < h-1: yield (x, y+1)
 
+# Compact biome codes for the flat bytearray grid used during generation
+_CODES = [OCEAN, COAST, PLAINS, FOREST, MOUNTAINS, HILLS, VOLCANO]
+_C_OCEAN, _C_COAST, _C_PLAINS, _C_FOREST, _C_MOUNTAINS, _C_HILLS, _C_VOLCANO = range(len(_CODES))
+
+def _neighbors4_flat(i: int, w: int, n: int) -> Tuple[int, ...]:
+    # flat-index neighbors4, same order: left, right, up, down
+    x = i % w
+    out = []
+    if x > 0: out.append(i - 1)
+    if x < w-1: out.append(i + 1)
+    if i >= w: out.append(i - w)
+    if i < n - w: out.append(i + w)
+    return tuple(out)
+
+class _Frontier:
+    """
+    Append-only list with order-preserving removal by rank.
+
+    The generator pops frontier[rng.randrange(len)]; swap-removal would be O(1)
+    but reorders the survivors and therefore changes every later pop for the
+    same seed. While the frontier is small list.pop's memmove is the fastest
+    option; past FENWICK_AT entries it switches to a Fenwick tree over alive
+    flags, which finds and removes the k-th alive entry in O(log n) instead of
+    shifting the whole tail, keeping the output identical.
+    """
+
+    FENWICK_AT = 1 << 15
+
+    __slots__ = ("items", "capacity", "tree", "size", "alive", "top")
+
+    def __init__(self, capacity: int):
+        self.items: List[int] = []
+        self.capacity = capacity  # upper bound on total appends
+        self.tree: Optional[List[int]] = None
+        self.size = self.alive = self.top = 0
+
+    def __len__(self) -> int:
+        return len(self.items) if self.tree is None else self.alive
+
+    def _to_fenwick(self) -> None:
+        m = len(self.items)
+        self.size = self.capacity + 1
+        tree = [0] * self.size
+        for i in range(1, self.size):
+            if i <= m:
+                tree[i] += 1
+            j = i + (i & -i)
+            if j < self.size:
+                tree[j] += tree[i]
+        self.tree, self.alive = tree, m
+        self.top = 1 << max(0, self.capacity.bit_length() - 1)
+
+    def append(self, item: int) -> None:
+        items, tree = self.items, self.tree
+        items.append(item)
+        if tree is None:
+            if len(items) > self.FENWICK_AT:
+                self._to_fenwick()
+            return
+        i, size = len(items), self.size
+        while i < size:
+            tree[i] += 1
+            i += i & -i
+        self.alive += 1
+
+    def pop(self, k: int) -> int:
+        tree = self.tree
+        if tree is None:
+            return self.items.pop(k)
+        size = self.size
+        # descend to the smallest position whose prefix count is k+1
+        pos, rem, step = 0, k + 1, self.top
+        while step:
+            nxt = pos + step
+            if nxt < size and tree[nxt] < rem:
+                pos = nxt
+                rem -= tree[nxt]
+            step >>= 1
+        i = pos + 1
+        while i < size:
+            tree[i] -= 1
+            i += i & -i
+        self.alive -= 1
+        return self.items[pos]
+
+def _burn_picks(rng: random.Random, w: int, h: int, tries: int = 5000) -> None:
+    # advance rng exactly like a pick that never hits
+    for _ in range(tries):
+        rng.randrange(w)
+        rng.randrange(h)
+
 # ---------- Main generator ----------
 
 def generate_shard_from_registry(
@@ -95,6 +186,9 @@ def generate_shard_from_registry(
     """
     Deterministic, simple landmass + coast + interior biomes + POIs.
     Emits canonical biome keys and TitleCase POI types.
+
+    Works on a flat bytearray of biome codes; the RNG call sequence matches
+    the original dict-per-tile implementation, so a seed yields the same shard.
     """
     if name not in registry:
         raise KeyError(f"'{name}' not found in registry")
@@ -104,84 +198,88 @@ def generate_shard_from_registry(
     rng = random.Random(seed)
     w = int(cfg.get("width", 64))
     h = int(cfg.get("height", 64))
+    n = w * h
     land_target = float(cfg.get("landmass_ratio", 0.5))
     biomes: List[str] = cfg.get("biomes", [OCEAN, PLAINS, FOREST, HILLS, MOUNTAINS, VOLCANO])
 
     # 1) Start all ocean
-    tiles = [[{"biome": OCEAN} for _ in range(w)] for _ in range(h)]
+    cells = bytearray(n)  # _C_OCEAN == 0
 
     # 2) Grow land blobs until land coverage ~ target
-    land_count_target = int(w * h * land_target)
+    land_count_target = int(n * land_target)
     land_cells = 0
 
-    seeds = max(3, (w * h) // 600)
-    frontier: List[Tuple[int, int]] = []
+    seeds = max(3, n // 600)
+    frontier = _Frontier(n + seeds)  # each cell is appended at most once (+ repeated seeds)
     for _ in range(seeds):
         sx, sy = rng.randrange(w), rng.randrange(h)
-        tiles[sy][sx]["biome"] = DEFAULT_LAND
-        frontier.append((sx, sy))
+        cells[sy * w + sx] = _C_PLAINS
+        frontier.append(sy * w + sx)
         land_cells += 1
 
+    random_ = rng.random
     while frontier and land_cells < land_count_target:
-        x, y = frontier.pop(rng.randrange(len(frontier)))
-        for nx, ny in neighbors4(x, y, w, h):
-            if tiles[ny][nx]["biome"] in WATER_BIOMES and rng.random() < 0.55:
-                tiles[ny][nx]["biome"] = DEFAULT_LAND
-                frontier.append((nx, ny))
+        i = frontier.pop(rng.randrange(len(frontier)))
+        for j in _neighbors4_flat(i, w, n):
+            if cells[j] == _C_OCEAN and random_() < 0.55:
+                cells[j] = _C_PLAINS
+                frontier.append(j)
                 land_cells += 1
                 if land_cells >= land_count_target:
                     break
 
     # 3) Coast ring (Coast around land touching Ocean)
-    for yy in range(h):
-        for xx in range(w):
-            if tiles[yy][xx]["biome"] == DEFAULT_LAND:
-                for nx, ny in neighbors4(xx, yy, w, h):
-                    if tiles[ny][nx]["biome"] in WATER_BIOMES:
-                        tiles[yy][xx]["biome"] = COAST_BIOME
-                        break
+    for i in range(n):
+        if cells[i] == _C_PLAINS and any(cells[j] == _C_OCEAN for j in _neighbors4_flat(i, w, n)):
+            cells[i] = _C_COAST
 
     # 4) Interior variety
-    interior = []
-    for yy in range(h):
-        for xx in range(w):
-            b = tiles[yy][xx]["biome"]
-            if b not in WATER_BIOMES and b != COAST_BIOME:
-                interior.append((xx, yy))
+    interior = [i for i in range(n) if cells[i] > _C_COAST]
     rng.shuffle(interior)
-    for (xx, yy) in interior:
-        roll = rng.random()
-        if VOLCANO in biomes and roll < 0.06:
-            tiles[yy][xx]["biome"] = VOLCANO
-        elif FOREST in biomes and roll < 0.35:
-            tiles[yy][xx]["biome"] = FOREST
-        elif MOUNTAINS in biomes and roll < 0.45:
-            tiles[yy][xx]["biome"] = MOUNTAINS
-        elif HILLS in biomes and roll < 0.55:
-            tiles[yy][xx]["biome"] = HILLS
+    has_volcano, has_forest = VOLCANO in biomes, FOREST in biomes
+    has_mountains, has_hills = MOUNTAINS in biomes, HILLS in biomes
+    for i in interior:
+        roll = random_()
+        if has_volcano and roll < 0.06:
+            cells[i] = _C_VOLCANO
+        elif has_forest and roll < 0.35:
+            cells[i] = _C_FOREST
+        elif has_mountains and roll < 0.45:
+            cells[i] = _C_MOUNTAINS
+        elif has_hills and roll < 0.55:
+            cells[i] = _C_HILLS
         else:
-            tiles[yy][xx]["biome"] = DEFAULT_LAND
+            cells[i] = _C_PLAINS
 
     # 5) POIs — canonical, TitleCase types
     pois: List[ShardPOI] = []
 
-    def pick_land():
-        for _ in range(5000):
-            xx, yy = rng.randrange(w), rng.randrange(h)
-            if tiles[yy][xx]["biome"] not in WATER_BIOMES and tiles[yy][xx]["biome"] != COAST_BIOME:
-                return xx, yy
-        return None
+    # Picks replay the original "random draw until it hits" loop so the RNG
+    # stream is unchanged; candidate counts let a pick that can never hit skip
+    # its 5000 wasted draws when no later pick can observe the RNG state.
+    volcano_cfg = cfg.get("volcano", {"enabled": False})
+    port_count = int(cfg.get("ports", {}).get("count", 0))
+    town_count = int(cfg.get("settlements", {}).get("count", 0))
+
+    def counts():
+        coast = cells.count(_C_COAST)
+        return n - cells.count(_C_OCEAN) - coast, coast
 
-    def pick_coast():
+    def pick(is_land: bool, later_can_hit: bool):
+        land, coast = counts()
+        if (land if is_land else coast) == 0:
+            if later_can_hit:
+                _burn_picks(rng, w, h)
+            return None
         for _ in range(5000):
             xx, yy = rng.randrange(w), rng.randrange(h)
-            if tiles[yy][xx]["biome"] == COAST_BIOME:
+            c = cells[yy * w + xx]
+            if (c > _C_COAST) if is_land else (c == _C_COAST):
                 return xx, yy
         return None
 
-    volcano_cfg = cfg.get("volcano", {"enabled": False})
     if volcano_cfg.get("enabled", False):
-        center = pick_land()
+        center = pick(True, later_can_hit=(port_count > 0 and counts()[1] > 0))
         if center:
             vx, vy = center
             radius = rng.randint(volcano_cfg.get("min_radius", 2), volcano_cfg.get("max_radius", 4))
@@ -189,21 +287,22 @@ def generate_shard_from_registry(
             for yy in range(max(0, vy - radius - 1), min(h, vy + radius + 2)):
                 for xx in range(max(0, vx - radius - 1), min(w, vx + radius + 2)):
                     if (xx - vx) ** 2 + (yy - vy) ** 2 <= r2:
-                        tiles[yy][xx]["biome"] = VOLCANO
+                        cells[yy * w + xx] = _C_VOLCANO
             pois.append(ShardPOI(type="Volcano", name="Cinder Crown", x=vx, y=vy, meta={"radius": radius}))
 
-    port_count = int(cfg.get("ports", {}).get("count", 0))
     for i in range(port_count):
-        p = pick_coast()
+        p = pick(False, later_can_hit=(town_count > 0 and counts()[0] > 0))
         if p:
             pois.append(ShardPOI(type="Port", name=f"Harbor {i+1}", x=p[0], y=p[1], meta={"faction": "Neutral"}))
 
-    town_count = int(cfg.get("settlements", {}).get("count", 0))
     for i in range(town_count):
-        loc = pick_land()
+        loc = pick(True, later_can_hit=False)
         if loc:
             pois.append(ShardPOI(type="Settlement", name=f"Village {i+1}", x=loc[0], y=loc[1], meta={"pop": random.Random(seed+i).randint(40, 220)}))
 
+    names = [_CODES[c] for c in cells]
+    tiles = [[{"biome": b} for b in names[y * w:(y + 1) * w]] for y in range(h)]
+
     meta = ShardMeta(
         name=name,
         displayName=name.replace("_", " ").title(),
@@ -0,0 +1,4 @@
+import os
+
+# create_app() must not start the room flusher / world tick threads under tests
+os.environ.setdefault("BACKGROUND_WORKERS", "0")
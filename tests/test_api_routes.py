@@ -19,3 +19,91 @@ def test_spawn_and_move_updates_state():
         assert len(move_data['player']['pos']) == 2
         if move_data.get('ok'):
             assert move_data['player']['pos'] != start_pos
+
+
+def test_passability_window_around_player():
+    app = create_app()
+    with app.test_client() as client:
+        client.post('/api/spawn', json={})
+        data = client.get('/api/passability?x0=0&y0=0&x1=7&y1=3').get_json()
+        assert (data['x'], data['y'], data['w'], data['h']) == (0, 0, 8, 4)
+        assert isinstance(data['bits'], str) and isinstance(data['exits'], list)
+        assert client.get('/api/passability?x0=5&x1=1').status_code == 400
+
+
+def test_travel_walks_a_route_in_one_request(monkeypatch):
+    import api.api.routes as routes
+
+    monkeypatch.setattr(routes, "maybe_spawn", lambda biome, on_road: None)
+    app = create_app()
+    with app.test_client() as client:
+        start = client.post('/api/spawn', json={}).get_json()['player']['pos']
+        here = client.post('/api/travel', json={'x': start[0], 'y': start[1]}).get_json()
+        assert here['ok'] and here['walked'] == 0 and here['path'] == [start]
+
+        exits = client.get('/api/passability').get_json()['exits']
+        dx, dy = {'north': (0, -1), 'south': (0, 1), 'east': (1, 0), 'west': (-1, 0)}[exits[0]]
+        data = client.post('/api/travel', json={'x': start[0] + dx, 'y': start[1] + dy}).get_json()
+        assert data['walked'] == 1 and data['player']['pos'] == [start[0] + dx, start[1] + dy]
+        assert data['log'][1].startswith(f"You move to ({start[0] + dx},{start[1] + dy})")
+        assert client.post('/api/travel', json={}).status_code == 400
+
+
+def test_move_applies_a_batch_of_steps(monkeypatch):
+    import api.api.routes as routes
+
+    monkeypatch.setattr(routes, "maybe_spawn", lambda biome, on_road: None)
+    saves = []
+    monkeypatch.setattr(routes, "save_player", lambda p: saves.append(tuple(p.pos)))
+    app = create_app()
+    with app.test_client() as client:
+        client.post('/api/spawn', json={})
+        start = client.get('/api/state').get_json()['player']['pos']
+        exits = client.get('/api/passability').get_json()['exits']
+        d = {'north': (0, -1), 'south': (0, 1), 'east': (1, 0), 'west': (-1, 0)}[exits[0]]
+        back = (-d[0], -d[1])
+        steps = [{'dx': d[0], 'dy': d[1]}, {'dx': back[0], 'dy': back[1]}] * 2
+        saves.clear()
+        data = client.post('/api/move', json={'steps': steps}).get_json()
+        assert {'player', 'room', 'interactions', 'log', 'walked'} <= data.keys()
+        assert data['walked'] >= 1 and len(saves) == 1
+        # one aggregated log: every step taken reports its move, in order
+        moves = [line for line in data['log'] if line.startswith('You move to')]
+        assert len(moves) == data['walked']
+        assert moves[0].startswith(f"You move to ({start[0] + d[0]},{start[1] + d[1]})")
+
+        assert client.post('/api/move', json={'steps': [{'dx': 2, 'dy': 0}]}).status_code == 400
+        assert client.post('/api/move', json={'steps': [{'dx': 1}]}).status_code == 400
+
+
+def test_admin_room_cache_reports_stats(monkeypatch):
+    from api import api_admin
+
+    monkeypatch.setattr(api_admin, "admin_guard", lambda *a, **k: None)
+    app = create_app()
+    client = app.test_client()
+    client.post("/api/spawn", json={})
+    data = client.get("/api/admin/room-cache").get_json()
+    assert data["entries"] >= 1 and data["resident_bytes"] > 0
+    assert {"hits", "misses", "evictions", "loads", "max_bytes", "writer"} <= set(data)
+    tick = client.get("/api/admin/world-tick").get_json()
+    assert tick["running"] is False and "pending_respawns" in tick
+
+
+def test_background_workers_are_opt_out(monkeypatch):
+    from api import api_admin
+    from api.api.routes import WORLD
+    from engine import persistence, ticker
+
+    monkeypatch.setattr(api_admin, "admin_guard", lambda *a, **k: None)
+    monkeypatch.setattr(persistence, "WRITER", persistence.WriteBehind())
+    assert create_app({"TESTING": True, "BACKGROUND_WORKERS": True}).config["BACKGROUND_WORKERS"] is False
+    assert ticker.ticker_for(WORLD) is None
+
+    app = create_app({"BACKGROUND_WORKERS": True})
+    try:
+        tick = app.test_client().get("/api/admin/world-tick").get_json()
+        assert tick["running"] and {"ticks", "overruns", "max_ms", "pending_respawns"} <= set(tick)
+    finally:
+        ticker.ticker_for(WORLD).stop()
+        persistence.WRITER.stop()
@@ -0,0 +1,59 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from shardEngine import generator_v2, persistence
+from shardEngine.climate import ClassificationError, classify, load_table, moisture_field
+from shardEngine.registry import Registry
+from shardEngine.rng import KeyedRNG
+
+TABLE = {
+    "elevation_bands": [0.5],
+    "moisture_bands": [0.3, 0.6],
+    "table": [["desert", "plains", "forest"], ["hills", "hills", "mountains"]],
+}
+
+
+def test_moisture_is_highest_along_rivers() -> None:
+    grid = [["plains"] * 20 for _ in range(5)]
+    river = [(0, 2), (1, 2), (2, 2)]
+    m = moisture_field(grid, KeyedRNG(7), rivers=[river])
+    assert len(m) == 100 and all(0.0 <= v <= 1.0 for v in m)
+    assert m[2 * 20 + 1] > m[2 * 20 + 19]
+    # deterministic for a seed
+    assert m == moisture_field(grid, KeyedRNG(7), rivers=[river])
+
+
+def test_load_table_validates_shape_and_order() -> None:
+    assert load_table({}) is None
+    assert load_table({"classification": TABLE})["table"][1][2] == "mountains"
+    with pytest.raises(ClassificationError):
+        load_table({"classification": dict(TABLE, moisture_bands=[0.6, 0.3])})
+    with pytest.raises(ClassificationError):
+        load_table({"classification": dict(TABLE, table=[["desert", "plains", "forest"]])})
+
+
+def test_classify_looks_up_bands() -> None:
+    table = load_table({"classification": TABLE})
+    out = classify([0.1, 0.1, 0.1, 0.9, 0.9], [0.1, 0.4, 0.9, 0.1, 0.9], table,
+                   mask=[True, True, True, True, False])
+    assert out == ["desert", "plains", "forest", "hills", None]
+
+
+def test_generate_uses_pack_table(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(persistence, "default_shards_dir", lambda: tmp_path)
+    reg = Registry()
+    reg.load_all()
+    doc = reg.get_biome_doc("arid-highfantasy")
+    table = load_table(doc.data)
+    out = generator_v2.generate(
+        req=SimpleNamespace(name="climate", templateId="hard-32"),
+        merged_tier=reg.get_tier("hard-32"), tier_prov="hard-32", biome_doc=doc, seed=4242,
+    )
+    data = json.loads((tmp_path / out["file"]).read_text())
+    moisture = data["layers"]["moisture"]
+    assert len(moisture) == len(data["grid"]) and all(0 <= v <= 100 for row in moisture for v in row)
+    interior = {b for row in data["grid"] for b in row if b not in ("ocean", "coast")}
+    allowed = {b for row in table["table"] for b in row}
+    assert interior and interior <= allowed
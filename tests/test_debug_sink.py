@@ -0,0 +1,30 @@
+from shardEngine.debug_sink import DebugSink
+
+
+def test_ring_buffer_keeps_newest_files(tmp_path) -> None:
+    sink = DebugSink(tmp_path, sample_rate=1.0, max_files=3, max_bytes=10_000)
+    for i in range(5):
+        assert sink.submit("plan", {"raw": {"i": i}, "resp": {"ok": True}})
+    sink.flush(timeout=5)
+
+    files = sorted(tmp_path.glob("*.json"))
+    assert len(files) == 3
+    assert sink.stats["written"] == 5 and sink.stats["deleted"] == 2
+    assert '"i":4' in max(files, key=lambda p: p.name).read_text()
+
+
+def test_oversize_response_is_summarised(tmp_path) -> None:
+    sink = DebugSink(tmp_path, sample_rate=1.0, max_files=10, max_bytes=200)
+    sink.submit("generate", {"raw": {"name": "x"}, "resp": {"grid": ["ocean"] * 500}})
+    sink.flush(timeout=5)
+
+    (path,) = tmp_path.glob("generate-*.json")
+    text = path.read_text()
+    assert '"truncated":true' in text and "ocean" not in text
+
+
+def test_sampling_disabled_writes_nothing(tmp_path) -> None:
+    sink = DebugSink(tmp_path, sample_rate=0.0)
+    assert sink.submit("plan", {"raw": {}}) is False
+    sink.flush(timeout=1)
+    assert list(tmp_path.glob("*.json")) == []
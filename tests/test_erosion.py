@@ -0,0 +1,55 @@
+import json
+import math
+from types import SimpleNamespace
+
+from shardEngine import generator_v2, persistence
+from shardEngine.erosion import DEFAULTS, erode, resolve
+from shardEngine.registry import Registry
+from shardEngine.rng import KeyedRNG
+
+
+def _ridge(w: int, h: int):
+    return [abs(math.sin(x / 3.0)) * 0.6 + (y / h) * 0.4 for y in range(h) for x in range(w)]
+
+
+def _max_drop(z, w, h) -> float:
+    return max(abs(z[i] - z[i + 1]) for i in range(w * h - 1) if (i + 1) % w)
+
+
+def test_resolve_defaults_and_off() -> None:
+    assert resolve(None) is None and resolve(False) is None
+    assert resolve({"iterations": 0}) is None
+    assert resolve({"thermal": False, "hydraulic": False}) is None
+    p = resolve(True)
+    assert p["iterations"] == DEFAULTS["iterations"] and p["thermal"]["talus"] == DEFAULTS["thermal"]["talus"]
+    p = resolve({"iterations": 3, "hydraulic": False, "thermal": {"rate": 4}})
+    assert p["hydraulic"] is None and p["thermal"]["rate"] == 1.0
+
+
+def test_erode_is_deterministic_and_softens_slopes() -> None:
+    w, h = 40, 30
+    z = _ridge(w, h)
+    params = resolve({"iterations": 8})
+    a = erode(z, w, h, KeyedRNG(11), params)
+    assert a == erode(z, w, h, KeyedRNG(11), params)
+    assert a != erode(z, w, h, KeyedRNG(12), params)  # rain pattern follows the seed
+    assert len(a) == w * h and min(a) == 0.0 and max(a) == 1.0
+
+    thermal_only = erode(z, w, h, KeyedRNG(11), resolve({"iterations": 8, "hydraulic": False}))
+    lo, hi = min(z), max(z)
+    norm = [(v - lo) / (hi - lo) for v in z]
+    assert _max_drop(thermal_only, w, h) < _max_drop(norm, w, h)
+
+
+def test_generate_records_erosion(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(persistence, "default_shards_dir", lambda: tmp_path)
+    reg = Registry()
+    reg.load_all()
+    tier = dict(reg.get_tier("hard-32"), noise={"erosion": {"iterations": 4}})
+    out = generator_v2.generate(
+        req=SimpleNamespace(name="eroded", templateId="hard-32"),
+        merged_tier=tier, tier_prov="hard-32", biome_doc=reg.get_biome_doc("temperate-base"), seed=4242,
+    )
+    world = json.loads((tmp_path / out["file"]).read_text())["layers"]["world"]
+    assert world["noise"]["erosion"]["iterations"] == 4
+    assert world["noise"]["erosion"]["hydraulic"]["rain"] == DEFAULTS["hydraulic"]["rain"]
@@ -0,0 +1,70 @@
+"""Bit-packed passability masks agree with the rule-by-rule can_enter."""
+
+import itertools
+import json
+import random
+from dataclasses import dataclass, field
+
+from engine import passability
+from engine.player_engine import Player, can_enter
+from engine.world_loader import load_world
+
+BIOMES = ["plains", "ocean", "Mountains", "forest", "Volcano", "coast"]
+
+
+@dataclass
+class RuleWorld:
+    """Duck-typed world without masks, so can_enter walks every rule."""
+    size: tuple
+    rows: list
+    road_tiles: set = field(default_factory=set)
+    bridge_tiles: set = field(default_factory=set)
+    blocked_land: set = field(default_factory=set)
+    requires_boat: set = field(default_factory=set)
+
+    def biome_at(self, x, y):
+        return self.rows[y][x]
+
+
+def _world(tmp_path, seed=3, w=13, h=9):
+    rnd = random.Random(seed)
+    rows = [[rnd.choice(BIOMES) for _ in range(w)] for _ in range(h)]
+    tiles = [[x, y] for y in range(h) for x in range(w)]
+    pick = lambda k: rnd.sample(tiles, k)
+    shard = {"grid": rows, "layers": {
+        "roads": {"paths": [pick(15)], "bridges": [{"x": x, "y": y} for x, y in pick(6)]},
+        "movement": {"blocked_for": {"land": pick(20)}, "requires": {"boat": pick(20)}},
+    }}
+    path = tmp_path / "p.json"
+    path.write_text(json.dumps(shard))
+    world = load_world(path)
+    rules = RuleWorld(world.size, rows, world.road_tiles, world.bridge_tiles, world.blocked_land, world.requires_boat)
+    return world, rules
+
+
+def test_masks_match_rules_for_every_capability_set(tmp_path) -> None:
+    world, rules = _world(tmp_path)
+    W, H = world.size
+    for boat, swim, climb, fly in itertools.product([False, True], repeat=4):
+        player = Player()
+        player.flags.update(has_boat=boat, can_swim=swim, can_climb=climb, can_fly=fly)
+        caps = passability.caps_of(player.flags)
+        for y in range(-1, H + 1):
+            for x in range(-1, W + 1):
+                expected = can_enter(rules, x, y, player)
+                assert passability.passable(world, x, y, caps) == expected[0], (x, y, player.flags)
+                assert can_enter(world, x, y, player) == expected
+    assert len(world.passability) == 16
+
+
+def test_window_and_neighbours(tmp_path) -> None:
+    world, rules = _world(tmp_path, seed=8)
+    caps = passability.caps_of(Player().flags)
+    win = passability.window(world, -2, 1, 4, 3, caps)
+    assert (win["x"], win["y"], win["w"], win["h"]) == (0, 1, 5, 3)
+    expected = [int(can_enter(rules, x, y, Player())[0]) for y in range(1, 4) for x in range(5)]
+    assert passability.unpack(win["bits"], 15) == expected
+
+    exits = passability.neighbours(world, 0, 0, caps)
+    assert all(can_enter(rules, x, y, Player())[0] for x, y in exits.values())
+    assert "north" not in exits and "west" not in exits
@@ -0,0 +1,49 @@
+"""A* routing over passability masks, road preference and the route cache."""
+
+import json
+
+from engine import passability, pathfinding
+from engine.world_loader import load_world
+
+
+def _world(tmp_path, rows, roads=()):
+    path = tmp_path / "route.json"
+    path.write_text(json.dumps({"grid": rows, "layers": {"roads": {"paths": [list(roads)], "bridges": []}}}))
+    return load_world(path)
+
+
+def test_route_prefers_roads_and_avoids_water(tmp_path) -> None:
+    rows = [["plains"] * 7 for _ in range(5)]
+    rows[2][1:6] = ["ocean"] * 5
+    # a road detour along the top is cheaper than the straight line below it
+    road = [[x, 0] for x in range(7)]
+    world = _world(tmp_path, rows, road)
+    walk = passability.caps_of({})
+
+    path = pathfinding.find_path(world, (0, 1), (6, 1), walk)
+    assert path[0] == (0, 1) and path[-1] == (6, 1)
+    assert all(rows[y][x] != "ocean" for x, y in path)
+    assert sum(1 for p in path if p[1] == 0) == 7  # rides the road
+
+    assert pathfinding.find_path(world, (0, 0), (3, 2), walk) is None
+    boat = passability.caps_of({"has_boat": True})
+    assert pathfinding.find_path(world, (3, 1), (3, 3), boat) == [(3, 1), (3, 2), (3, 3)]
+    assert pathfinding.steps_of([(0, 0), (1, 0), (1, 1)]) == [(1, 0), (0, 1)]
+
+
+def test_route_cache_reuses_paths_from_the_same_region(tmp_path) -> None:
+    rows = [["plains"] * 40 for _ in range(10)]
+    world = _world(tmp_path, rows)
+    caps = passability.caps_of({})
+
+    first = pathfinding.route(world, (1, 1), (35, 8), caps)
+    assert len(world.routes) == 1
+    # start on the cached path: served as a suffix
+    assert pathfinding.route(world, first[3], (35, 8), caps) == first[3:]
+    # start elsewhere in the region: joined onto the cached path
+    other = pathfinding.route(world, (4, 6), (35, 8), caps)
+    assert other[0] == (4, 6) and other[-1] == (35, 8) and len(world.routes) == 1
+    assert all(abs(ax - bx) + abs(ay - by) == 1 for (ax, ay), (bx, by) in zip(other, other[1:]))
+
+    passability.invalidate(world)
+    assert not world.routes and not world.passability
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from engine import persistence
+from engine.world_loader import get_room, load_world, persist_room
+
+FIXTURE = Path(__file__).parent / "fixtures" / "sample_shard.json"
+
+
+def _world(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "DB_PATH", tmp_path / "rooms.db")
+    monkeypatch.setattr(persistence, "WRITER", persistence.WriteBehind())
+    return load_world(FIXTURE)
+
+
+def test_dirty_rooms_are_written_behind_in_batches(tmp_path, monkeypatch) -> None:
+    world = _world(tmp_path, monkeypatch)
+    writer = persistence.WRITER
+    batches = []
+    real = persistence.save_rows
+    monkeypatch.setattr(persistence, "save_rows", lambda rows: batches.append(len(rows)) or real(rows))
+
+    rooms = [get_room(world, x, y) for y in range(2) for x in range(2)]
+    assert all(r.dirty for r in rooms) and writer.pending() == 4
+    # queued rooms are served before the (still empty) database
+    assert persistence.load_room(world.id, 1, 1) is rooms[3]
+
+    rooms[0].searchables = []
+    assert persist_room(rooms[0], world) is True
+    assert writer.pending() == 4  # re-marking a queued room does not queue it twice
+
+    assert writer.drain() == 4 and batches == [4]
+    assert not any(r.dirty for r in rooms)
+    assert persistence.load_room(world.id, 0, 0).searchables == []
+
+
+def test_evicting_a_dirty_room_writes_it_first(tmp_path, monkeypatch) -> None:
+    world = _world(tmp_path, monkeypatch)
+    world._rooms.maxsize = 1
+    first = get_room(world, 0, 0)
+    first.searchables = []
+    persist_room(first, world)
+
+    get_room(world, 1, 0)  # evicts (0, 0)
+    assert not first.dirty and persistence.WRITER.queued((world.id, 0, 0)) is None
+    assert persistence.load_room(world.id, 0, 0).searchables == []
+
+
+def test_rooms_being_written_are_still_served_from_the_queue(tmp_path, monkeypatch) -> None:
+    world = _world(tmp_path, monkeypatch)
+    room = get_room(world, 0, 0)
+    room.searchables = []
+    seen = []
+    real = persistence.save_rows
+
+    def slow_save(rows):
+        # mid-write the row is not there yet: readers must get the live room
+        seen.append(persistence.load_room(world.id, 0, 0))
+        return real(rows)
+
+    monkeypatch.setattr(persistence, "save_rows", slow_save)
+    assert persistence.WRITER.flush() == 1
+    assert seen == [room] and not room.dirty
+    assert persistence.WRITER.queued((world.id, 0, 0)) is None
+    assert persistence.load_room(world.id, 0, 0) is not room
+
+
+def test_stop_drains_the_queue(tmp_path, monkeypatch) -> None:
+    world = _world(tmp_path, monkeypatch)
+    writer = persistence.WRITER
+    writer.start(interval=60)
+    get_room(world, 0, 1)
+    writer.stop()
+    assert writer.pending() == 0 and writer.writes == 1
+    assert persistence.load_room(world.id, 0, 1) is not None
+
+
+def test_rooms_are_written_as_they_were_when_marked(tmp_path, monkeypatch) -> None:
+    world = _world(tmp_path, monkeypatch)
+    room = get_room(world, 1, 0)
+    room.searchables = []
+    persist_room(room, world)
+    # the writer thread never reads the live room: later, unpersisted changes are not picked up
+    room.searchables = [{"id": "late", "type": "crate", "table": "t", "once": True}]
+    persistence.WRITER.drain()
+    assert persistence.load_room(world.id, 1, 0).searchables == []
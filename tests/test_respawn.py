@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from engine import persistence, respawn, world_loader
+from engine.world_loader import get_room, load_world, persist_room, run_respawns
+
+FIXTURE = Path(__file__).parent / "fixtures" / "sample_shard.json"
+
+
+def _world(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "DB_PATH", tmp_path / "rooms.db")
+    monkeypatch.setattr(persistence, "WRITER", persistence.WriteBehind())
+    return load_world(FIXTURE)
+
+
+def test_queue_pops_due_entries_in_order_once() -> None:
+    q = respawn.RespawnQueue()
+    wood = {"id": "wood-0", "qty": 0, "respawn_s": 30, "depleted_at": 100.0}
+    rat = {"id": "rat-1", "hp": 5, "hp_now": 0, "respawn_s": 10, "defeated_at": 100.0}
+    assert q.schedule(0, 0, "resource", wood) and q.schedule(1, 0, "enemy", rat)
+    assert not q.schedule(0, 0, "resource", wood)                 # already queued
+    assert not q.schedule(0, 0, "resource", {"id": "x", "qty": 2, "respawn_s": 5, "depleted_at": 1.0})
+    assert q.next_due == 110.0
+
+    assert q.pop_due(105.0) == []
+    assert q.pop_due(200.0) == [(1, 0, "enemy", "rat-1", 100.0), (0, 0, "resource", "wood-0", 100.0)]
+    assert len(q) == 0 and q.next_due == float("inf")
+
+
+def test_depletions_respawn_through_the_queue(tmp_path, monkeypatch) -> None:
+    world = _world(tmp_path, monkeypatch)
+    room = get_room(world, 1, 1)
+    room.resources = [{"id": "n-0", "type": "wood", "qty": 0, "respawn_s": 60, "depleted_at": 1000.0}]
+    room.enemies = [{"id": "rat-1", "hp": 5, "hp_now": 0, "respawn_s": 300, "defeated_at": 1000.0}]
+    persist_room(room, world)
+    assert len(world.respawns) == 2
+
+    # cache hits with nothing due never look at the room's entries
+    monkeypatch.setattr(world_loader, "_lazy_respawn", None)
+    monkeypatch.setattr(world_loader.time, "time", lambda: 1030.0)
+    assert get_room(world, 1, 1) is room and room.resources[0]["qty"] == 0
+
+    assert run_respawns(world, now=1100.0) == [room]
+    assert room.resources[0]["qty"] == 1 and room.enemies[0]["hp_now"] == 0
+    # harvested again after it was scheduled: the stale entry is ignored
+    room.enemies[0]["defeated_at"] = 1200.0
+    assert run_respawns(world, now=1400.0) == [] and room.enemies[0]["hp_now"] == 0
+    persist_room(room, world)
+    assert run_respawns(world, now=1500.0) == [room] and room.enemies[0]["hp_now"] == 5
+
+
+def test_reloaded_rooms_catch_up_and_reschedule(tmp_path, monkeypatch) -> None:
+    world = _world(tmp_path, monkeypatch)
+    room = get_room(world, 0, 1)
+    room.resources = [
+        {"id": "a", "type": "wood", "qty": 0, "respawn_s": 10, "depleted_at": 1.0},
+        {"id": "b", "type": "herb", "qty": 0, "respawn_s": 10 ** 12, "depleted_at": 1.0},
+    ]
+    persist_room(room, world)
+    persistence.WRITER.drain()
+
+    world = load_world(FIXTURE)
+    again = get_room(world, 0, 1)
+    assert [n["qty"] for n in again.resources] == [1, 0]
+    assert len(world.respawns) == 1 and world.respawns.next_due == 1.0 + 10 ** 12
+
+
+def test_cache_hits_restore_only_a_few_respawns(tmp_path, monkeypatch) -> None:
+    world = _world(tmp_path, monkeypatch)
+    room = get_room(world, 1, 1)
+    room.resources = [{"id": f"n-{i}", "type": "wood", "qty": 0, "respawn_s": 1, "depleted_at": 1.0}
+                      for i in range(world_loader.ACCESS_RESPAWN_LIMIT + 5)]
+    persist_room(room, world)
+
+    get_room(world, 1, 1)
+    # the rest is left to the world ticker (or the next accesses)
+    assert len(world.respawns) == 5
+    assert sum(n["qty"] for n in room.resources) == world_loader.ACCESS_RESPAWN_LIMIT
@@ -0,0 +1,83 @@
+import shutil
+from pathlib import Path
+
+from engine import persistence, room_atlas
+from engine.world_loader import get_room, load_world, persist_room
+
+FIXTURE = Path(__file__).parent / "fixtures" / "sample_shard.json"
+
+
+def _world(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "DB_PATH", tmp_path / "rooms.db")
+    monkeypatch.setattr(persistence, "WRITER", persistence.WriteBehind())
+    path = tmp_path / "atlas_shard.json"
+    shutil.copy(FIXTURE, path)
+    return path, load_world(path)
+
+
+def test_atlas_rooms_match_lazy_rolls(tmp_path, monkeypatch) -> None:
+    path, world = _world(tmp_path, monkeypatch)
+    assert world.atlas is None
+    lazy = {(x, y): room_atlas.room_state(get_room(world, x, y)) for y in range(2) for x in range(2)}
+
+    room_atlas.save_atlas(world, path)
+    assert room_atlas.load_atlas(path) == lazy
+    assert load_world(path).atlas == lazy
+
+
+def test_get_room_reads_atlas_and_persists_only_divergent_rooms(tmp_path, monkeypatch) -> None:
+    path, world = _world(tmp_path, monkeypatch)
+    room_atlas.save_atlas(world, path)
+    world = load_world(path)
+    saved = []
+    monkeypatch.setattr(persistence, "save_rows", lambda rows: saved.extend(rows) or len(rows))
+
+    room = get_room(world, 1, 0)
+    assert persistence.WRITER.flush() == 0 and saved == []
+    assert persist_room(room, world) is False
+
+    room.resources.append({"id": "x", "type": "wood", "qty": 0, "respawn_s": 1, "depleted_at": 1.0})
+    assert persist_room(room, world) is True and room.dirty
+    assert persistence.WRITER.flush() == 1 and saved == [persistence._row(room)] and not room.dirty
+    # the atlas copy itself is untouched
+    assert world.atlas[(1, 0)]["resources"] != room.resources
+
+
+def test_room_back_at_its_atlas_state_overwrites_its_stored_row(tmp_path, monkeypatch) -> None:
+    path, world = _world(tmp_path, monkeypatch)
+    room_atlas.save_atlas(world, path)
+    world = load_world(path)
+    room = get_room(world, 1, 1)
+    original = list(room.searchables)
+    assert original
+
+    room.searchables = []
+    assert persist_room(room, world) is True
+    persistence.WRITER.drain()
+    assert room.stored and persistence.load_room(world.id, 1, 1).searchables == []
+
+    room.searchables = original
+    assert not room_atlas.diverges(world, room)
+    assert persist_room(room, world) is True
+    persistence.WRITER.drain()
+    assert persistence.load_room(world.id, 1, 1).searchables == original
+
+
+def test_atlas_is_ignored_after_shard_changes(tmp_path, monkeypatch) -> None:
+    path, world = _world(tmp_path, monkeypatch)
+    room_atlas.save_atlas(world, path)
+    path.write_text(path.read_text().replace("Forest Edge", "Forest Rim"))
+    assert room_atlas.load_atlas(path) is None
+    assert load_world(path).atlas is None
+
+
+def test_only_settlement_pois_are_tagged_safe(tmp_path, monkeypatch) -> None:
+    from engine import world_loader
+
+    monkeypatch.setattr(world_loader, "EXTRA_SAFE_TILES", set())
+    path, world = _world(tmp_path, monkeypatch)
+    world.pois.append({"x": 1, "y": 1, "type": "ruin"})
+    assert world.settlement_tiles() == {(0, 0)}  # the city; not the landmark or the ruin
+    atlas = room_atlas.build_atlas(world)
+    assert [k for k, e in sorted(atlas.items()) if "settlement" in e["tags"]] == [(0, 0)]
+    assert "settlement" not in get_room(world, 1, 1).tags
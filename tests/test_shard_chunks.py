@@ -0,0 +1,102 @@
+import json
+
+from flask import Flask
+
+import api.api_shards as api_shards
+from shardEngine import chunks, journal, manifest
+from shardEngine.persistence import save_shard_v2
+
+W, H = 40, 36
+GRID = [["ocean" if x == 0 else ("forest" if (x + y) % 3 else "plains") for x in range(W)] for y in range(H)]
+ELEV = [[(x * 7 + y) % 100 for x in range(W)] for y in range(H)]
+LAYERS = {
+    "elevation": ELEV,
+    "roads": {"paths": [[[1, 1], [2, 1], [33, 1]]], "bridges": [{"x": 2, "y": 1}]},
+    "hydrology": {"rivers": [[[5, 5], [5, 34]]], "lakes": [{"tiles": [[35, 35]]}]},
+}
+SITES = [{"type": "town", "x": 3, "y": 4}, {"type": "city", "x": 39, "y": 35}]
+
+
+def _client(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_shards, "SHARDS_DIR", tmp_path)
+    app = Flask(__name__)
+    app.register_blueprint(api_shards.bp)
+    res = save_shard_v2(base_name="big", seed=3, grid=GRID, sites=SITES, layers=LAYERS,
+                        width=W, height=H, shards_dir=tmp_path)
+    return app.test_client(), res.path
+
+
+def test_sidecar_written_on_save(tmp_path, monkeypatch) -> None:
+    _, path = _client(tmp_path, monkeypatch)
+    cf = chunks.ChunkFile(chunks.sidecar_path(path))
+    assert (cf.width, cf.height, cf.cols, cf.rows) == (W, H, 2, 2)
+    assert cf.layers == ("grid", "elevation", "roads", "rivers", "lakes", "sites")
+
+
+def test_chunks_cover_rect_and_match_source(tmp_path, monkeypatch) -> None:
+    client, _ = _client(tmp_path, monkeypatch)
+    r = client.get("/api/shards/00000003_big/chunks?x0=30&y0=0&x1=39&y1=35&layers=grid,elevation,roads,sites")
+    assert r.status_code == 200
+    data = json.loads(r.data)
+    assert data["layers"] == ["grid", "elevation", "roads", "sites"]
+    got = {(c["cx"], c["cy"]): c for c in data["chunks"]}
+    assert sorted(got) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+    c = got[(1, 1)]
+    assert (c["x"], c["y"], c["w"], c["h"]) == (32, 32, 8, 4)
+    pal = c["grid"]["palette"]
+    assert [[pal[i] for i in row] for row in c["grid"]["rows"]] == [row[32:] for row in GRID[32:]]
+    assert c["elevation"] == [row[32:] for row in ELEV[32:]]
+    assert c["sites"] == [SITES[1]]
+    assert got[(1, 0)]["roads"] == {"tiles": [[33, 1]], "bridges": []}
+    assert got[(0, 0)]["roads"]["bridges"] == [[2, 1]]
+
+
+def test_chunk_etag_and_validation(tmp_path, monkeypatch) -> None:
+    client, _ = _client(tmp_path, monkeypatch)
+    url = "/api/shards/00000003_big/chunks?x0=0&y0=0&x1=10&y1=10&layers=grid,rivers"
+    r = client.get(url)
+    etag, _ = r.get_etag()
+    assert len(json.loads(r.data)["chunks"]) == 1
+    assert client.get(url, headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+    assert client.get(url.replace("rivers", "lakes")).get_etag()[0] != etag
+
+    assert client.get("/api/shards/00000003_big/chunks?layers=nope").status_code == 400
+    assert client.get("/api/shards/00000003_big/chunks?x0=5&x1=1").status_code == 400
+    assert client.get("/api/shards/missing/chunks").status_code == 404
+
+
+def test_sidecar_rebuilt_when_shard_changes(tmp_path, monkeypatch) -> None:
+    client, path = _client(tmp_path, monkeypatch)
+    data = json.loads(path.read_text())
+    data["grid"][0][1] = "desert"
+    path.write_text(json.dumps(data))
+
+    r = client.get("/api/shards/00000003_big/chunks?x0=0&y0=0&x1=1&y1=0")
+    c = json.loads(r.data)["chunks"][0]
+    assert c["grid"]["palette"][c["grid"]["rows"][0][1]] == "desert"
+
+    chunks.sidecar_path(path).unlink()
+    assert client.get("/api/shards/00000003_big/chunks").status_code == 200
+    assert chunks.sidecar_path(path).exists()
+
+
+def test_sites_with_pos_or_anchor_land_in_their_chunk() -> None:
+    sites = [{"type": "cave", "pos": [33, 2]}, {"type": "ruin", "position": [1, 34]},
+             {"type": "town", "anchor": {"x": 2, "y": 3}}, {"type": "broken"}]
+    src = chunks._layer_sources({"grid": GRID, "sites": sites}, 2, 2)
+    assert src["sites"] == {(1, 0): [sites[0]], (0, 1): [sites[1]], (0, 0): [sites[2]]}
+
+
+def test_chunk_etag_matches_everything_in_the_body(tmp_path, monkeypatch) -> None:
+    W = H = 64
+    res = save_shard_v2(base_name="etag", seed=8, grid=[["plains"] * W for _ in range(H)], sites=[],
+                        layers={}, width=W, height=H, shards_dir=tmp_path)
+    render = lambda: chunks.render_chunks(chunks.open_chunks(res.path, manifest.fresh_entry(res.path)["hash"]),
+                                          name="etag", x0=0, y0=0, x1=31, y1=31, layers=["grid"])
+    body, etag = render()
+    # edit a tile outside the requested chunk: same ETag must mean the same body
+    journal.patch(res.path, [{"op": "set_tiles", "tiles": [{"x": 40, "y": 40, "biome": "lake"}]}])
+    journal.compact(res.path)
+    body2, etag2 = render()
+    assert etag2 == etag and body2 == body
@@ -0,0 +1,76 @@
+import json
+
+from shardEngine import convert, manifest
+
+
+def _legacy(path, w=4, h=3, biome="desert"):
+    tiles = [[{"tile": biome if x else "ocean"} for x in range(w)] for _ in range(h)]
+    doc = {"meta": {"name": path.stem, "width": w, "height": h}, "tiles": tiles,
+           "pois": [{"type": "town", "name": "A", "x": 1, "y": 1, "meta": {}}]}
+    path.write_text(json.dumps(doc))
+    return doc
+
+
+def test_dry_run_reports_diff_without_writing(tmp_path) -> None:
+    p = tmp_path / "00000001_a.json"
+    _legacy(p)
+    before = p.read_bytes()
+    report = convert.convert_library(tmp_path, ["grid", "v2only"], renames={"desert": "sand"},
+                                     dry_run=True, jobs=1)
+    assert report["ok"] and report["changed"] == 1
+    (r,) = report["results"]
+    assert r["changes"] == ["+grid", "+sites", "-tiles", "-pois", "meta.v2Only: None -> True"]
+    assert r["tiles"] == 12 and r["bytes_out"] < r["bytes_in"]
+    assert p.read_bytes() == before
+
+
+def test_pool_converts_library_and_records_manifest(tmp_path) -> None:
+    _legacy(tmp_path / "00000001_a.json")
+    _legacy(tmp_path / "00000002_b.json", w=5)
+    (tmp_path / "00000003_bad.json").write_text(json.dumps({"meta": {"width": 9, "height": 9},
+                                                            "grid": [["ocean"] * 2] * 2}))
+    report = convert.convert_library(tmp_path, ["grid", "rename", "v2only"],
+                                     renames={"desert": "sand"}, jobs=2)
+
+    by_file = {r["file"]: r for r in report["results"]}
+    assert report["changed"] == 2 and report["failed"] == 1 and not report["ok"]
+    assert "meta size 9x9 != grid 2x2" in by_file["00000003_bad.json"]["errors"]
+    assert "rename desert -> sand: 9" in by_file["00000001_a.json"]["changes"]
+
+    data = json.loads((tmp_path / "00000002_b.json").read_text())
+    assert "tiles" not in data and data["meta"]["v2Only"] is True
+    assert data["grid"][0] == ["ocean", "sand", "sand", "sand", "sand"]
+    assert data["sites"] == [{"type": "town", "name": "A", "x": 1, "y": 1}]
+    entry = manifest.get_entry(tmp_path, "00000002_b.json")
+    assert entry["hash"] == manifest.file_digest(tmp_path / "00000002_b.json")
+    assert (tmp_path / "00000002_b.json.chunks").exists()
+
+    again = convert.convert_library(tmp_path, ["grid", "v2only"], files=["00000002_b.json"], jobs=1)
+    assert again["changed"] == 0
+
+
+def test_per_tile_data_moves_to_layers_before_tiles_are_dropped(tmp_path) -> None:
+    p = tmp_path / "00000004_rich.json"
+    doc = _legacy(p, w=2, h=2)
+    for y, row in enumerate(doc["tiles"]):
+        for x, cell in enumerate(row):
+            cell.update(elevation=x + y, tags=["settlement_area"] if (x, y) == (1, 0) else [],
+                        flags={"blocked": (x, y) == (0, 1), "water": False})
+    doc.update(grid=[[c["tile"] for c in row] for row in doc["tiles"]], sites=doc["pois"])
+    p.write_text(json.dumps(doc))
+
+    (refused,) = convert.convert_library(tmp_path, ["v2only"], jobs=1)["results"]
+    assert refused["errors"] == ["v2only would drop per-tile elevation, flags, tags (run the grid step first)"]
+
+    (r,) = convert.convert_library(tmp_path, ["grid", "v2only"], jobs=1)["results"]
+    assert r["changes"][:3] == ["+layers.elevation", "+layers.tiles.tags: 1", "+layers.tiles.flags: 1"]
+    assert "-tiles" in r["changes"]
+    layers = json.loads(p.read_text())["layers"]
+    assert layers["elevation"] == [[0, 1], [1, 2]]
+    assert layers["tiles"] == {"tags": [{"x": 1, "y": 0, "value": ["settlement_area"]}],
+                               "flags": [{"x": 0, "y": 1, "value": {"blocked": True, "water": False}}]}
+
+
+def test_validate_accepts_generator_pos_sites() -> None:
+    data = {"grid": [["plains"] * 3] * 2, "sites": [{"type": "cave", "pos": [2, 1]}, {"type": "ruin", "pos": [5, 0]}]}
+    assert convert.validate(data) == ["site ruin at 5,0 out of bounds"]
@@ -0,0 +1,82 @@
+import gzip
+import json
+import os
+import zlib
+
+from flask import Flask
+
+import api.api_shards as api_shards
+from shardEngine import manifest
+from shardEngine.persistence import save_shard_v2
+
+
+def _client(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_shards, "SHARDS_DIR", tmp_path)
+    app = Flask(__name__)
+    app.register_blueprint(api_shards.bp)
+    res = save_shard_v2(
+        base_name="unit",
+        seed=7,
+        grid=[["ocean", "plains"], ["forest", "coast"]],
+        sites=[],
+        layers={},
+        width=2,
+        height=2,
+        shards_dir=tmp_path,
+    )
+    return app.test_client(), res.path
+
+
+def test_etag_and_not_modified(tmp_path, monkeypatch) -> None:
+    client, path = _client(tmp_path, monkeypatch)
+    digest = manifest.get_entry(tmp_path, path.name)["hash"]
+
+    r = client.get("/api/shards/00000007_unit")
+    assert r.status_code == 200
+    assert r.get_etag() == (digest, False)
+    assert json.loads(r.data)["meta"]["seed"] == 7
+    assert "Accept-Encoding" in r.headers["Vary"]
+
+    r = client.get("/api/shards/00000007_unit", headers={"If-None-Match": f'"{digest}"'})
+    assert r.status_code == 304
+    assert r.data == b""
+
+
+def test_precompressed_variants(tmp_path, monkeypatch) -> None:
+    client, path = _client(tmp_path, monkeypatch)
+    raw = path.read_bytes()
+    assert (tmp_path / (path.name + ".gz")).exists()
+    assert (tmp_path / (path.name + ".deflate")).exists()
+
+    r = client.get("/api/shards/00000007_unit", headers={"Accept-Encoding": "gzip, deflate"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(r.data) == raw
+    etag, _ = r.get_etag()
+    assert etag.endswith("-gzip")
+    assert client.get("/api/shards/00000007_unit", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": f'"{etag}"'}).status_code == 304
+
+    r = client.get("/api/shards/00000007_unit", headers={"Accept-Encoding": "deflate"})
+    assert r.headers["Content-Encoding"] == "deflate"
+    assert zlib.decompress(r.data) == raw
+
+
+def test_range_serves_identity_bytes(tmp_path, monkeypatch) -> None:
+    client, path = _client(tmp_path, monkeypatch)
+    r = client.get("/api/shards/00000007_unit", headers={"Range": "bytes=0-9", "Accept-Encoding": "gzip"})
+    assert r.status_code == 206
+    assert "Content-Encoding" not in r.headers
+    assert r.data == path.read_bytes()[:10]
+
+
+def test_stale_manifest_and_variants_are_refreshed(tmp_path, monkeypatch) -> None:
+    client, path = _client(tmp_path, monkeypatch)
+    # edited outside the save path: manifest + variants lag behind
+    path.write_text(json.dumps({"meta": {"seed": 7}, "grid": [["ocean"]]}), encoding="utf-8")
+    gz = tmp_path / (path.name + ".gz")
+    st = path.stat()
+    os.utime(gz, (st.st_atime - 10, st.st_mtime - 10))
+
+    r = client.get("/api/shards/00000007_unit", headers={"Accept-Encoding": "gzip"})
+    assert gzip.decompress(r.data) == path.read_bytes()
+    assert r.get_etag()[0] == manifest.file_digest(path) + "-gzip"
@@ -0,0 +1,71 @@
+"""Golden digests recorded from the dict-per-tile generators before the array rewrite."""
+import hashlib
+import json
+import random
+from dataclasses import asdict
+from types import SimpleNamespace as NS
+
+import pytest
+
+import shard_gen
+from shard_gen import generate_shard_from_registry
+from shardEngine.endpoints import WORLD_REGISTRY
+from shardEngine.generators import islands
+
+FULL = ["Ocean", "Coast", "Plains", "Forest", "Hills", "Mountains", "Volcano"]
+
+
+def _digest(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()[:16]
+
+
+@pytest.mark.parametrize("preset,overrides,expected", [
+    ("shard_isle_of_cinder", {}, "6437aa6d019ce87a"),
+    ("shard_green_coast", {}, "9e2f71b75e50817f"),
+    ("shard_isle_of_cinder", {"seed": 1, "biomes": FULL}, "641096dfe11e1ae5"),
+    ("shard_green_coast", {"seed": 99, "width": 40, "height": 24, "biomes": FULL,
+                           "volcano": {"enabled": True, "min_radius": 1, "max_radius": 3}}, "25d93d446abfda11"),
+    ("shard_isle_of_cinder", {"seed": 5, "width": 4, "height": 4, "landmass_ratio": 0.1}, "af13a24c2ba49c9d"),
+    ("shard_green_coast", {"seed": 8, "width": 3, "height": 5, "landmass_ratio": 0.9, "biomes": FULL,
+                           "volcano": {"enabled": True}}, "8985e1b9abc22160"),
+])
+def test_registry_generator_matches_golden(preset, overrides, expected) -> None:
+    s = generate_shard_from_registry(preset, WORLD_REGISTRY, overrides=overrides)
+    assert _digest([s.tiles, [asdict(p) for p in s.pois]]) == expected
+
+
+def test_fenwick_frontier_matches_list_frontier(monkeypatch) -> None:
+    cfg = {"x": {"seed": 42, "width": 48, "height": 40, "landmass_ratio": 0.6, "biomes": FULL,
+                 "volcano": {"enabled": True}, "ports": {"count": 2}, "settlements": {"count": 3}}}
+    listed = generate_shard_from_registry("x", cfg)
+    monkeypatch.setattr(shard_gen._Frontier, "FENWICK_AT", 4)
+    tree = generate_shard_from_registry("x", cfg)
+    assert tree.tiles == listed.tiles and tree.pois == listed.pois
+
+
+def _island_cfg(seed, w, h, pct):
+    return NS(name="isle", size=(w, h), seed=seed,
+              landmass=NS(percent=pct, falloff=1.8),
+              biomes=NS(land_primary="Plains", land_secondary="Forest", water="Coast"),
+              features=NS(volcano=NS(center_bias=0.7),
+                          settlements=NS(count=3, min_distance=3, prefer_biomes=["Plains", "Forest"]),
+                          ports=NS(count=3)))
+
+
+@pytest.mark.parametrize("args,expected", [
+    ((123456, 16, 16, 0.6), "a3f27bf36cd2c963"),
+    ((7, 33, 20, 0.45), "5d91bf93fc7904cc"),
+    ((9, 64, 64, 0.3), "db566e8ace5198ec"),
+])
+def test_islands_match_golden(args, expected) -> None:
+    assert _digest(islands.generate(_island_cfg(*args))) == expected
+
+
+def test_land_threshold_matches_sorted_selection() -> None:
+    r = random.Random(2)
+    for _ in range(300):
+        w, h = r.randint(2, 30), r.randint(1, 30)
+        falloff, pct = r.choice([0.5, 1, 1.8, 3]), r.choice([0.01, 0.3, 0.6, 1.0, r.random()])
+        mask = islands.radial_island_mask(w, h, falloff)
+        vals = sorted(v for row in mask for v in row)
+        assert islands.land_threshold(mask, w, h, pct) == vals[int((1 - pct) * len(vals))]
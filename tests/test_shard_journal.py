@@ -0,0 +1,132 @@
+import json
+
+import pytest
+from flask import Flask
+
+import api.api_shards as api_shards
+from shardEngine import journal
+from shardEngine.persistence import save_shard_v2
+
+GRID = [["plains"] * 4 for _ in range(3)]
+LAYERS = {"roads": {"paths": [[[0, 0], [1, 0]]], "bridges": []}}
+SITES = [{"type": "town", "x": 2, "y": 2}]
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_shards, "SHARDS_DIR", tmp_path)
+    app = Flask(__name__)
+    app.register_blueprint(api_shards.bp)
+    res = save_shard_v2(base_name="edit", seed=5, grid=GRID, sites=SITES, layers=LAYERS,
+                        width=4, height=3, shards_dir=tmp_path)
+    return app.test_client(), res.path
+
+
+def test_patch_journals_without_rewriting_base(tmp_path, monkeypatch) -> None:
+    client, path = _setup(tmp_path, monkeypatch)
+    before = path.read_bytes()
+    r = client.patch("/api/shards/00000005_edit", json={"ops": [
+        {"op": "set_tiles", "tiles": [{"x": 1, "y": 1, "biome": "forest"}]},
+        {"op": "add_poi", "poi": {"type": "ruin", "x": 0, "y": 2}},
+        {"op": "edit_road", "index": 0, "path": [[0, 0], [1, 0], [2, 0]]},
+    ]})
+    assert r.status_code == 200
+    res = r.get_json()
+    assert res["pending"] == 1 and res["compacted"] is False
+    assert path.read_bytes() == before
+    assert journal.pending(path) == 1
+
+    # reads fold the journal in first
+    data = json.loads(client.get("/api/shards/00000005_edit").data)
+    assert data["grid"][1][1] == "forest" and data["tiles"][1][1]["tile"] == "forest"
+    assert [p["type"] for p in data["sites"]] == ["town", "ruin"]
+    assert [p["type"] for p in data["pois"]] == ["town", "ruin"]
+    assert data["layers"]["roads"]["paths"][0][-1] == [2, 0]
+    assert not journal.journal_path(path).exists()
+
+
+def test_inverse_ops_undo_a_batch(tmp_path, monkeypatch) -> None:
+    client, path = _setup(tmp_path, monkeypatch)
+    original = json.loads(path.read_text())
+    ops = [
+        {"op": "set_tiles", "tiles": [{"x": 0, "y": 0, "biome": "desert"}, {"x": 0, "y": 0, "biome": "ocean"}]},
+        {"op": "remove_poi", "x": 2, "y": 2},
+        {"op": "edit_road", "index": 0, "path": None},
+        {"op": "edit_road", "index": 0, "path": [[3, 2]]},
+    ]
+    inverse = client.patch("/api/shards/00000005_edit", json={"ops": ops}).get_json()["inverse"]
+    assert client.patch("/api/shards/00000005_edit", json={"ops": inverse}).status_code == 200
+    assert journal.pending(path) == 2
+
+    journal.compact(path)
+    data = json.loads(path.read_text())
+    for key in ("grid", "tiles", "sites", "pois", "layers"):
+        assert data[key] == original[key]
+
+
+def test_bad_batch_is_rejected_and_rolled_back(tmp_path, monkeypatch) -> None:
+    client, path = _setup(tmp_path, monkeypatch)
+    r = client.patch("/api/shards/00000005_edit", json={"ops": [
+        {"op": "set_tiles", "tiles": [{"x": 0, "y": 0, "biome": "forest"}]},
+        {"op": "set_tiles", "tiles": [{"x": 9, "y": 0, "biome": "forest"}]},
+    ]})
+    assert r.status_code == 400 and "out of bounds" in r.get_json()["error"]
+    assert journal.pending(path) == 0
+
+    client.patch("/api/shards/00000005_edit", json={"ops": [{"op": "add_poi", "poi": {"type": "camp", "x": 1, "y": 1}}]})
+    journal.compact(path)
+    assert json.loads(path.read_text())["grid"][0][0] == "plains"
+
+
+def test_malformed_ops_are_rejected_without_leaking_into_the_shard(tmp_path, monkeypatch) -> None:
+    client, path = _setup(tmp_path, monkeypatch)
+    for bad in (
+        {"op": "edit_road", "index": 0, "path": [["a", 1]]},
+        {"op": "add_poi", "poi": {"type": "ruin", "x": 1, "y": 1}, "index": "first"},
+        {"op": "set_tiles", "tiles": [{"x": 1, "y": 0, "biome": "lava"}, {"x": 2, "y": 0, "biome": "lava"}, None]},
+    ):
+        r = client.patch("/api/shards/00000005_edit", json={"ops": [
+            {"op": "set_tiles", "tiles": [{"x": 0, "y": 0, "biome": "lava"}]}, bad]})
+        assert r.status_code == 400
+
+    client.patch("/api/shards/00000005_edit", json={"ops": [{"op": "add_poi", "poi": {"type": "camp", "x": 1, "y": 1}}]})
+    journal.compact(path)
+    data = json.loads(path.read_text())
+    assert "lava" not in json.dumps(data["grid"]) and "lava" not in json.dumps(data["tiles"])
+
+
+def test_compaction_threshold_and_stale_journal(tmp_path, monkeypatch) -> None:
+    client, path = _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(journal, "COMPACT_BATCHES", 3)
+    for i in range(3):
+        res = client.patch("/api/shards/00000005_edit", json={"ops": [
+            {"op": "set_tiles", "tiles": [{"x": i, "y": 0, "biome": "hills"}]}]}).get_json()
+    assert res["compacted"] is True
+    assert json.loads(path.read_text())["grid"][0][:3] == ["hills"] * 3
+
+    # a journal written against older base bytes is dropped, not replayed
+    journal.patch(path, [{"op": "set_tiles", "tiles": [{"x": 3, "y": 0, "biome": "hills"}]}])
+    client.put("/api/shards/00000005_edit", json={"grid": GRID, "tiles": [[{"tile": c} for c in row] for row in GRID]})
+    assert not journal.journal_path(path).exists()
+    assert json.loads(client.get("/api/shards/00000005_edit").data)["grid"][0][3] == "plains"
+
+
+def test_unknown_op() -> None:
+    with pytest.raises(journal.JournalError):
+        journal.apply_ops({"grid": [["plains"]]}, [{"op": "explode"}])
+
+
+def test_failed_batch_is_undone_in_place() -> None:
+    data = {"grid": [["plains"] * 3 for _ in range(2)], "sites": [{"id": "a", "type": "town", "x": 0, "y": 0}],
+            "layers": {"roads": {"paths": [[[0, 0], [1, 0]]]}}}
+    before = json.loads(json.dumps(data))
+    grid = data["grid"]
+    with pytest.raises(journal.JournalError):
+        journal.apply_ops(data, [
+            {"op": "set_tiles", "tiles": [{"x": 1, "y": 1, "biome": "lava"}]},
+            {"op": "remove_poi", "id": "a"},
+            {"op": "add_poi", "poi": {"type": "camp", "x": 2, "y": 1}},
+            {"op": "edit_road", "index": 0, "path": None},
+            {"op": "set_tiles", "tiles": [{"x": 2, "y": 0, "biome": "lava"}, {"x": 7, "y": 0, "biome": "lava"}]},
+        ])
+    # no copy of the shard is taken: the same objects are rolled back
+    assert data == before and data["grid"] is grid
@@ -0,0 +1,73 @@
+import json
+
+from flask import Flask
+
+import api.api_shards as api_shards
+from shardEngine import chunks, lod
+from shardEngine.persistence import save_shard_v2
+
+
+def test_downsample_mean_and_majority_with_ragged_edges() -> None:
+    elev = [[0, 2, 10], [4, 6, 20], [1, 1, 1]]
+    assert lod.downsample_elevation(elev, 2) == [[3, 15], [1, 1]]
+
+    grid = [["a", "b", "b"], ["b", "a", "c"], ["c", "c", "a"]]
+    out = lod.downsample_grid(grid, 2)
+    names = [[out["palette"][i] for i in row] for row in out["rows"]]
+    # 2-2 tie goes to the first biome seen in the block
+    assert names == [["a", "b"], ["c", "a"]]
+
+
+def test_levels_stop_once_a_level_fits_one_chunk() -> None:
+    grid = [["plains"] * 100 for _ in range(70)]
+    levels = lod.build_lod(grid, [[5] * 100 for _ in range(70)])["levels"]
+    assert [(lv["factor"], lv["width"], lv["height"]) for lv in levels] == [(2, 50, 35), (4, 25, 18)]
+    assert lod.build_lod([["plains"] * 32] * 32) is None
+
+
+def test_zoomed_out_chunks_come_from_lod_level(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(api_shards, "SHARDS_DIR", tmp_path)
+    W = H = 128
+    grid = [["forest" if x < 64 else "plains" for x in range(W)] for y in range(H)]
+    elev = [[x for x in range(W)] for y in range(H)]
+    res = save_shard_v2(base_name="wide", seed=4, grid=grid, sites=[], layers={"elevation": elev},
+                        width=W, height=H, shards_dir=tmp_path)
+    # derived data: served from the sidecar, not stored in the shard
+    assert "lod" not in json.loads(res.path.read_text())["layers"]
+
+    app = Flask(__name__)
+    app.register_blueprint(api_shards.bp)
+    client = app.test_client()
+    url = "/api/shards/00000004_wide/chunks?x0=0&y0=0&x1=127&y1=127&layers=grid,elevation,roads"
+    full = json.loads(client.get(url).data)
+    assert full["factor"] == 1 and len(full["chunks"]) == 16
+
+    r = client.get(url + "&zoom=0.25")
+    data = json.loads(r.data)
+    assert data["factor"] == 4 and data["layers"] == ["grid", "elevation"]
+    (c,) = data["chunks"]
+    assert (c["w"], c["h"]) == (32, 32)
+    assert c["elevation"][0][:2] == [2, 6]
+    assert [c["grid"]["palette"][i] for i in c["grid"]["rows"][0][15:17]] == ["forest", "plains"]
+    assert r.get_etag()[0] != client.get(url + "&zoom=0.5").get_etag()[0]
+    assert client.get(url + "&zoom=0").status_code == 400
+
+
+def test_pyramid_follows_grid_edits(tmp_path, monkeypatch) -> None:
+    from shardEngine import journal
+
+    monkeypatch.setattr(api_shards, "SHARDS_DIR", tmp_path)
+    W = H = 64
+    stale = lod.build_lod([["ocean"] * W for _ in range(H)])
+    res = save_shard_v2(base_name="edited", seed=6, grid=[["plains"] * W for _ in range(H)], sites=[],
+                        layers={"lod": stale}, width=W, height=H, shards_dir=tmp_path)
+    assert "lod" not in json.loads(res.path.read_text())["layers"]
+    block = [{"x": x, "y": y, "biome": "lake"} for y in range(2) for x in range(2)]
+    journal.patch(res.path, [{"op": "set_tiles", "tiles": block}])
+
+    app = Flask(__name__)
+    app.register_blueprint(api_shards.bp)
+    client = app.test_client()
+    url = "/api/shards/00000006_edited/chunks?x0=0&y0=0&x1=63&y1=63&layers=grid&zoom=0.5"
+    (c,) = json.loads(client.get(url).data)["chunks"]
+    assert c["grid"]["palette"][c["grid"]["rows"][0][0]] == "lake"
@@ -0,0 +1,113 @@
+import gzip
+import json
+import os
+import stat
+
+import pytest
+
+from shardEngine import manifest
+from shardEngine.persistence import assemble_payload_v2, save_shard_v2, variant_path
+
+
+GRID = [["ocean", "coast"], ["plains", "forest"]]
+SITES = [{"type": "town", "x": 1, "y": 1}]
+
+
+def _save(tmp_path, **kw):
+    return save_shard_v2(
+        base_name="unit",
+        seed=42,
+        grid=GRID,
+        sites=SITES,
+        layers={"elevation": [[0, 10], [40, 60]]},
+        width=2,
+        height=2,
+        provenance={"generator": "v2"},
+        shards_dir=tmp_path,
+        **kw,
+    )
+
+
+def test_streamed_payload_matches_assembled(tmp_path) -> None:
+    res = _save(tmp_path)
+    text = res.path.read_text(encoding="utf-8")
+    assert "\n" not in text and ", " not in text  # compact separators
+
+    data = json.loads(text)
+    expected = assemble_payload_v2(
+        name="00000042_unit",
+        display_name="Unit",
+        seed=42,
+        width=2,
+        height=2,
+        grid=GRID,
+        sites=SITES,
+        layers={"elevation": [[0, 10], [40, 60]]},
+        provenance={"generator": "v2"},
+    )
+    data["meta"].pop("createdAt")
+    expected["meta"].pop("createdAt")
+    assert data == expected
+    assert list(tmp_path.glob(".tmp_*")) == []
+
+
+def test_v2_only_skips_legacy_sections(tmp_path) -> None:
+    res = _save(tmp_path, meta_extra={"v2Only": True})
+    data = json.loads(res.path.read_text(encoding="utf-8"))
+    assert "tiles" not in data and "pois" not in data
+    assert data["grid"] == GRID
+    assert data["meta"]["v2Only"] is True
+
+
+def test_gzip_output(tmp_path) -> None:
+    res = _save(tmp_path, compress=True)
+    assert res.name == "00000042_unit.json.gz"
+    # the delivery variant of the plain file, not a second copy that can drift from it
+    plain = tmp_path / "00000042_unit.json"
+    assert res.path == variant_path(plain, "gzip")
+    assert gzip.decompress(res.path.read_bytes()) == plain.read_bytes()
+    data = json.loads(plain.read_text(encoding="utf-8"))
+    assert data["tiles"][1][0] == {"tile": "plains"}
+
+
+def test_save_records_manifest_entry(tmp_path) -> None:
+    res = _save(tmp_path)
+    entry = manifest.get_entry(tmp_path, res.name)
+    assert entry["meta"]["seed"] == 42
+    assert entry["size"] == res.path.stat().st_size
+    assert entry["hash"] == manifest.file_digest(res.path)
+    assert manifest.seed_ids(tmp_path) == {42}
+
+    # rebuild from disk yields the same index, ignoring the manifest itself
+    rebuilt = manifest.rebuild_manifest(tmp_path)
+    assert [e["file"] for e in rebuilt] == [res.name]
+    assert rebuilt[0]["hash"] == entry["hash"]
+
+
+def _record_many(shards_dir, prefix, n) -> None:
+    for i in range(n):
+        path = shards_dir / f"{prefix}{i}.json"
+        path.write_text(json.dumps({"meta": {"name": path.stem}}))
+        manifest.record_shard(path)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="cross-process manifest lock is POSIX only")
+def test_concurrent_writers_keep_each_others_entries(tmp_path) -> None:
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_record_many, args=(tmp_path, prefix, 15)) for prefix in ("a", "b")]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    assert [p.exitcode for p in procs] == [0, 0]
+    files = {e["file"] for e in json.loads(manifest.manifest_path(tmp_path).read_text())}
+    assert files == {f"{prefix}{i}.json" for prefix in "ab" for i in range(15)}
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX file modes")
+def test_written_files_are_world_readable(tmp_path) -> None:
+    res = _save(tmp_path)
+    for name in (res.name, res.name + ".gz", res.name + ".deflate", "manifest.json"):
+        assert stat.S_IMODE((tmp_path / name).stat().st_mode) == 0o644, name
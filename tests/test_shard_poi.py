@@ -0,0 +1,61 @@
+import json
+import random
+from types import SimpleNamespace
+
+from shardEngine import generator_v2, persistence
+from shardEngine.poi import place_pois, poisson_disk
+from shardEngine.registry import Registry
+from shardEngine.rng import KeyedRNG
+
+TABLES = {
+    "t": {"entries": [
+        {"tag": "boathouse", "weight": 3, "near": "coast"},
+        {"tag": "cairn", "weight": 1, "biomes": ["hills"]},
+    ]},
+}
+
+
+def test_poisson_disk_keeps_spacing_and_covers_the_map() -> None:
+    pts = poisson_disk(60, 40, 4.0, random.Random(3))
+    assert len(set(pts)) == len(pts)
+    for i, (ax, ay) in enumerate(pts):
+        for bx, by in pts[i + 1:]:
+            assert (ax - bx) ** 2 + (ay - by) ** 2 >= 16
+    # maximal-ish: no tile is far from a sample
+    for y in range(0, 40, 5):
+        for x in range(0, 60, 5):
+            assert min((x - px) ** 2 + (y - py) ** 2 for px, py in pts) < 64
+
+
+def test_place_pois_respects_masks_budget_and_settlements() -> None:
+    grid = [["ocean"] * 30] + [["coast"] + ["hills"] * 28 + ["coast"] for _ in range(18)] + [["ocean"] * 30]
+    cfg = {"budget": 8, "min_spacing": 3, "tables": ["t", "missing"]}
+    sites, summary = place_pois(grid, TABLES, cfg, KeyedRNG(9), occupied=[(0, 5)])
+    assert summary["tables"] == ["t"] and summary["placed"] == len(sites) == 8
+    for s in sites:
+        biome = grid[s["y"]][s["x"]]
+        assert (s["type"], biome) in {("boathouse", "coast"), ("cairn", "hills")}
+        assert (s["x"], s["y"]) != (0, 5) and s["category"] == "poi" and s["table"] == "t"
+    again, _ = place_pois(grid, TABLES, cfg, KeyedRNG(9), occupied=[(0, 5)])
+    assert again == sites
+
+    assert place_pois(grid, TABLES, {"budget": 0, "tables": ["t"]}, KeyedRNG(9))[0] == []
+
+
+def test_generate_emits_poi_sites(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(persistence, "default_shards_dir", lambda: tmp_path)
+    reg = Registry()
+    reg.load_all()
+    tier = reg.get_tier("hard-32")
+    out = generator_v2.generate(
+        req=SimpleNamespace(name="poi", templateId="hard-32"),
+        merged_tier=tier, tier_prov="hard-32", biome_doc=reg.get_biome_doc("temperate-base"), seed=4242,
+        poi_tables={pid: reg.get_poi(pid) for pid in tier["poi"]["tables"]},
+    )
+    data = json.loads((tmp_path / out["file"]).read_text())
+    pois = [s for s in data["sites"] if s.get("category") == "poi"]
+    assert data["layers"]["poi"]["placed"] == len(pois) and 0 < len(pois) <= tier["poi"]["budget"]
+    tags = {e["tag"] for pid in tier["poi"]["tables"] for e in reg.get_poi(pid)["entries"]}
+    assert all(s["type"] in tags for s in pois)
+    settlements = {(s["x"], s["y"]) for s in data["sites"] if s.get("category") != "poi"}
+    assert not settlements & {(s["x"], s["y"]) for s in pois}
@@ -0,0 +1,34 @@
+import json
+from types import SimpleNamespace
+
+from shardEngine import generator_v2, persistence
+from shardEngine.registry import Registry
+from shardEngine.resources import decode_field
+
+
+def test_generate_bakes_resource_fields(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(persistence, "default_shards_dir", lambda: tmp_path)
+    reg = Registry()
+    reg.load_all()
+    tier = reg.get_tier("hard-32")
+    out = generator_v2.generate(
+        req=SimpleNamespace(name="res", templateId="hard-32"),
+        merged_tier=tier, tier_prov="hard-32", biome_doc=reg.get_biome_doc("temperate-base"), seed=4242,
+    )
+    data = json.loads((tmp_path / out["file"]).read_text())
+    layer = data["layers"]["resources"]
+    grid = data["grid"]
+    w, h = len(grid[0]), len(grid)
+    assert layer["encoding"] == "u8/base64" and (layer["width"], layer["height"]) == (w, h)
+    assert set(layer["fields"]) == set(tier["resources"]["potentials"])
+    assert layer["nodes"]["timber"] == "wood"
+    assert layer["max_nodes_per_room"] == tier["resources"]["max_nodes_per_room"]
+
+    fish = decode_field(layer["fields"]["fish"])
+    assert len(fish) == w * h
+    for y in range(h):
+        for x in range(w):
+            if grid[y][x] == "ocean":
+                assert all(decode_field(f)[y * w + x] == 0 for f in layer["fields"].values())
+    # shore tiles touch the sea, so they carry the full fish potential
+    assert any(fish[y * w + x] == 255 for y in range(h) for x in range(w) if grid[y][x] == "coast")
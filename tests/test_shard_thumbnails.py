@@ -0,0 +1,73 @@
+import struct
+import zlib
+
+from flask import Flask
+
+import api.api_shards as api_shards
+from shardEngine import manifest, thumbnails
+from shardEngine.persistence import save_shard_v2
+
+GRID = [["ocean", "plains", "forest", "desert"] for _ in range(2)]
+LAYERS = {"roads": {"paths": [[[1, 0], [2, 0]]], "bridges": []}}
+SITES = [{"type": "town", "x": 3, "y": 1}]
+
+
+def _decode(png: bytes):
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, chunks = 8, {}
+    while pos < len(png):
+        (n,) = struct.unpack(">I", png[pos:pos + 4])
+        kind, data = png[pos + 4:pos + 8], png[pos + 8:pos + 8 + n]
+        (crc,) = struct.unpack(">I", png[pos + 8 + n:pos + 12 + n])
+        assert crc == zlib.crc32(kind + data) & 0xFFFFFFFF
+        chunks[kind] = data
+        pos += 12 + n
+    w, h = struct.unpack(">II", chunks[b"IHDR"][:8])
+    raw = zlib.decompress(chunks[b"IDAT"])
+    stride = 1 + 3 * w
+    rows = [raw[i * stride + 1:(i + 1) * stride] for i in range(h)]
+    return w, h, lambda x, y: tuple(rows[y][3 * x:3 * x + 3])
+
+
+def test_render_minimap_layers() -> None:
+    w, h, px = _decode(thumbnails.render_minimap({"grid": GRID, "layers": LAYERS, "sites": SITES}, size=16))
+    assert (w, h) == (16, 8)
+    assert px(0, 0) == thumbnails.BIOME_COLORS["ocean"]
+    assert px(4, 0) == thumbnails.ROAD_COLOR  # tile (1, 0) covers pixels 4..7
+    assert px(5, 7) == thumbnails.BIOME_COLORS["plains"]
+    assert px(14, 6) == thumbnails.SITE_COLORS["town"]
+
+
+def test_markers_for_pos_sites_and_settlements() -> None:
+    data = {"grid": GRID, "sites": [{"type": "city", "pos": [2, 0]}],
+            "settlements": [{"id": "sett_0_1", "tier": 1, "anchor": {"x": 0, "y": 1}, "footprint": {"w": 1, "h": 1}}]}
+    _, _, px = _decode(thumbnails.render_minimap(data, size=16))
+    assert px(10, 2) == thumbnails.SITE_COLORS["city"]
+    assert px(2, 6) == thumbnails.SITE_COLORS["town"]
+
+
+def test_thumb_endpoint_cached_by_hash(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(api_shards, "SHARDS_DIR", tmp_path)
+    app = Flask(__name__)
+    app.register_blueprint(api_shards.bp)
+    client = app.test_client()
+    res = save_shard_v2(base_name="tiny", seed=9, grid=GRID, sites=SITES, layers=LAYERS,
+                        width=4, height=2, shards_dir=tmp_path)
+    digest = manifest.get_entry(tmp_path, res.name)["hash"]
+    saved = thumbnails.thumb_path(res.path, digest, thumbnails.DEFAULT_SIZE)
+    assert saved.exists()  # rendered on save
+
+    r = client.get("/api/shards/00000009_tiny/thumb")
+    assert r.status_code == 200 and r.mimetype == "image/png"
+    assert r.data == saved.read_bytes()
+    etag, _ = r.get_etag()
+    assert client.get("/api/shards/00000009_tiny/thumb", headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+
+    r = client.get("/api/shards/00000009_tiny/thumb?size=32")
+    assert _decode(r.data)[:2] == (32, 16)
+
+    # re-save with new content: new hash, old render pruned
+    res = save_shard_v2(base_name="tiny", seed=9, grid=[row[::-1] for row in GRID], sites=[], layers={},
+                        width=4, height=2, shards_dir=tmp_path)
+    assert not saved.exists()
+    assert len(list(tmp_path.glob("00000009_tiny.*.128.png"))) == 1
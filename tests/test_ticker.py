@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from engine import persistence
+from engine.ticker import WorldTicker
+from engine.world_loader import get_room, load_world, persist_room
+
+FIXTURE = Path(__file__).parent / "fixtures" / "sample_shard.json"
+
+
+def _depleted_world(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "DB_PATH", tmp_path / "rooms.db")
+    monkeypatch.setattr(persistence, "WRITER", persistence.WriteBehind())
+    world = load_world(FIXTURE)
+    for x, y in ((0, 1), (1, 1)):
+        room = get_room(world, x, y)
+        room.resources = [{"id": "n-0", "type": "wood", "qty": 0, "respawn_s": 60, "depleted_at": 1000.0}]
+        room.enemies = []
+        persist_room(room, world)
+    return world
+
+
+def test_tick_restores_due_respawns_and_publishes_deltas(tmp_path, monkeypatch) -> None:
+    world = _depleted_world(tmp_path, monkeypatch)
+    published = []
+    ticker = WorldTicker(world, publish=published.extend)
+
+    assert ticker.tick(now=1030.0) == [] and published == []
+    deltas = ticker.tick(now=1060.0)
+    assert sorted(d["room"] for d in deltas) == ["0,1", "1,1"] and published == deltas
+    assert deltas[0]["room_delta"]["resources"][0]["qty"] == 1
+    assert world._rooms.peek((0, 1)).dirty
+    stats = ticker.stats()
+    assert (stats["ticks"], stats["restored"], stats["pending_respawns"]) == (2, 2, 0)
+
+
+def test_tick_stops_at_its_budget_and_carries_over(tmp_path, monkeypatch) -> None:
+    world = _depleted_world(tmp_path, monkeypatch)
+    ticker = WorldTicker(world, budget=0.0)
+
+    assert ticker.tick(now=2000.0) == [] and ticker.over_budget == 1
+    assert len(world.respawns) == 2
+    ticker.budget = 1.0
+    assert len(ticker.tick(now=2000.0)) == 2
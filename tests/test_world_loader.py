@@ -1,5 +1,6 @@
 from pathlib import Path
 
+from engine.biome_grid import BiomeGrid
 from engine.world_loader import load_world
 
 
@@ -7,8 +8,209 @@ def test_load_world_populates_world_sets() -> None:
     path = Path(__file__).parent / "fixtures" / "sample_shard.json"
     world = load_world(path)
 
-    assert any(p["x"] == 0 and p["y"] == 0 and p["type"] == "citie" for p in world.pois)
+    assert any(p["x"] == 0 and p["y"] == 0 and p["type"] == "city" for p in world.pois)
     assert any(p["x"] == 1 and p["y"] == 0 and p["type"] == "landmark" for p in world.pois)
 
     assert world.roads == [[(0, 0), (1, 0)]]
     assert world.requires_boat == {(1, 1)}
+
+
+def test_baked_resource_potentials_drive_room_rolls(tmp_path) -> None:
+    import json
+    import random
+
+    from engine.world_loader import _roll_resources
+    from shardEngine.resources import encode_field
+
+    shard = {
+        "grid": [["mountains", "forest"], ["plains", "ocean"]],
+        "layers": {"resources": {
+            "encoding": "u8/base64", "width": 2, "height": 2,
+            "fields": {"ore": encode_field([1.0, 0.1, 0.0, 0.0]), "timber": encode_field([0.0, 0.9, 0.0, 0.0])},
+            "nodes": {"ore": "ore", "timber": "wood"},
+            "thresholds": {"ore": 0.8, "timber": 0.7},
+            "max_nodes_per_room": 1, "ambient_roll": False,
+            "respawn_seconds": {"small": 600, "medium": 1800, "large": 5400},
+        }},
+    }
+    path = tmp_path / "res.json"
+    path.write_text(json.dumps(shard))
+    world = load_world(path)
+
+    ore = _roll_resources(world, 0, 0, "mountains", [], random.Random(1))
+    assert [(n["type"], n["respawn_s"]) for n in ore] == [("ore", 5400)]
+    wood = _roll_resources(world, 1, 0, "forest", [], random.Random(1))
+    assert [n["type"] for n in wood] == ["wood"]
+    assert _roll_resources(world, 0, 1, "plains", [], random.Random(1)) == []
+
+
+def test_poi_index_tracks_adds_removes_and_footprints(tmp_path) -> None:
+    import json
+
+    shard = {
+        "grid": [["plains"] * 4 for _ in range(4)],
+        "layers": {"settlements": {"cities": [{"x": 1, "y": 1, "footprint": [[1, 1], [2, 1], [1, 2], [2, 2]]}]}},
+        "sites": [{"type": "ruin", "x": 3, "y": 0}],
+    }
+    path = tmp_path / "poi.json"
+    path.write_text(json.dumps(shard))
+    world = load_world(path)
+
+    assert world.poi_at(2, 2)["type"] == "city"
+    assert world.poi_at(3, 0)["type"] == "ruin"
+    assert world.poi_at(0, 0) is None
+
+    camp = world.add_poi({"x": 2, "y": 2, "type": "camp"})
+    assert [p["type"] for p in world.pois_at(2, 2)] == ["city", "camp"]
+    assert world.remove_poi(camp) and not world.remove_poi(camp)
+    assert [p["type"] for p in world.pois_at(2, 2)] == ["city"]
+
+    # direct appends (legacy callers) are picked up on the next lookup
+    world.pois.append({"pos": [0, 3], "type": "well"})
+    assert world.poi_at(0, 3)["type"] == "well"
+    assert world.poi_tiles() == {(1, 1), (2, 1), (1, 2), (2, 2), (3, 0), (0, 3)}
+
+    # remove + append keeps the length; the index must still notice
+    del world.pois[-1]
+    world.pois.append({"x": 3, "y": 3, "type": "shrine"})
+    assert world.poi_at(0, 3) is None and world.poi_at(3, 3)["type"] == "shrine"
+    world.pois = [{"x": 0, "y": 0, "type": "camp"}]
+    assert world.poi_tiles() == {(0, 0)}
+
+
+def test_settlement_footprints_expand_from_the_anchor(tmp_path) -> None:
+    import json
+
+    shard = {
+        "grid": [["plains"] * 4 for _ in range(4)],
+        "sites": [{"type": "town", "x": 1, "y": 1, "footprint": {"w": 2, "h": 2}},
+                  {"type": "ruin", "pos": [3, 0], "footprint": "big"}],
+    }
+    path = tmp_path / "fp.json"
+    path.write_text(json.dumps(shard))
+    world = load_world(path)
+    assert world.poi_tiles() == {(1, 1), (2, 1), (1, 2), (2, 2), (3, 0)}
+
+
+def test_palette_grid_keeps_string_api_and_biome_tables(tmp_path) -> None:
+    import json
+    import sys
+
+    rows = [["ocean", "plains", "Mountains"], ["forest", "forest", "ocean"]]
+    path = tmp_path / "pal.json"
+    path.write_text(json.dumps({"grid": rows}))
+    world = load_world(path)
+
+    assert world.grid.palette == ["ocean", "plains", "Mountains", "forest"]
+    assert world.grid.to_rows() == rows and world.grid[1] == rows[1] and len(world.grid) == 2
+    assert world.biome_at(2, 0) == "Mountains" and world.biome_at(5, 5) == "void"
+    assert world.biome_id_at(1, 1) == 3 and world.biome_id_at(-1, 0) == -1
+
+    props = world.biome_props
+    assert [props["water"][world.biome_id_at(x, 0)] for x in range(3)] == [1, 0, 0]
+    assert props["impassable"][world.biome_id_at(2, 0)] == 1
+    assert props["safe"][world.grid.code("ocean")] == 1
+    assert props["spawn"][world.grid.code("forest")] == ("rat", "wolf")
+
+    big = [["plains", "forest", "hills", "coast"] * 64 for _ in range(256)]
+    as_lists = sys.getsizeof(big) + sum(sys.getsizeof(r) for r in big)
+    assert BiomeGrid.from_rows(big).nbytes * 8 < as_lists
+
+
+def test_room_cache_budget_stats_and_pinned_settlements(tmp_path, monkeypatch) -> None:
+    from engine import persistence
+    from engine.world_loader import get_room, persist_room
+
+    monkeypatch.setattr(persistence, "DB_PATH", tmp_path / "rooms.db")
+    monkeypatch.setattr(persistence, "WRITER", persistence.WriteBehind())
+    path = Path(__file__).parent / "fixtures" / "sample_shard.json"
+    world = load_world(path, room_cache={"maxBytes": 1, "pinSettlements": True})
+    cache = world._rooms
+
+    town = get_room(world, 0, 0)          # the city tile is pinned
+    get_room(world, 1, 1)
+    get_room(world, 0, 1)                 # over budget: evicts (1, 1), never (0, 0)
+    assert list(cache) == [(0, 0), (0, 1)]
+    assert cache.resident_bytes == sum(cache.sizes.values()) > 1
+    assert get_room(world, 0, 0) is town
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["pinned"]) == (1, 3, 1, 1)
+    assert stats["loads"]["roll"]["count"] == 3
+
+    before = cache.sizes[(0, 0)]
+    town.searchables.append({"id": "search-9", "type": "forage", "table": "meadow_common", "once": False})
+    persist_room(town, world)
+    assert cache.sizes[(0, 0)] > before
+
+
+def test_prefetch_ring_batches_loads_and_spares_pinned_and_dirty_rooms(tmp_path, monkeypatch) -> None:
+    from engine import persistence
+    from engine.world_loader import Room, RoomPrefetcher, get_room, persist_room, prefetch_ring
+
+    monkeypatch.setattr(persistence, "DB_PATH", tmp_path / "rooms.db")
+    monkeypatch.setattr(persistence, "WRITER", persistence.WriteBehind())
+    path = Path(__file__).parent / "fixtures" / "sample_shard.json"
+    world = load_world(path)
+    persistence.save_room(Room(world_id=world.id, x=1, y=1, biome="ocean", tags=["stored"]))
+    queries = []
+    real = persistence.load_rooms
+    monkeypatch.setattr(persistence, "load_rooms", lambda wid, keys: queries.append(sorted(keys)) or real(wid, keys))
+
+    get_room(world, 0, 0)
+    assert prefetch_ring(world, 0, 0) == 3
+    assert queries == [[(0, 1), (1, 0), (1, 1)]]
+    assert world._rooms[(1, 1)].tags == ["stored"]
+    assert get_room(world, 0, 1).dirty and world._rooms.stats()["hits"] == 1
+
+    # no room left in the budget: pinned and dirty rooms stay, the prefetch is dropped
+    persistence.WRITER.drain()
+    world = load_world(path, room_cache={"maxRooms": 2, "pinSettlements": True})
+    get_room(world, 0, 0)                 # pinned city tile
+    persist_room(get_room(world, 0, 1), world)
+    assert prefetch_ring(world, 0, 0) == 0 and list(world._rooms) == [(0, 0), (0, 1)]
+    persistence.WRITER.drain()            # clean now: prefetch may replace it
+    prefetcher = RoomPrefetcher()
+    prefetcher._jobs[(id(world), 0, 0)] = (world, 0, 0)
+    # the landmark at (1, 0) is a POI but not a settlement, so it is not pinned either
+    assert not world.is_settlement(1, 0) and world.is_settlement(0, 0)
+    assert prefetcher.run_pending() == 2 and list(world._rooms) == [(0, 0), (1, 1)]
+
+
+def test_get_room_keeps_a_room_the_prefetcher_inserted_first(tmp_path, monkeypatch) -> None:
+    from engine import persistence
+    from engine import world_loader
+    from engine.world_loader import _roll_room, get_room
+
+    monkeypatch.setattr(persistence, "DB_PATH", tmp_path / "rooms.db")
+    monkeypatch.setattr(persistence, "WRITER", persistence.WriteBehind())
+    world = load_world(Path(__file__).parent / "fixtures" / "sample_shard.json")
+    prefetched = []
+    real_roll = world_loader._roll_room
+
+    def racing_roll(w, x, y):
+        # the prefetch thread wins the race while this request is still rolling
+        prefetched.append(_roll_room(w, x, y))
+        w._rooms.offer((x, y), prefetched[0])
+        persistence.WRITER.mark(prefetched[0])
+        return real_roll(w, x, y)
+
+    monkeypatch.setattr(world_loader, "_roll_room", racing_roll)
+    room = get_room(world, 1, 1)
+    assert room is prefetched[0] and world._rooms.peek((1, 1)) is room
+    assert persistence.WRITER.pending() == 1 and persistence.WRITER.queued((world.id, 1, 1)) is room
+
+
+def test_enemy_rolls_use_the_palette_tables(tmp_path) -> None:
+    import json
+    import random
+
+    from engine.world_loader import _roll_enemies
+
+    path = tmp_path / "spawn.json"
+    path.write_text(json.dumps({"grid": [["forest", "ocean", "plains"]]}))
+    world = load_world(path)
+    world.biome_props["spawn"][world.grid.code("plains")] = ("rat", "wolf")  # tables drive the roll
+    rolled = lambda x, tags=(): {e["type"] for e in _roll_enemies(world, x, 0, list(tags), random.Random(1), density=2.0)}
+    assert rolled(0) == rolled(2) == {"rat", "wolf"}
+    assert rolled(1) == set() and rolled(5) == set() and rolled(0, ["settlement"]) == set()